@@ -0,0 +1,187 @@
+import argparse
+import csv
+import functools
+import glob
+import json
+import os
+import statistics
+import sys
+import time
+import tracemalloc
+from typing import Optional
+#* Chỉ import phần logic (không pygame) => chạy được trên máy không có màn hình
+from modules.game import Game
+from modules.bitboard import BitboardGame
+from modules.pathfinding import PathFinder, find_multi_stage_path
+from modules.tour import find_tour_path
+from modules.arena import process_peak_rss_mb
+from modules.distance import clear_oracle_cache
+from modules.ghosts import clear_trajectory_cache
+from modules.parallel import ParallelStageEvaluator
+
+STATE_BACKENDS = {"set": Game, "bitboard": BitboardGame}
+#* A* 1 lần trên toàn bộ state (không chia chặng) => so sánh trực tiếp các heuristic (xem HEURISTICS)
+def find_full_path(game, reports: list, heuristic: str) -> list[str]:
+  finder = PathFinder(game, heuristic=heuristic)
+  path = finder.find()
+  reports.append(finder.report(game.exit_pos, path))
+  return path
+
+PLANNERS = {
+  "greedy": find_multi_stage_path,
+  "tour": find_tour_path,
+  "astar": functools.partial(find_full_path, heuristic="nearest"),
+  "astar-mst": functools.partial(find_full_path, heuristic="mst"),
+}
+#* Planner nhiều chặng nhận ParallelStageEvaluator (--workers)
+STAGED_PLANNERS = ("greedy", "tour")
+#* Các chỉ số được so với baseline (càng nhỏ càng tốt): bộ đếm tất định, giống nhau trên mọi máy
+REGRESSION_METRICS = ("nodes_expanded", "heap_pushes", "path_length")
+#* Thời gian phụ thuộc máy => chỉ lưu khi có --save-time, so với ngưỡng riêng (--time-threshold, lỏng hơn)
+TIME_METRIC = "wall_median_s"
+CSV_FIELDS = ("layout", "backend", "planner", "area", "food", "repeat", "wall_first_s", "wall_median_s", "wall_min_s",
+              "nodes_expanded", "heap_pushes", "stale_pops", "path_length", "peak_traced_mb", "process_peak_rss_mb")
+
+def parse_args():
+  parser = argparse.ArgumentParser(description="Headless solver benchmark")
+  parser.add_argument("layouts", nargs="?", default="layouts", help="Layout file or directory of .txt layouts")
+  parser.add_argument("--repeat", type=int, default=5, help="Runs per layout")
+  parser.add_argument("--backend", choices=STATE_BACKENDS, default="set")
+  parser.add_argument("--planner", choices=PLANNERS, default="greedy")
+  parser.add_argument("--workers", type=int, default=1,
+                      help="Processes building distance tables for the greedy/tour planners (1 = serial)")
+  parser.add_argument("--json", help="Write results as JSON to this file")
+  parser.add_argument("--csv", help="Write results as CSV to this file")
+  parser.add_argument("--baseline", help="Baseline JSON to compare against")
+  parser.add_argument("--threshold", type=float, default=0.2,
+                      help="Allowed relative regression of the counters over the baseline (0.2 = 20%%)")
+  parser.add_argument("--time-threshold", type=float, default=1.0,
+                      help="Allowed relative regression of the cold median time, if the baseline has one "
+                           "(1.0 = 2x slower)")
+  parser.add_argument("--save-baseline", help="Write the results as a new baseline JSON")
+  parser.add_argument("--save-time", action="store_true",
+                      help="Also store the machine-specific median time in the saved baseline")
+  return parser.parse_args()
+
+def layout_files(path: str) -> list[str]:
+  if os.path.isdir(path):
+    return sorted(glob.glob(os.path.join(path, "*.txt")))
+  return [path]
+
+#* Chạy planner 1 lần từ cache trống (oracle khoảng cách, quỹ đạo ghost), trả về (thời gian, đường đi, danh sách SearchReport).
+#* Thời gian đo được gồm cả BFS / dựng bảng khoảng cách => thay đổi ở các phần đó hiện ra trong chỉ số thời gian
+def run_once(planner, backend, map_str: str):
+  clear_oracle_cache()
+  clear_trajectory_cache()
+  game = backend.load_map(map_str)
+  reports = []
+  start = time.perf_counter()
+  path = planner(game, reports=reports)
+  return time.perf_counter() - start, path, reports
+
+def bench_layout(file_name: str, backend_name: str, planner_name: str, repeat: int,
+                 evaluator: Optional[ParallelStageEvaluator] = None) -> dict:
+  with open(file_name, "r") as map_file:
+    map_str = map_file.read()
+  planner = PLANNERS[planner_name]
+  if evaluator is not None and planner_name in STAGED_PLANNERS:
+    planner = functools.partial(planner, evaluator=evaluator)
+  backend = STATE_BACKENDS[backend_name]
+  game = backend.load_map(map_str)
+
+  walls = []
+  for _ in range(repeat):
+    wall, path, reports = run_once(planner, backend, map_str)
+    walls.append(wall)
+
+  #* Đo bộ nhớ ở 1 lần chạy riêng (tracemalloc làm chậm => không tính vào thời gian)
+  tracemalloc.start()
+  run_once(planner, backend, map_str)
+  _, peak_traced = tracemalloc.get_traced_memory()
+  tracemalloc.stop()
+
+  return {
+    "layout": os.path.basename(file_name),
+    "backend": backend_name,
+    "planner": planner_name,
+    "area": game.w * game.h, #* Kích thước map và số food: trục x khi vẽ đồ thị quét kích thước
+    "food": len(game.food_points),
+    "repeat": repeat,
+    "wall_first_s": walls[0], #* Lần đầu (có cả chi phí import / khởi tạo của tiến trình)
+    "wall_median_s": statistics.median(walls), #* Mọi lần chạy đều bắt đầu từ cache trống
+    "wall_min_s": min(walls),
+    "nodes_expanded": sum(report[6] for report in reports),
+    "heap_pushes": sum(report[7] for report in reports),
+    "stale_pops": sum(report[8] for report in reports),
+    "path_length": len(path),
+    "peak_traced_mb": peak_traced / (1024 * 1024),
+    #* Đỉnh RSS của cả tiến trình benchmark tính tới layout này (các layout trước cũng tính vào), không phải riêng layout
+    "process_peak_rss_mb": process_peak_rss_mb(),
+  }
+
+#* So với baseline: trả về danh sách mô tả các chỉ số bị chậm/tệ hơn quá ngưỡng
+def find_regressions(results: list[dict], baseline: dict, threshold: float, time_threshold: float) -> list[str]:
+  regressions = []
+  for result in results:
+    base = baseline.get(f"{result['layout']}:{result['backend']}:{result['planner']}")
+    if base is None:
+      continue
+    for metric, allowed in [(metric, threshold) for metric in REGRESSION_METRICS] + [(TIME_METRIC, time_threshold)]:
+      if metric not in base:
+        continue
+      limit = base[metric] * (1 + allowed)
+      if result[metric] > limit:
+        regressions.append(f"{result['layout']} [{result['backend']}/{result['planner']}] {metric}: "
+                           f"{result[metric]:.4g} > {base[metric]:.4g} (+{allowed:.0%})")
+  return regressions
+
+def main():
+  args = parse_args()
+  files = layout_files(args.layouts)
+  if not files:
+    print(f"Error: no layouts found in '{args.layouts}'.")
+    return 2
+
+  results = []
+  evaluator = ParallelStageEvaluator(args.workers) if args.workers > 1 else None
+  try:
+    for file_name in files:
+      result = bench_layout(file_name, args.backend, args.planner, args.repeat, evaluator)
+      results.append(result)
+      print(f"{result['layout']:<20} median {result['wall_median_s'] * 1000:8.1f} ms  "
+            f"first {result['wall_first_s'] * 1000:8.1f} ms  expanded {result['nodes_expanded']:>7}  "
+            f"pushes {result['heap_pushes']:>7}  stale {result['stale_pops']:>6}  "
+            f"steps {result['path_length']:>4}  peak {result['peak_traced_mb']:.1f} MB")
+  finally:
+    if evaluator is not None:
+      evaluator.shutdown()
+
+  if args.json:
+    with open(args.json, "w") as json_file:
+      json.dump(results, json_file, indent=2)
+  if args.csv:
+    with open(args.csv, "w", newline="") as csv_file:
+      writer = csv.DictWriter(csv_file, fieldnames=CSV_FIELDS)
+      writer.writeheader()
+      writer.writerows(results)
+  if args.save_baseline:
+    with open(args.save_baseline, "w") as baseline_file:
+      metrics = REGRESSION_METRICS + ((TIME_METRIC,) if args.save_time else ())
+      json.dump({f"{r['layout']}:{r['backend']}:{r['planner']}": {m: r[m] for m in metrics} for r in results},
+                baseline_file, indent=2)
+    print(f"Baseline saved to '{args.save_baseline}'.")
+
+  if args.baseline:
+    with open(args.baseline, "r") as baseline_file:
+      baseline = json.load(baseline_file)
+    regressions = find_regressions(results, baseline, args.threshold, args.time_threshold)
+    if regressions:
+      print("\nREGRESSIONS:")
+      for line in regressions:
+        print(f"  {line}")
+      return 1
+    print("\nNo regressions against baseline.")
+  return 0
+
+if __name__ == "__main__":
+  sys.exit(main())
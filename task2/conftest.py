@@ -0,0 +1 @@
+#* pytest chạy từ thư mục task2: thư mục này được thêm vào sys.path => tests import được `modules`
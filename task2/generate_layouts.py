@@ -0,0 +1,48 @@
+import argparse
+import os
+import sys
+#* Không phụ thuộc pygame (giống benchmark.py)
+from modules.layout_gen import size_sweep
+
+DEFAULT_SIZES = ["36x18", "72x36", "144x72", "288x144"]
+
+def parse_size(text: str) -> tuple[int, int]:
+  #* "WxH" hoặc "N" (map vuông N x N)
+  width, _, height = text.lower().partition("x")
+  try:
+    return int(width), int(height or width)
+  except ValueError:
+    raise argparse.ArgumentTypeError(f"invalid size '{text}' (expected WxH or N)")
+
+def parse_args():
+  parser = argparse.ArgumentParser(description="Generate a sweep of random, solvable layouts")
+  parser.add_argument("out_dir", help="Directory the .txt layouts are written to")
+  parser.add_argument("--sizes", nargs="+", type=parse_size, default=[parse_size(s) for s in DEFAULT_SIZES],
+                      help=f"Layout sizes as WxH or N (default: {' '.join(DEFAULT_SIZES)})")
+  parser.add_argument("--food", nargs="+", type=int, default=[10], help="Food counts to sweep")
+  parser.add_argument("--pies", type=int, default=2, help="Magic pies per layout")
+  parser.add_argument("--ghosts", type=int, default=0, help="Ghosts per layout")
+  parser.add_argument("--wall-density", type=float, default=0.35, help="Target fraction of interior walls (0-1)")
+  parser.add_argument("--no-portals", action="store_true", help="Wall off the four corner portals (Game always places portals at the inner corners, so their positions are not configurable)")
+  parser.add_argument("--seed", type=int, default=0)
+  parser.add_argument("--no-verify", action="store_true",
+                      help="Skip the solver check for layouts with ghosts")
+  return parser.parse_args()
+
+def main():
+  args = parse_args()
+  os.makedirs(args.out_dir, exist_ok=True)
+  try:
+    for name, map_str in size_sweep(args.sizes, args.food, args.seed, pies=args.pies, ghosts=args.ghosts,
+                                    wall_density=args.wall_density, portals=not args.no_portals,
+                                    verify=not args.no_verify):
+      with open(os.path.join(args.out_dir, name), "w") as map_file:
+        map_file.write(map_str + "\n")
+      print(f"Wrote {name}")
+  except ValueError as e:
+    print(f"Error: {e}")
+    return 1
+  return 0
+
+if __name__ == "__main__":
+  sys.exit(main())
@@ -1,28 +1,125 @@
 import time
 import sys
+import argparse
 #*Cần import các lớp từ file module
-from modules import Game, Renderer , find_multi_stage_path, compress_path
+from modules import Game, BitboardGame, Renderer , find_multi_stage_path, find_tour_path, compress_path
+from modules.arena import MAX_NODES
+from modules.pathfinding import BudgetExceeded, decompress_path
+from modules.solution_cache import SolutionCache
+from modules.stats import SearchStats
+from modules.parallel import ParallelStageEvaluator
+from modules.tour import simulate_path
+from modules.config import VIEW_MODES, VIEW_MODE, STEPS_PER_SECOND
 
 
 #*Kích thước bản đồ 
 TITLE = "PACMAN GAME ASEAN"
 
 
+#* Backend lưu trạng thái cho A*: "set" (frozenset) hoặc "bitboard" (bitmask số nguyên)
+STATE_BACKENDS = {"set": Game, "bitboard": BitboardGame}
+#* Chế độ lập kế hoạch: "greedy" (food gần nhất từng chặng) hoặc "tour" (thứ tự food tối ưu bằng Held-Karp / 2-opt)
+PLANNERS = {"greedy": find_multi_stage_path, "tour": find_tour_path}
+
+def parse_args():
+  parser = argparse.ArgumentParser(description=TITLE)
+  parser.add_argument("map_file", nargs="?", default="layouts/maze.txt", help="Map file (.txt)")
+  parser.add_argument("--backend", choices=STATE_BACKENDS, default="set",
+                      help="State backend used by the A* search")
+  parser.add_argument("--planner", choices=PLANNERS, default="greedy",
+                      help="Planning mode for the food visiting order")
+  parser.add_argument("--max-nodes", type=int, default=MAX_NODES,
+                      help="Node ceiling per A* search (bounds memory use)")
+  parser.add_argument("--time-budget", type=float, default=None,
+                      help="Wall-clock budget in seconds for the anytime ARA* search; returns the best path found in time, "
+                           "or falls back to the greedy planner without a budget if no path was found in time")
+  parser.add_argument("--no-cache", action="store_true",
+                      help="Ignore the on-disk solution cache and always recompute the path")
+  parser.add_argument("--view", choices=VIEW_MODES, default=VIEW_MODE,
+                      help="Map view: fit the whole map, follow Pacman with a camera, or pick by map size (auto)")
+  parser.add_argument("--steps-per-second", type=float, default=STEPS_PER_SECOND,
+                      help="Auto-mode simulation speed, independent of the frame rate")
+  parser.add_argument("--workers", type=int, default=None,
+                      help="Processes used to build distance tables between stages (default: all cores, 1 = serial)")
+  return parser.parse_args()
+
+#* In số node và bộ nhớ arena của từng lần A*; đỉnh RSS là của cả tiến trình => in 1 lần
+def print_search_reports(search_reports):
+  if not search_reports:
+    return
+  print("\nSearch memory:")
+  for i, (target, steps, nodes, arena_bytes, _, bound, *_) in enumerate(search_reports):
+    print(f"  #{i+1} -> {target}: {steps} steps (<= {bound:.2f}x optimal), {nodes} nodes, "
+          f"arena {arena_bytes / 1024:.1f} KB")
+  process_peak_rss = search_reports[-1][4]
+  rss = f"{process_peak_rss:.1f} MB" if process_peak_rss is not None else "N/A"
+  print(f"  process peak RSS (whole run, not per search): {rss}")
+
+#* In bộ đếm và thời gian từng pha của A* (tổng + từng chặng)
+def print_search_stats(stats):
+  if not stats.stages:
+    return
+  times = stats.times
+  print("\nSearch stats:")
+  print(f"  expanded {stats.expanded}, generated {stats.generated}, pushes {stats.pushes}, "
+        f"stale pops {stats.stale_pops}, open peak {stats.open_peak}, BFS calls {stats.bfs_calls}")
+  if stats.heuristic_hits or stats.heuristic_misses:
+    print(f"  nearest-food cache: {stats.heuristic_hits} hits, {stats.heuristic_misses} misses")
+  print(f"  search {stats.search_time:.3f}s = estimate {times['estimate']:.3f}s + get_moves {times['get_moves']:.3f}s "
+        f"+ move_to {times['move_to']:.3f}s + other {stats.search_time - sum(times.values()):.3f}s")
+  for i, stage in enumerate(stats.stages):
+    print(f"  #{i+1} -> {stage.label}: expanded {stage.expanded}, generated {stage.generated}, "
+          f"pushes {stage.pushes}, stale {stage.stale_pops}, open peak {stage.open_peak}, "
+          f"BFS {stage.bfs_calls}, {stage.search_time * 1000:.1f} ms")
+
 def main():
-  #* Tên file map mặc định
-  map_file_name = "layouts/maze.txt"
-  if len(sys.argv) > 1:
-    map_file_name = sys.argv[1]
+  args = parse_args()
+  #* Tên file map (mặc định: layouts/maze.txt)
+  map_file_name = args.map_file
   try:
     with open(map_file_name, "r") as map_file:
       map_str = map_file.read()
-      game_src = Game.load_map(map_str)
+      game_src = STATE_BACKENDS[args.backend].load_map(map_str)
       print("\n    A* PATHFINDER MODE")
       print("===============================")
       print(f"Map: {map_file_name} ({game_src.w}x{game_src.h}) \n{map_str}")
       print("Computing path.")
       pathfind_time = time.time()
-      path = find_multi_stage_path(game_src)
+      search_reports = []
+      search_stats = SearchStats(timing=True)
+      solution_cache = SolutionCache()
+      cache_key = SolutionCache.key(map_str, game_src, args.planner, args.time_budget)
+      cached = None if args.no_cache else solution_cache.get(cache_key)
+      if cached is not None:
+        path = decompress_path(cached["path"])
+        print(f"Loaded path from solution cache (computed in {cached['stats']['duration']:.2f}s, "
+              f"<= {cached['stats'].get('suboptimality', 1.0):.2f}x optimal).")
+      else:
+        deadline = time.monotonic() + args.time_budget if args.time_budget is not None else None
+        evaluator = ParallelStageEvaluator(args.workers)
+        try:
+          try:
+            path = PLANNERS[args.planner](game_src, args.max_nodes, search_reports, deadline, stats=search_stats,
+                                          evaluator=evaluator)
+          except BudgetExceeded:
+            #* Hết ngân sách khi chưa có đường => dùng planner greedy không giới hạn thời gian (chỉ giới hạn node)
+            print(f"No path found within the time budget ({args.time_budget}s). "
+                  "Falling back to the greedy planner without a time budget.")
+            cache_key = SolutionCache.key(map_str, game_src, "greedy")
+            search_reports.clear()
+            path = find_multi_stage_path(game_src, args.max_nodes, search_reports, stats=search_stats,
+                                         evaluator=evaluator)
+        finally:
+          evaluator.shutdown()
+        #* Chỉ lưu đường đi thắng (không lưu đường rỗng / không thắng để lần chạy sau không dùng lại)
+        if path and simulate_path(game_src, path):
+          solution_cache.put(cache_key, compress_path(path), {
+            "steps": len(path),
+            "duration": time.time() - pathfind_time,
+            "searches": len(search_reports),
+            "nodes": sum(report[2] for report in search_reports),
+            "suboptimality": max((report[5] for report in search_reports), default=1.0),
+          })
 
       pathfind_duration = time.time() - pathfind_time
       
@@ -33,11 +130,14 @@ def main():
         f"\nPathfind duration: {pathfind_duration:.2f}s",
         f"\nSteps: {len(path) if path else 'N/A'}"
       )
+      print_search_reports(search_reports)
+      print_search_stats(search_stats)
       if path:
         print("RUN A* SUCCESSFULLY !")
         print("\nCompressed Path:", compress_path(path))
         #* Khởi tạo Renderer
-        renderer = Renderer(game, map_str, TITLE, 1280, 720)
+        renderer = Renderer(game, map_str, TITLE, 1280, 720, view_mode=args.view,
+                            steps_per_second=args.steps_per_second)
         
         #*Chạy game với đường đi A* đã tìm được
         print("===============================")
@@ -53,6 +153,7 @@ def main():
       else:
         print("RUN A* DEFEATED !")
         print("\nCompressed Path:: No way found!")
+        print("No winning path: a target is unreachable or a search hit --max-nodes.")
       
   except FileNotFoundError:
       print(f"Error: Map file not found '{map_file_name}'.")
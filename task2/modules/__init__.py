@@ -1,3 +1,11 @@
 from .game import Game
+from .bitboard import BitboardGame
 from .pathfinding import compress_path,find_multi_stage_path
-from .renderer import Renderer
\ No newline at end of file
+from .tour import find_tour_path
+
+#* Renderer (pygame) chỉ được import khi cần => các công cụ không giao diện (benchmark) không phụ thuộc pygame
+def __getattr__(name):
+  if name == "Renderer":
+    from .renderer import Renderer
+    return Renderer
+  raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
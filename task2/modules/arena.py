@@ -0,0 +1,86 @@
+import sys
+from array import array
+from typing import Dict, List, Optional
+try:
+  import resource #* Chỉ có trên Linux/macOS
+except ImportError:
+  resource = None
+
+MAX_NODES = 2_000_000 #* Trần số node mặc định cho 1 lần tìm kiếm (~ giới hạn bộ nhớ)
+NO_PARENT = -1
+
+class NodeLimitExceeded(Exception):
+  #* Báo hiệu tìm kiếm vượt trần số node của arena
+  pass
+
+class NodeArena:
+  #! KHO NODE GỌN CHO A* *
+  #* Mỗi node là 1 id số nguyên; cha, hành động và g-cost nằm trong các mảng array (không tạo tuple/dict cho mỗi node).
+  #* State chỉ được giữ khi node còn mở; node đã mở rộng sẽ bỏ tham chiếu state để giải phóng bộ nhớ.
+  __slots__ = ('states', 'parents', 'actions', 'g_costs', 'ids', 'action_names', '_action_codes', 'max_nodes')
+  def __init__(self, max_nodes: int = MAX_NODES):
+    self.states: List[Optional[object]] = [] #* state theo id (None khi đã đóng)
+    self.parents = array('i') #* id của node cha
+    self.actions = array('h') #* mã hành động đi từ cha tới node
+    self.g_costs = array('i') #* g-cost tốt nhất hiện biết
+    self.ids: Dict[int, int] = {} #* Zobrist key -> id
+    self.action_names: List[str] = [] #* mã -> tên hướng
+    self._action_codes: Dict[str, int] = {} #* tên hướng -> mã
+    self.max_nodes = max_nodes
+
+  def __len__(self) -> int:
+    return len(self.parents)
+
+  def _action_code(self, action: str) -> int:
+    code = self._action_codes.get(action)
+    if code is None:
+      code = self._action_codes[action] = len(self.action_names)
+      self.action_names.append(action)
+    return code
+
+  #* Thêm node mới, trả về id
+  def add(self, key: int, state, parent: int, action: Optional[str], g_cost: int) -> int:
+    node = len(self.parents)
+    if node >= self.max_nodes:
+      raise NodeLimitExceeded(f"node limit {self.max_nodes} reached")
+    self.ids[key] = node
+    self.states.append(state)
+    self.parents.append(parent)
+    self.actions.append(self._action_code(action) if action is not None else -1)
+    self.g_costs.append(g_cost)
+    return node
+
+  #* Cập nhật node đã có khi tìm được đường tốt hơn (mở lại node nếu đã đóng)
+  def relax(self, node: int, state, parent: int, action: str, g_cost: int) -> None:
+    if self.states[node] is None:
+      self.states[node] = state
+    self.parents[node] = parent
+    self.actions[node] = self._action_code(action)
+    self.g_costs[node] = g_cost
+
+  #* Đánh dấu node đã mở rộng => bỏ state
+  def close(self, node: int) -> None:
+    self.states[node] = None
+
+  #* Dựng lại đường đi bằng cách lần theo id cha
+  def path_to(self, node: int) -> List[str]:
+    path = []
+    parents, actions, names = self.parents, self.actions, self.action_names
+    while parents[node] != NO_PARENT:
+      path.append(names[actions[node]])
+      node = parents[node]
+    return path[::-1]
+
+  #* Ước lượng bộ nhớ (byte) của các mảng và bảng id (không tính state đang mở)
+  def nbytes(self) -> int:
+    return (sum(len(a) * a.itemsize for a in (self.parents, self.actions, self.g_costs))
+            + sys.getsizeof(self.ids) + sys.getsizeof(self.states))
+
+#* Đỉnh RSS của CẢ tiến trình từ lúc khởi động tới giờ (MB, ru_maxrss), None nếu hệ điều hành không hỗ trợ.
+#* Không giảm giữa các lần tìm kiếm => không phải bộ nhớ riêng của 1 lần tìm kiếm (xem NodeArena.nbytes cho việc đó)
+def process_peak_rss_mb() -> Optional[float]:
+  if resource is None:
+    return None
+  peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+  #* Linux trả về KB, macOS trả về byte
+  return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
@@ -0,0 +1,106 @@
+import itertools
+import multiprocessing
+import queue
+import time
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Dict, List, Optional, Tuple
+from .game import Game
+from .pathfinding import find_multi_stage_path
+
+class PlanningCancelled(Exception):
+  #* Job lập kế hoạch bị hủy (reset hoặc đổi mode trước khi xong)
+  pass
+
+#! PHẦN CHẠY TRONG TIẾN TRÌNH CON *
+#* Hàng đợi tiến độ và id job bị hủy được truyền 1 lần khi khởi tạo tiến trình con
+_progress_queue = None
+_cancelled_job = None
+
+def _init_worker(progress_queue, cancelled_job) -> None:
+  global _progress_queue, _cancelled_job
+  _progress_queue, _cancelled_job = progress_queue, cancelled_job
+
+def _plan_job(job_id: int, game: Game, time_budget: Optional[float]) -> Tuple[List[str], float]:
+  #* Kiểm tra hủy sau mỗi chặng và gửi tiến độ về tiến trình chính. Trả về (đường đi, cận tối ưu).
+  #* Hết time_budget khi chưa có đường => BudgetExceeded được ném lại ở PlanningHandle.result()
+  def progress(done: int, total: int) -> None:
+    if _cancelled_job.value >= job_id:
+      raise PlanningCancelled(f"planning job {job_id} cancelled")
+    _progress_queue.put((job_id, done, total))
+
+  progress(0, len(game.food_points) + 1)
+  deadline = time.monotonic() + time_budget if time_budget is not None else None
+  reports = []
+  path = find_multi_stage_path(game, reports=reports, deadline=deadline, progress=progress)
+  return path, max((report[5] for report in reports), default=1.0)
+
+#! PHẦN CHẠY TRONG TIẾN TRÌNH CHÍNH *
+class PlanningHandle:
+  #* Handle kiểu future của 1 job: done() / result() / progress
+  __slots__ = ('job_id', 'future', 'stages_done', 'stages_total', 'suboptimality')
+  def __init__(self, job_id: int, future: Future):
+    self.job_id = job_id
+    self.future = future
+    self.stages_done = 0
+    self.stages_total = 0
+    self.suboptimality = None #* Cận trên của (độ dài đường / độ dài tối ưu), có sau khi gọi result()
+
+  def done(self) -> bool:
+    return self.future.done()
+
+  #* Trả về đường đi; ném PlanningCancelled nếu job đã bị hủy, BudgetExceeded nếu hết thời gian khi chưa có đường
+  def result(self) -> List[str]:
+    if self.future.cancelled():
+      raise PlanningCancelled(f"planning job {self.job_id} cancelled")
+    path, self.suboptimality = self.future.result()
+    return path
+
+  #* Tỉ lệ hoàn thành (0.0 - 1.0)
+  @property
+  def progress(self) -> float:
+    return self.stages_done / self.stages_total if self.stages_total else 0.0
+
+class BackgroundPlanner:
+  #! LẬP KẾ HOẠCH NỀN BẰNG PROCESS POOL *
+  #* A* chạy ở tiến trình riêng (không bị GIL chặn) => vòng lặp pygame vẫn xử lý sự kiện và vẽ bình thường.
+  #* Tiến trình con chỉ được tạo khi submit lần đầu.
+  __slots__ = ('_context', '_executor', '_progress_queue', '_cancelled_job', '_job_ids', '_handles')
+  def __init__(self):
+    self._context = multiprocessing.get_context("spawn") #* Không fork tiến trình đang chạy pygame
+    self._executor = None
+    self._progress_queue = self._context.Queue()
+    self._cancelled_job = self._context.Value('q', 0) #* Mọi job có id <= giá trị này bị hủy
+    self._job_ids = itertools.count(1)
+    self._handles: Dict[int, PlanningHandle] = {}
+
+  def submit(self, game: Game, time_budget: Optional[float] = None) -> PlanningHandle:
+    if self._executor is None:
+      self._executor = ProcessPoolExecutor(max_workers=1, mp_context=self._context, initializer=_init_worker,
+                                           initargs=(self._progress_queue, self._cancelled_job))
+    job_id = next(self._job_ids)
+    handle = PlanningHandle(job_id, self._executor.submit(_plan_job, job_id, game, time_budget))
+    self._handles[job_id] = handle
+    handle.future.add_done_callback(lambda _: self._handles.pop(job_id, None))
+    return handle
+
+  #* Hủy job: chưa chạy => bỏ khỏi hàng đợi; đang chạy => dừng ở lần báo tiến độ kế tiếp
+  def cancel(self, handle: PlanningHandle) -> None:
+    handle.future.cancel()
+    with self._cancelled_job.get_lock():
+      self._cancelled_job.value = max(self._cancelled_job.value, handle.job_id)
+
+  #* Cập nhật tiến độ từ tiến trình con (không chặn), gọi mỗi frame
+  def poll(self) -> None:
+    while True:
+      try:
+        job_id, done, total = self._progress_queue.get_nowait()
+      except queue.Empty:
+        return
+      handle = self._handles.get(job_id)
+      if handle is not None:
+        handle.stages_done, handle.stages_total = done, total
+
+  def shutdown(self) -> None:
+    if self._executor is not None:
+      self._executor.shutdown(wait=False, cancel_futures=True)
+      self._executor = None
@@ -0,0 +1,244 @@
+from typing import Optional, Iterator, Tuple
+from .game import Game, Pos, GhostState, DIRECTION_DELTAS
+from .ghosts import GhostTrajectory, get_trajectory
+from .zobrist import zobrist, Z_ORIENTATION, Z_PLAYER, Z_FOOD, Z_PIE, Z_WALL, Z_POWERUP, Z_ROTATION
+
+#! HÀM TRỢ GIÚP BITMASK *
+#* Ô (x, y) ứng với bit thứ y*w + x
+
+def points_to_mask(points, w: int) -> int:
+  mask = 0
+  for x, y in points:
+    mask |= 1 << (y * w + x)
+  return mask
+
+def mask_to_points(mask: int, w: int) -> Iterator[Pos]:
+  while mask:
+    low = mask & -mask
+    index = low.bit_length() - 1
+    yield index % w, index // w
+    mask ^= low
+
+class BitboardGame:
+  #! TRẠNG THÁI GAME DẠNG BITMASK *
+  #* Cùng API công khai với Game (get_moves, move_to, is_winner, is_game_over) nhưng tường/food/magic
+  #* được lưu bằng số nguyên => ăn vật phẩm chỉ là 1 phép XOR, không cấp phát frozenset mới
+  __slots__ = (
+        'w', 'h', 'player', 'food_mask', 'pie_mask',
+        'wall_mask', 'exit_pos', 'ghost_track', 'ghost_time', 'powerup_turns',
+        'rotation_step', 'orientation', 'portals', 'steps', 'zobrist_key'
+    )
+  def __init__(self, w: int, h: int, player: Pos,
+              food_mask: int, pie_mask: int, wall_mask: int, exit_pos: Pos,
+              ghost_states: Tuple[GhostState, ...] = (),
+              powerup_turns: int = 0,
+              rotation_step: int = 0, portals: Optional[list[Pos]] = None,
+              steps: int = 0, zobrist_key: Optional[int] = None,
+              ghost_track: Optional[GhostTrajectory] = None, ghost_time: int = 0,
+              orientation: int = 0):
+    self.w, self.h = w, h
+    self.player = player
+    self.food_mask = food_mask #* Bitmask vị trí Food
+    self.pie_mask = pie_mask #* Bitmask vị trí Bánh ma thuật
+    self.wall_mask = wall_mask #* Bitmask vị trí Tường
+    self.exit_pos = exit_pos
+    if ghost_track is None:
+      ghost_track = GhostTrajectory(w, h, self.walls, ghost_states, rotation_step)
+    self.ghost_track = ghost_track #* Bảng quỹ đạo ghost dùng chung (xem Game)
+    self.ghost_time = ghost_time
+    self.powerup_turns = powerup_turns
+    self.rotation_step = rotation_step
+    self.orientation = orientation
+    self.portals = portals if portals is not None else [(1, 1), (self.w - 2, 1), (self.w - 2, self.h - 2), (1, self.h - 2)]
+    self.steps = steps
+    self.zobrist_key = zobrist_key if zobrist_key is not None else self._compute_zobrist_key()
+
+  #! CHUYỂN ĐỔI QUA LẠI VỚI Game *
+  @classmethod
+  def from_game(cls, game: Game) -> "BitboardGame":
+    return cls(game.w, game.h, game.player,
+               points_to_mask(game.food_points, game.w), points_to_mask(game.magical_pies, game.w),
+               points_to_mask(game.walls, game.w), game.exit_pos, (),
+               game.powerup_turns, game.rotation_step, game.portals, game.steps,
+               ghost_track=game.ghost_track, ghost_time=game.ghost_time, orientation=game.orientation)
+
+  @classmethod
+  def load_map(cls, map_str: str) -> "BitboardGame":
+    return cls.from_game(Game.load_map(map_str))
+
+  def to_game(self) -> Game:
+    return Game(self.w, self.h, self.player, self.food_points, self.magical_pies,
+                self.walls, self.exit_pos, None,
+                self.powerup_turns, self.rotation_step, self.portals, self.steps,
+                ghost_track=self.ghost_track, ghost_time=self.ghost_time, orientation=self.orientation)
+
+  #* Các tập vị trí được giải mã khi cần (tương thích với code dùng Game)
+  @property
+  def food_points(self) -> frozenset:
+    return frozenset(mask_to_points(self.food_mask, self.w))
+
+  @property
+  def magical_pies(self) -> frozenset:
+    return frozenset(mask_to_points(self.pie_mask, self.w))
+
+  @property
+  def walls(self) -> frozenset:
+    return frozenset(mask_to_points(self.wall_mask, self.w))
+
+  @property
+  def ghost_states(self) -> Tuple[GhostState, ...]:
+    return self.ghost_track.states_at(self.ghost_time)
+
+  def _bit(self, pos: Pos) -> int:
+    return 1 << (pos[1] * self.w + pos[0])
+
+  def _compute_zobrist_key(self) -> int:
+    #* Dùng chung bảng Zobrist với Game => cùng state cho cùng key
+    key = (zobrist(Z_ORIENTATION, self.orientation) ^ zobrist(Z_PLAYER, self.player)
+           ^ zobrist(Z_POWERUP, self.powerup_turns) ^ zobrist(Z_ROTATION, self.rotation_step))
+    for point in mask_to_points(self.food_mask, self.w):
+      key ^= zobrist(Z_FOOD, point)
+    for point in mask_to_points(self.pie_mask, self.w):
+      key ^= zobrist(Z_PIE, point)
+    for point in mask_to_points(self.wall_mask, self.w):
+      key ^= zobrist(Z_WALL, point)
+    key ^= self.ghost_track.key_at(self.ghost_time)
+    return key
+
+  def _set_rotation_step(self, rotation_step: int) -> None:
+    self.zobrist_key ^= zobrist(Z_ROTATION, self.rotation_step) ^ zobrist(Z_ROTATION, rotation_step)
+    self.rotation_step = rotation_step
+
+  #! XOAY BẢN ĐỒ (chỉ đổi orientation, tọa độ giữ nguyên trong khung gốc) *
+  view_size = Game.view_size
+  to_view = Game.to_view
+  _rotate_state = Game._rotate_state
+
+  #! API CÔNG KHAI (giống Game) *
+  def is_game_over(self) -> bool:
+    x, y = self.player
+    return bool((self.ghost_track.occupancy_at(self.ghost_time) >> (y * self.w + x)) & 1)
+
+  def is_winner(self) -> bool:
+    return not self.food_mask and self.player == self.exit_pos
+
+  def get_moves(self) -> dict[str, Pos]:
+    x, y = self.player
+    w, h = self.w, self.h
+    blocked = self.wall_mask if self.powerup_turns == 0 else 0
+    moves = {}
+
+    for direction, (dx, dy) in DIRECTION_DELTAS[self.orientation].items():
+      nx, ny = x + dx, y + dy
+      if not (0 <= nx < w and 0 <= ny < h) or (blocked >> (ny * w + nx)) & 1:
+        continue
+
+      if direction == "STOP":
+        moves["STOP"] = self.player
+        continue
+
+      new_pos = nx, ny
+      moves[direction] = new_pos
+
+      #* Xử lý tele
+      if new_pos in self.portals:
+        current_portal_index = self.portals.index(new_pos)
+        for i, target_pos in enumerate(self.portals):
+          if i != current_portal_index:
+            moves[f"{direction}_TELE_P{i+1}"] = target_pos
+
+    return moves
+
+  def move_to(self, new_pos: Pos, direction_name: str) -> "BitboardGame":
+    pacman_old_pos = self.player
+    ghost_track, new_ghost_time = self.ghost_track, self.ghost_time + 1
+    new_ghost_states = ghost_track.states_at(new_ghost_time)
+    new_powerup_turns = max(self.powerup_turns - 1, 0)
+
+    #* Va chạm chéo: P_new = G_old và G_new = P_old
+    for (g_old_pos, _), (g_new_pos, _) in zip(self.ghost_states, new_ghost_states):
+      if new_pos == g_old_pos and g_new_pos == pacman_old_pos:
+        return BitboardGame(
+            self.w, self.h, new_pos, self.food_mask, self.pie_mask,
+            self.wall_mask, self.exit_pos, self.ghost_states,
+            new_powerup_turns, 0, self.portals, orientation=self.orientation
+        )
+
+    bit = self._bit(new_pos)
+    new_food_mask, new_pie_mask, new_wall_mask = self.food_mask, self.pie_mask, self.wall_mask
+    new_key = (self.zobrist_key ^ zobrist(Z_PLAYER, pacman_old_pos) ^ zobrist(Z_PLAYER, new_pos)
+               ^ zobrist(Z_POWERUP, self.powerup_turns))
+
+    #* Ăn tường / food / magical pie tại new_pos
+    if new_wall_mask & bit and self.powerup_turns > 0:
+      new_wall_mask ^= bit
+      new_key ^= zobrist(Z_WALL, new_pos)
+    if new_food_mask & bit:
+      new_food_mask ^= bit
+      new_key ^= zobrist(Z_FOOD, new_pos)
+    if new_pie_mask & bit:
+      new_pie_mask ^= bit
+      new_powerup_turns = 5
+      new_key ^= zobrist(Z_PIE, new_pos)
+    new_key ^= zobrist(Z_POWERUP, new_powerup_turns)
+
+    #* Va chạm với ghost sau khi di chuyển
+    if (ghost_track.occupancy_at(new_ghost_time) >> (new_pos[1] * self.w + new_pos[0])) & 1:
+      return BitboardGame(
+          self.w, self.h, new_pos, new_food_mask, new_pie_mask,
+          new_wall_mask, self.exit_pos, new_ghost_states,
+          new_powerup_turns, 0, self.portals, self.steps + 1, orientation=self.orientation
+      )
+    new_key ^= ghost_track.key_at(self.ghost_time) ^ ghost_track.key_at(new_ghost_time)
+
+    new_game = BitboardGame(
+        self.w, self.h, new_pos, new_food_mask, new_pie_mask,
+        new_wall_mask, self.exit_pos, (),
+        new_powerup_turns, self.rotation_step, self.portals, self.steps + 1,
+        new_key, ghost_track, new_ghost_time, self.orientation
+    )
+
+    #* Xử lý Rotation
+    if new_game.rotation_step + 1 == 30:
+      new_game._rotate_state()
+    else:
+      new_game._set_rotation_step(new_game.rotation_step + 1)
+
+    #* Tường thay đổi => dựng (hoặc lấy từ cache) bảng quỹ đạo mới bắt đầu từ bước này
+    if new_wall_mask != self.wall_mask:
+      new_game.ghost_track = get_trajectory(self.w, self.h, new_game.walls,
+                                            new_game.ghost_states, new_game.rotation_step)
+      new_game.ghost_time = 0
+    return new_game
+
+  #* State chỉ còn mục tiêu target (không food/magic), dùng cho PathFinder.find_path_to
+  def with_target(self, target: Pos) -> "BitboardGame":
+    return BitboardGame(
+        self.w, self.h, self.player, 0, 0, self.wall_mask, target, (),
+        self.powerup_turns, self.rotation_step, self.portals,
+        ghost_track=self.ghost_track, ghost_time=self.ghost_time, orientation=self.orientation
+    )
+
+  #! HASH VÀ EQUAL CHO A* VÀ FRONTIER
+  def __hash__(self) -> int:
+    return self.zobrist_key
+
+  def __eq__(self, other: object) -> bool:
+    if not isinstance(other, BitboardGame):
+      return False
+    if self.zobrist_key != other.zobrist_key:
+      return False
+    return (  self.player == other.player and
+              self.food_mask == other.food_mask and
+              self.pie_mask == other.pie_mask and
+              self.wall_mask == other.wall_mask and
+              self.ghost_states == other.ghost_states and
+              self.powerup_turns == other.powerup_turns and
+              self.rotation_step == other.rotation_step and
+              self.orientation == other.orientation and
+              self.w == other.w and
+              self.h == other.h
+            )
+
+  def __lt__(self, other: "BitboardGame") -> bool:
+    return self.zobrist_key < other.zobrist_key
@@ -4,8 +4,20 @@ import pygame
 #! HẰNG SỐ CƠ BẢN CỦA GAME *
 FPS = 120 #* Số khung hình trên giây (Frames Per Second)
 TILE_SIZE = 64 #* Kích thước của mỗi ô trên bản đồ (pixel)
-ANIMATION_SPEED = 5 #* Tốc độ cập nhật frame animation (càng nhỏ càng nhanh)
-STEP_DELAY = 10
+ANIMATION_SPEED = 5 #* Tốc độ cập nhật frame animation (càng nhỏ càng nhanh): 1 frame hoạt ảnh mỗi ANIMATION_SPEED / FPS giây
+STEPS_PER_SECOND = 12 #* Tốc độ mô phỏng ở chế độ tự động (bước / giây), không phụ thuộc FPS
+MAX_STEPS_PER_FRAME = 5 #* Số bước bù tối đa trong 1 frame khi bị trễ (bỏ phần còn lại thay vì dồn bước)
+IDLE_FPS = 10 #* Số frame / giây khi nghỉ (tạm dừng, màn hình start / thắng / thua, chọn cổng)
+AUTO_PATH_TIME_BUDGET = 2.0 #* Thời gian tối đa (giây) của ARA* khi tính lại đường đi tự động (hết giờ => giải lại không giới hạn ở nền)
+
+#! CHẾ ĐỘ HIỂN THỊ MAP *
+#* "fit": cả map vừa màn hình, "camera": viewport đi theo player, "auto": camera khi map quá lớn để fit
+VIEW_MODES = ("auto", "fit", "camera")
+VIEW_MODE = "auto"
+VIEWPORT_MIN_TILE = 16 #* auto: dùng camera khi kích thước ô ở chế độ fit nhỏ hơn số pixel này
+VIEWPORT_TILE_SIZE = 32 #* Kích thước ô (pixel) ở chế độ camera
+CHUNK_TILES = 16 #* Số ô mỗi cạnh của 1 chunk lớp tĩnh (chế độ camera)
+CHUNK_CACHE_SIZE = 32 #* Số chunk tối đa được giữ cùng lúc (LRU)
 
 #! ÁNH XẠ ĐIỀU KHIỂN *
 #* Định nghĩa hướng di chuyển tương ứng với các phím nhấn
@@ -0,0 +1,259 @@
+from collections import deque, OrderedDict
+from typing import Dict, List, Tuple
+from .game import Pos, directions
+from .bitboard import mask_to_points
+
+INF = float('inf')
+ORACLE_CACHE_SIZE = 64 #* Số cấu hình tường tối đa được giữ bảng khoảng cách cùng lúc
+NEAREST_CACHE_SIZE = 64 #* Số bảng nearest (BFS nhiều nguồn, mỗi tập đích 1 bảng) tối đa cho mỗi oracle (LRU)
+MST_CACHE_SIZE = 1024 #* Số trọng số cây khung được nhớ cho mỗi oracle (LRU)
+MAX_POWERUP = 5 #* Số lượt Power-up khi ăn bánh ma thuật (giống Game.move_to)
+POWERUP_LAYERS = MAX_POWERUP + 1 #* Các tầng 0..5 lượt Power-up còn lại
+ALL_LAYERS = tuple(range(POWERUP_LAYERS))
+EMPTY = frozenset()
+
+#* Các bước di chuyển cơ bản dùng cho BFS (bỏ STOP)
+STEPS = [delta for name, delta in directions.items() if name != "STOP"]
+
+class DistanceOracle:
+  #! BẢNG KHOẢNG CÁCH THEO TẦNG POWER-UP *
+  #* Dựng 1 lần cho mỗi cấu hình tường. Trạng thái BFS là (ô, số lượt Power-up còn lại 0-5), đúng luật của
+  #* Game.get_moves / move_to: vào ô tường chỉ khi còn Power-up, mỗi bước giảm 1 lượt, ăn bánh => 5 lượt,
+  #* bước vào cổng có thể tele tới cổng khác. BFS ngược từ đích => 1 bảng trả lời mọi (start, lượt) tới đích đó.
+  #* Bỏ qua ghost và coi tường đã ăn vẫn là tường khi quay lại lúc hết Power-up (trường hợp duy nhất bị lệch).
+  __slots__ = ('w', 'h', 'walls', 'portals', '_wall_flags', '_layers', '_nearest', '_mst')
+  bfs_calls = 0 #* Tổng số lần BFS của mọi oracle (SearchStats lấy hiệu số trước / sau khi tìm kiếm)
+  nearest_hits = 0 #* Tổng số lần nearest tra được bảng đã dựng
+  nearest_misses = 0 #* Tổng số lần nearest phải dựng bảng mới (1 BFS nhiều nguồn)
+  def __init__(self, w: int, h: int, walls: frozenset, portals: Tuple[Pos, ...]):
+    self.w, self.h = w, h
+    self.walls = walls
+    self.portals = portals
+    self._wall_flags = bytearray(w * h)
+    for x, y in walls:
+      self._wall_flags[y * w + x] = 1
+    #* (đích, tập bánh) -> bảng phẳng dist[lượt * w * h + ô] = số bước ít nhất từ (ô, lượt) tới đích
+    self._layers: Dict[tuple, List[float]] = {}
+    #* (tập đích, tập bánh) -> bảng phẳng như _layers nhưng tới đích GẦN NHẤT trong tập (BFS ngược nhiều nguồn)
+    self._nearest: "OrderedDict[tuple, List[float]]" = OrderedDict()
+    #* (tập đích, điểm thêm, lượt Power-up, tập bánh) -> trọng số cây khung nhỏ nhất
+    self._mst: "OrderedDict[tuple, float]" = OrderedDict()
+
+  def _layered_bfs(self, target: Pos, pies) -> List[float]:
+    DistanceOracle.bfs_calls += 1
+    return layered_bfs(self.w, self.h, self._wall_flags, self.portals, target, pies)
+
+  def _multi_source_bfs(self, targets, pies) -> List[float]:
+    DistanceOracle.bfs_calls += 1
+    return multi_source_layered_bfs(self.w, self.h, self._wall_flags, self.portals, targets, pies)
+
+  #* Dùng lại bảng của oracle cha khi cấu hình tường hiện tại chỉ ít hơn cha đúng 1 ô tường (ô vừa bị ăn).
+  #* Mở ô c chỉ thêm các bước (kề, 0 lượt) -> (c, 0) => bảng không đổi nếu dist[0][kề] <= dist[0][c] + 1.
+  #* Ô cổng còn đổi các bước tele => không dùng lại. Chỉ các bảng bị ảnh hưởng mới phải BFS lại (lazy).
+  def inherit(self, parent: "DistanceOracle", removed: Pos) -> None:
+    if removed in self.portals:
+      return
+    index = removed[1] * self.w + removed[0]
+    neighbours = _grid_neighbours(self.w, self.h)[index]
+    for key, dist in parent._layers.items():
+      limit = dist[index] + 1
+      if all(dist[u] <= limit for u in neighbours):
+        self._layers[key] = dist
+    #* Bảng nhiều nguồn = BFS từ 1 nguồn ảo nối mọi đích => cùng điều kiện
+    for key, dist in parent._nearest.items():
+      limit = dist[index] + 1
+      if all(dist[u] <= limit for u in neighbours):
+        self._nearest[key] = dist
+
+  #* Lấy (hoặc dựng) bảng khoảng cách tới target
+  def layers(self, target: Pos, pies=EMPTY) -> List[float]:
+    key = (target, pies or EMPTY)
+    dist = self._layers.get(key)
+    if dist is None:
+      dist = self._layered_bfs(target, pies or EMPTY)
+      self._layers[key] = dist
+    return dist
+
+  #* Các đích (không trùng, giữ thứ tự) chưa có bảng khoảng cách với tập bánh pies
+  def missing_layers(self, targets, pies=EMPTY) -> List[Pos]:
+    pies = pies or EMPTY
+    return [target for target in dict.fromkeys(targets) if (target, pies) not in self._layers]
+
+  #* Nhận bảng đã dựng ở nơi khác (ParallelStageEvaluator), tính như 1 lần BFS
+  def store_layers(self, target: Pos, dist: List[float], pies=EMPTY) -> None:
+    DistanceOracle.bfs_calls += 1
+    self._layers[(target, pies or EMPTY)] = dist
+
+  #* Truy vấn khoảng cách start -> end khi còn powerup_turns lượt (INF nếu không tới được).
+  #* pies: các bánh ma thuật được tính (mặc định không có => Power-up chỉ giảm dần)
+  def distance(self, start: Pos, end: Pos, powerup_turns: int, pies=EMPTY) -> float:
+    if start == end:
+      return 0
+    w = self.w
+    return self.layers(end, pies)[min(powerup_turns, MAX_POWERUP) * w * self.h + start[1] * w + start[0]]
+
+  #* Khoảng cách từ start tới đích gần nhất trong targets (tập vị trí hoặc bitmask), INF nếu không tới được.
+  #* Mỗi tập đích (cùng tường, cùng tập bánh) chỉ cần 1 BFS ngược nhiều nguồn, thay cho 1 bảng / đích:
+  #* mọi state có cùng food còn lại (khác vị trí Pacman, lượt Power-up, ghost) tra chung 1 bảng
+  def nearest(self, start: Pos, targets, powerup_turns: int, pies=EMPTY) -> float:
+    if not targets:
+      return INF
+    key = (targets, pies or EMPTY)
+    nearest = self._nearest
+    dist = nearest.get(key)
+    if dist is not None:
+      DistanceOracle.nearest_hits += 1
+      nearest.move_to_end(key)
+    else:
+      DistanceOracle.nearest_misses += 1
+      points = list(mask_to_points(targets, self.w) if isinstance(targets, int) else targets)
+      #* 1 đích => chính là bảng của đích đó (dùng chung với distance)
+      dist = self.layers(points[0], pies) if len(points) == 1 else self._multi_source_bfs(points, pies or EMPTY)
+      nearest[key] = dist
+      if len(nearest) > NEAREST_CACHE_SIZE:
+        nearest.popitem(last=False)
+    w = self.w
+    return dist[min(powerup_turns, MAX_POWERUP) * w * self.h + start[1] * w + start[0]]
+
+  #* Trọng số cây khung nhỏ nhất (Prim, O(k^2)) trên targets + extra, cạnh = khoảng cách theo tầng.
+  #* Nhớ theo tập đích: các state chỉ khác vị trí Pacman / ghost dùng chung kết quả
+  def mst(self, targets, extra: Pos, powerup_turns: int, pies=EMPTY) -> float:
+    key = (targets, extra, powerup_turns, pies or EMPTY)
+    cache = self._mst
+    weight = cache.get(key)
+    if weight is not None:
+      cache.move_to_end(key)
+      return weight
+
+    points = list(mask_to_points(targets, self.w) if isinstance(targets, int) else targets)
+    points.append(extra)
+    weight = 0
+    best = {point: self.distance(points[0], point, powerup_turns, pies) for point in points[1:]}
+    while best:
+      point = min(best, key=best.get)
+      weight += best.pop(point)
+      for other in best:
+        cost = self.distance(point, other, powerup_turns, pies)
+        if cost < best[other]:
+          best[other] = cost
+    cache[key] = weight
+    if len(cache) > MST_CACHE_SIZE:
+      cache.popitem(last=False)
+    return weight
+
+#* BFS ngược trên đồ thị (ô, lượt) từ target: tìm các trạng thái trước u có 1 bước đi tới (v, tv).
+#* Không dùng state của oracle => tiến trình con gọi trực tiếp với wall_flags nằm trong shared memory
+def layered_bfs(w: int, h: int, wall_flags, portals, target: Pos, pies=EMPTY) -> List[float]:
+  return multi_source_layered_bfs(w, h, wall_flags, portals, (target,), pies)
+
+#* Như layered_bfs nhưng xuất phát cùng lúc từ mọi đích: dist = số bước ít nhất tới đích gần nhất
+def multi_source_layered_bfs(w: int, h: int, wall_flags, portals, targets, pies=EMPTY) -> List[float]:
+  n = w * h
+  neighbours = _grid_neighbours(w, h)
+  pie_flags = bytearray(n)
+  for x, y in (mask_to_points(pies, w) if isinstance(pies, int) else pies):
+    pie_flags[y * w + x] = 1
+  portals = [y * w + x for x, y in portals]
+
+  dist = [INF] * (POWERUP_LAYERS * n)
+  queue = deque()
+  for x, y in targets:
+    end = y * w + x
+    for t in range(POWERUP_LAYERS):
+      if dist[t * n + end] != 0:
+        dist[t * n + end] = 0
+        queue.append((end, t))
+
+  while queue:
+    v, tv = queue.popleft()
+    cost = dist[tv * n + v] + 1
+    #* Lượt trước bước đi: ăn bánh => luôn còn 5, ngược lại lượt mới = max(lượt cũ - 1, 0)
+    if pie_flags[v]:
+      if tv != MAX_POWERUP:
+        continue
+      sources = ALL_LAYERS
+    elif tv == 0:
+      sources = (0, 1)
+    elif tv < MAX_POWERUP:
+      sources = (tv + 1,)
+    else:
+      continue
+    #* Ô cổng (gate) quyết định bước đi có hợp lệ không: đi thường => chính v; tele tới v => cổng khác vừa bước vào
+    gates = [v]
+    if v in portals:
+      gates.extend(p for p in portals if p != v)
+    for gate in gates:
+      blocked = wall_flags[gate]
+      for tu in sources:
+        if tu == 0 and blocked:
+          continue
+        base = tu * n
+        for u in neighbours[gate]:
+          if dist[base + u] == INF:
+            dist[base + u] = cost
+            queue.append((u, tu))
+  return dist
+
+#* Danh sách ô kề (chỉ số phẳng, trong biên) của mỗi ô, dùng chung cho mọi oracle cùng kích thước
+_neighbour_cache: Dict[Tuple[int, int], List[List[int]]] = {}
+
+def _grid_neighbours(w: int, h: int) -> List[List[int]]:
+  neighbours = _neighbour_cache.get((w, h))
+  if neighbours is None:
+    neighbours = [[(y + dy) * w + x + dx for dx, dy in STEPS if 0 <= x + dx < w and 0 <= y + dy < h]
+                  for y in range(h) for x in range(w)]
+    _neighbour_cache[(w, h)] = neighbours
+  return neighbours
+
+#! CACHE ORACLE THEO CẤU HÌNH TƯỜNG (LRU) *
+#* Khi tường bị ăn, cấu hình mới có key mới => các bảng không bị ảnh hưởng được lấy lại từ oracle cha
+_oracle_cache: "OrderedDict[tuple, DistanceOracle]" = OrderedDict()
+
+#* walls có thể là tập vị trí hoặc bitmask (BitboardGame); bitmask được dùng trực tiếp làm key
+def get_oracle(w: int, h: int, walls, portals) -> DistanceOracle:
+  if not isinstance(walls, (frozenset, int)):
+    walls = frozenset(walls)
+  portals = tuple(portals)
+  key = (w, h, walls, portals)
+  oracle = _oracle_cache.get(key)
+  if oracle is not None:
+    _oracle_cache.move_to_end(key)
+    return oracle
+
+  parent, removed = _find_parent(w, h, walls, portals)
+  if isinstance(walls, int):
+    walls = frozenset(mask_to_points(walls, w))
+  oracle = DistanceOracle(w, h, walls, portals)
+  if parent is not None:
+    oracle.inherit(parent, removed)
+  _oracle_cache[key] = oracle
+  if len(_oracle_cache) > ORACLE_CACHE_SIZE:
+    _oracle_cache.popitem(last=False)
+  return oracle
+
+#* Xóa cache oracle (kèm mọi bảng khoảng cách / memo của chúng) và bảng ô kề
+#* (benchmark: mỗi lần chạy bắt đầu từ cache trống)
+def clear_oracle_cache() -> None:
+  _oracle_cache.clear()
+  _neighbour_cache.clear()
+
+#* Tìm oracle trong cache có thêm đúng 1 ô tường so với walls (state cha trước khi ăn tường)
+def _find_parent(w: int, h: int, walls, portals):
+  for (cw, ch, cached_walls, cached_portals), oracle in reversed(_oracle_cache.items()):
+    if (cw, ch, cached_portals) != (w, h, portals) or type(cached_walls) is not type(walls):
+      continue
+    if isinstance(walls, int):
+      extra = cached_walls & ~walls
+      if walls & ~cached_walls == 0 and extra and not extra & (extra - 1):
+        index = extra.bit_length() - 1
+        return oracle, (index % w, index // w)
+    elif len(cached_walls) == len(walls) + 1 and walls < cached_walls:
+      return oracle, next(iter(cached_walls - walls))
+  return None, None
+
+#* Oracle cho state hiện tại của Game hoặc BitboardGame
+def oracle_for(game) -> DistanceOracle:
+  walls = getattr(game, 'wall_mask', None)
+  if walls is None:
+    walls = game.walls
+  return get_oracle(game.w, game.h, walls, game.portals)
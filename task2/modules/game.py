@@ -1,7 +1,6 @@
 from typing import Optional, Set, List, Dict, Tuple
-
-Pos = tuple[int,int] #* Định nghĩa kiểu dữ liệu cho vị trí (x, y)
-GhostState = Tuple[Pos, Pos] #* Định nghĩa kiểu dữ liệu cho trạng thái Ghost: ((vị trí hiện tại), (hướng di chuyển))
+from .zobrist import zobrist, Z_ORIENTATION, Z_PLAYER, Z_FOOD, Z_PIE, Z_WALL, Z_POWERUP, Z_ROTATION
+from .ghosts import Pos, GhostState, GhostTrajectory, get_trajectory
 #* Hướng di chuyển cơ bản
 directions = {
   "WEST": (-1, 0),
@@ -11,12 +10,22 @@ directions = {
   "STOP": (0, 0)
 }
 
+#* Map xoay phải 90 độ => hướng (dx, dy) trên màn hình ứng với (dy, -dx) trong khung gốc
+def _to_canonical_delta(dx: int, dy: int, orientation: int) -> Pos:
+  for _ in range(orientation):
+    dx, dy = dy, -dx
+  return dx, dy
+
+#* Bảng tra hướng theo orientation: DIRECTION_DELTAS[orientation][tên hướng] = bước đi trong khung gốc
+DIRECTION_DELTAS = [{name: _to_canonical_delta(dx, dy, orientation) for name, (dx, dy) in directions.items()}
+                    for orientation in range(4)]
+
 class Game:
   #! KHỞI TẠO TRẠNG THÁI GAME *
   __slots__ = (
         'w', 'h', 'player', 'food_points', 'magical_pies',
-        'walls', 'exit_pos', 'ghost_states', 'powerup_turns',
-        'rotation_step', 'portals','steps'
+        'walls', 'exit_pos', 'ghost_track', 'ghost_time', 'powerup_turns',
+        'rotation_step', 'orientation', 'portals','steps', 'zobrist_key'
     )#* Sử dụng __slots__ để tối ưu hóa bộ nhớ và tăng tốc độ truy cập thuộc tính
   def __init__(self, w:int, h:int, player:Pos,
               food_points: set[Pos], magical_pies: set[Pos],
@@ -24,8 +33,11 @@ class Game:
               ghost_states: List[GhostState]=None,
               powerup_turns: int = 0,
               rotation_step: int = 0, portals: Optional[list[Pos]] = None,
-              steps: int = 0): 
-    self.w, self.h = w, h #* Kích thước chiều rộng và chiều cao của bản đồ
+              steps: int = 0, zobrist_key: Optional[int] = None,
+              ghost_track: Optional[GhostTrajectory] = None, ghost_time: int = 0,
+              orientation: int = 0): 
+    #! Mọi tọa độ được lưu trong khung gốc của map (lúc load); map xoay chỉ làm đổi orientation
+    self.w, self.h = w, h #* Kích thước chiều rộng và chiều cao của bản đồ (khung gốc)
     self.player = player #* Vị trí hiện tại của Pacman (P)
     self.food_points = frozenset(food_points) #* Vị trí của các Food
     self.magical_pies = frozenset(magical_pies) #* Vị trí của các Bánh ma thuật
@@ -33,54 +45,63 @@ class Game:
     self.exit_pos = exit_pos #* Vị trí của Lối ra
     self.powerup_turns = powerup_turns #* Số Power-up 
     self.rotation_step = rotation_step #* Bước đếm để xoay bản đồ 
-    self.ghost_states = ghost_states if ghost_states is not None else [] #* Danh sách vị trí của Ghost
+    self.orientation = orientation #* Số lần đã xoay phải 90 độ (0-3)
+    #* Ghost không nằm trực tiếp trong state: chỉ giữ bảng quỹ đạo dùng chung và bước t trong bảng
+    if ghost_track is None:
+      ghost_track = GhostTrajectory(w, h, self.walls, ghost_states if ghost_states is not None else [], rotation_step)
+    self.ghost_track = ghost_track
+    self.ghost_time = ghost_time
     #* Danh sách vị trí các cổng Teleport (mặc định là 4 góc)
     self.portals = portals if portals is not None else [(1, 1), (self.w - 2, 1), (self.w - 2, self.h - 2), (1, self.h - 2)]
     self.steps = steps #* Tổng số bước di chuyển của Pacman
+    #* Zobrist key 64-bit: move_to cập nhật tăng dần bằng XOR, chỉ tính toàn bộ khi khởi tạo
+    self.zobrist_key = zobrist_key if zobrist_key is not None else self._compute_zobrist_key()
     
-  # ! HÀM TRỢ GIÚP XOAY BẢN ĐỒ  *
+  #* Danh sách vị trí và hướng của Ghost tại bước hiện tại (tra từ bảng quỹ đạo)
+  @property
+  def ghost_states(self) -> Tuple[GhostState, ...]:
+    return self.ghost_track.states_at(self.ghost_time)
   
-  #* Hàm xoay vị trí sang phải
-  def _rotate_point(self, x: int, y:int, W: int, H: int) -> Pos:
-    return H - 1 - y , x
+  #* Tính Zobrist key từ đầu (O(kích thước map))
+  def _compute_zobrist_key(self) -> int:
+    key = (zobrist(Z_ORIENTATION, self.orientation) ^ zobrist(Z_PLAYER, self.player)
+           ^ zobrist(Z_POWERUP, self.powerup_turns) ^ zobrist(Z_ROTATION, self.rotation_step))
+    for point in self.food_points:
+      key ^= zobrist(Z_FOOD, point)
+    for point in self.magical_pies:
+      key ^= zobrist(Z_PIE, point)
+    for point in self.walls:
+      key ^= zobrist(Z_WALL, point)
+    key ^= self.ghost_track.key_at(self.ghost_time)
+    return key
   
-  #* Hàm xoay toàn bộ trạng thái Game
-  def _rotate_state(self) -> None:
-    old_w, old_h = self.w, self.h
-    
-    #* Xoay vị trí pacman và exit
-    self.player = self._rotate_point(*self.player, old_w, old_h)
-    self.exit_pos = self._rotate_point(*self.exit_pos, old_w, old_h)
+  #* Đổi rotation_step và cập nhật key tương ứng
+  def _set_rotation_step(self, rotation_step: int) -> None:
+    self.zobrist_key ^= zobrist(Z_ROTATION, self.rotation_step) ^ zobrist(Z_ROTATION, rotation_step)
+    self.rotation_step = rotation_step
     
-    #* Xoay vị trí vật phẩm và tường
-    self.food_points = frozenset(self._rotate_point(*point, old_w, old_h) for point in self.food_points)
-    self.magical_pies = frozenset(self._rotate_point(*point, old_w, old_h) for point in self.magical_pies)
-    self.walls = frozenset(self._rotate_point(*point, old_w, old_h) for point in self.walls)
-    self.portals = [self._rotate_point(*point, old_w, old_h) for point in self.portals]
-    
-    #* Xoay vị trí ghost
-    self.ghost_states = [( self._rotate_point(x, y, old_w, old_h),(dx , dy)) for (x, y), (dx, dy) in self.ghost_states]
-    
-    #* Cập nhật kích thước
-    self.w, self.h = old_h, old_w
-    self.rotation_step = 0
+  # ! HÀM TRỢ GIÚP XOAY BẢN ĐỒ  *
   
-  #!  HÀM CỐT LÕI CỦA GHOST    
+  #* Kích thước map đang hiển thị (đổi chỗ w/h khi xoay lẻ lần)
+  @property
+  def view_size(self) -> Tuple[int, int]:
+    return (self.h, self.w) if self.orientation % 2 else (self.w, self.h)
   
-  #* Tính toán trạng thái Ghost tiếp theo dựa trên vị trí và hướng hiện tại
-  def _get_next_ghost_state(self, x:int, y:int, dx:int, dy:int)->GhostState:
-    nx, ny = x + dx, y + dy
-    #* Kiểm tra va chạm với tường
-    if (nx, ny) in self.walls:
-      return ((x, y), (-dx, -dy))
-    return ((nx, ny), (dx, dy))
+  #* Chuyển vị trí từ khung gốc sang khung đang hiển thị (mỗi lần xoay: (x, y) -> (H-1-y, x))
+  def to_view(self, pos: Pos) -> Pos:
+    x, y = pos
+    match self.orientation:
+      case 1: return self.h - 1 - y, x
+      case 2: return self.w - 1 - x, self.h - 1 - y
+      case 3: return y, self.w - 1 - x
+    return x, y
   
-  #* Di chuyển tất cả các Ghost trong Game
-  def _move_ghosts(self, current_ghost_states: List[GhostState])-> List[GhostState]:
-    new_ghost_states = []
-    for (pos, direction) in current_ghost_states:
-      new_ghost_states.append(self._get_next_ghost_state(*pos,*direction))
-    return new_ghost_states
+  #* Xoay map: chỉ tăng orientation, mọi tọa độ giữ nguyên trong khung gốc
+  def _rotate_state(self) -> None:
+    new_orientation = (self.orientation + 1) % 4
+    self.zobrist_key ^= zobrist(Z_ORIENTATION, self.orientation) ^ zobrist(Z_ORIENTATION, new_orientation)
+    self.orientation = new_orientation
+    self._set_rotation_step(0)
   
   #! CÁC HÀM CỐT LÕI CỦA GAME *
   @classmethod
@@ -109,8 +130,9 @@ class Game:
     return cls(w, h, player, food_points, magical_pies, walls, exit_pos, ghost_states=ghost_states)
   
   def is_game_over(self) -> bool:
-    ghost_pos = {pos for pos, _ in self.ghost_states}
-    return self.player in ghost_pos
+    #* Tra bitset vị trí ghost tại bước hiện tại
+    x, y = self.player
+    return bool((self.ghost_track.occupancy_at(self.ghost_time) >> (y * self.w + x)) & 1)
   
   def is_winner(self) -> bool:
     return not self.food_points and self.player == self.exit_pos
@@ -119,8 +141,8 @@ class Game:
     x, y = self.player
     moves = {}
     
-    #* Lặp qua các action
-    for direction, (dx, dy) in directions.items():
+    #* Lặp qua các action (hướng trên màn hình được đổi sang khung gốc qua bảng tra)
+    for direction, (dx, dy) in DIRECTION_DELTAS[self.orientation].items():
       nx, ny = x + dx, y + dy
       new_pos = nx, ny
       
@@ -153,13 +175,17 @@ class Game:
     pacman_old_pos = self.player
     pacman_new_pos = new_pos
     
-    #*  1. Di chuyển Ghost  
-    new_ghost_states = self._move_ghosts(self.ghost_states)
+    #*  1. Di chuyển Ghost: tra bảng quỹ đạo tại bước t+1
+    ghost_track, new_ghost_time = self.ghost_track, self.ghost_time + 1
+    new_ghost_states = ghost_track.states_at(new_ghost_time)
     
     new_powerup_turns = max(self.powerup_turns - 1, 0)
     new_walls = self.walls
     new_food_points = self.food_points
     new_magical_pies = self.magical_pies
+    #* Cập nhật Zobrist key: Pacman, Power-up
+    new_key = (self.zobrist_key ^ zobrist(Z_PLAYER, pacman_old_pos) ^ zobrist(Z_PLAYER, pacman_new_pos)
+               ^ zobrist(Z_POWERUP, self.powerup_turns))
     
     #*  2. KIỂM TRA VA CHẠM CHÉO (Crossing Collision)  
     is_crossing_collision = False
@@ -175,57 +201,80 @@ class Game:
       game_over_state = Game(
           self.w, self.h, pacman_new_pos, new_food_points, new_magical_pies,
           new_walls, self.exit_pos, self.ghost_states, #* Truyền ghost cũ để is_over = true
-          new_powerup_turns, 0, self.portals
+          new_powerup_turns, 0, self.portals, orientation=self.orientation
       )
       return game_over_state
     
     #* Ăn tường tại new_pos
     if new_pos in self.walls and self.powerup_turns > 0:
       new_walls = self.walls - {new_pos}
+      new_key ^= zobrist(Z_WALL, new_pos)
       
     #* Ăn food tại new_pos
     if new_pos in self.food_points:
       new_food_points = self.food_points - {new_pos}
+      new_key ^= zobrist(Z_FOOD, new_pos)
       
     #* Ăn magical pie tại new_pos
     if new_pos in self.magical_pies:
       new_magical_pies = self.magical_pies - {new_pos}
       new_powerup_turns = 5
+      new_key ^= zobrist(Z_PIE, new_pos)
+    new_key ^= zobrist(Z_POWERUP, new_powerup_turns)
+    
+    #* 4. Kiểm tra va chạm còn lại (bitset vị trí ghost sau khi di chuyển)
+    x, y = new_pos
+    if (ghost_track.occupancy_at(new_ghost_time) >> (y * self.w + x)) & 1:
+      return Game(
+          self.w, self.h, new_pos, new_food_points, new_magical_pies,
+          new_walls, self.exit_pos, new_ghost_states,
+          new_powerup_turns, 0, self.portals, self.steps+1, orientation=self.orientation
+      )
+    
+    #* Cập nhật key của ghost: O(1) nhờ key đã tính sẵn trong bảng
+    new_key ^= ghost_track.key_at(self.ghost_time) ^ ghost_track.key_at(new_ghost_time)
 
-    #* 4. Tạo Game State Mới  
+    #* 5. Tạo Game State Mới  
     new_game = Game(
         self.w, self.h, new_pos, new_food_points, new_magical_pies,
-        new_walls, self.exit_pos, new_ghost_states,
-        new_powerup_turns, self.rotation_step, self.portals,self.steps+1
+        new_walls, self.exit_pos, None,
+        new_powerup_turns, self.rotation_step, self.portals,self.steps+1,
+        new_key, ghost_track, new_ghost_time, self.orientation
     )
-    
-    #* 5. Kiểm tra va chạm còn lại
-    if new_game.is_game_over():
-      new_game.rotation_step = 0
-      return new_game
         
     #* 6. Xử lý Rotation  
-    new_game.rotation_step += 1
-    if new_game.rotation_step == 30:
+    if new_game.rotation_step + 1 == 30:
       new_game._rotate_state()
-      new_game.rotation_step = 0
+    else:
+      new_game._set_rotation_step(new_game.rotation_step + 1)
+    
+    #* 7. Tường thay đổi => quỹ đạo ghost thay đổi: dựng (hoặc lấy từ cache) bảng mới bắt đầu từ bước này
+    if new_walls is not self.walls:
+      new_game.ghost_track = get_trajectory(self.w, self.h, new_walls,
+                                            new_game.ghost_states, new_game.rotation_step)
+      new_game.ghost_time = 0
     return new_game
   
+  #* State chỉ còn mục tiêu target (không food/magic), dùng cho PathFinder.find_path_to
+  def with_target(self, target: Pos) -> "Game":
+    return Game(
+        self.w, self.h, self.player, set(),
+        set(), self.walls, target, None,
+        self.powerup_turns, self.rotation_step, self.portals,
+        ghost_track=self.ghost_track, ghost_time=self.ghost_time, orientation=self.orientation
+    )
+  
   #! HASH VÀ EQUAL CHO A* VÀ FRONTIER
   
   def __hash__(self) -> int:
-    return hash(( self.player, 
-                  frozenset(self.food_points), 
-                  frozenset(self.magical_pies), 
-                  frozenset(self.walls), 
-                  tuple(self.ghost_states),
-                  self.powerup_turns,
-                  self.rotation_step
-                ))
+    return self.zobrist_key
     
   def __eq__(self, other: object) -> bool: 
     if not isinstance(other,Game):
       return False
+    #* Key khác nhau => chắc chắn khác nhau
+    if self.zobrist_key != other.zobrist_key:
+      return False
     return (  self.player == other.player and
               self.food_points == other.food_points and
               self.magical_pies == other.magical_pies and
@@ -233,8 +282,9 @@ class Game:
               self.ghost_states == other.ghost_states and
               self.powerup_turns == other.powerup_turns and
               self.rotation_step == other.rotation_step and 
+              self.orientation == other.orientation and
               self.w == other.w and
               self.h == other.h
             )
   def __lt__(self, other: "Game") -> bool:
-    return hash(self) < hash(other)
\ No newline at end of file
+    return self.zobrist_key < other.zobrist_key
\ No newline at end of file
@@ -0,0 +1,104 @@
+from collections import OrderedDict
+from typing import List, Tuple
+from .zobrist import zobrist, Z_GHOST
+
+Pos = tuple[int,int] #* Định nghĩa kiểu dữ liệu cho vị trí (x, y)
+GhostState = Tuple[Pos, Pos] #* Định nghĩa kiểu dữ liệu cho trạng thái Ghost: ((vị trí hiện tại), (hướng di chuyển))
+TRAJECTORY_CACHE_SIZE = 256 #* Số bảng quỹ đạo tối đa được giữ cùng lúc
+ROTATION_PERIOD = 30 #* Số bước giữa 2 lần xoay map (giống Game.move_to)
+
+class GhostTrajectory:
+  #! BẢNG QUỸ ĐẠO GHOST *
+  #* Ghost chỉ nảy qua lại giữa các bức tường => vị trí là hàm tuần hoàn theo số bước t (khi tường không đổi).
+  #* Bảng được mô phỏng dần (lazy) đến khi phát hiện chu kỳ; sau đó mọi truy vấn tại bước t là O(1).
+  #* Tọa độ nằm trong khung gốc của map (xem Game.orientation).
+  __slots__ = ('w', 'h', 'walls', 'states', 'keys', 'occupancy',
+               'cycle_start', 'period', '_rotation_step', '_seen')
+  def __init__(self, w: int, h: int, walls: frozenset, ghost_states: List[GhostState], rotation_step: int):
+    start = tuple(ghost_states)
+    self.w, self.h = w, h
+    self.walls = walls
+    self.states = [start] #* Trạng thái ghost tại mỗi bước
+    self.keys = [zobrist(Z_GHOST, start)] #* Zobrist key của trạng thái ghost tại mỗi bước
+    self.occupancy = [self._occupancy_mask(start)] #* Bitset vị trí ghost (bit y*w+x) tại mỗi bước
+    self.cycle_start = None #* Bước bắt đầu chu kỳ
+    self.period = None #* Độ dài chu kỳ
+    self._rotation_step = rotation_step
+    self._seen = {(start, rotation_step): 0} #* (trạng thái ghost, rotation_step) -> bước, để phát hiện chu kỳ
+
+  def _occupancy_mask(self, ghost_states: Tuple[GhostState, ...]) -> int:
+    mask = 0
+    for (x, y), _ in ghost_states:
+      if 0 <= x < self.w and 0 <= y < self.h:
+        mask |= 1 << (y * self.w + x)
+    return mask
+
+  #* Mô phỏng thêm 1 bước
+  def _extend(self) -> None:
+    walls = self.walls
+    rotation_step = self._rotation_step + 1
+    is_rotating = rotation_step == ROTATION_PERIOD
+    states = []
+    for (x, y), (dx, dy) in self.states[-1]:
+      nx, ny = x + dx, y + dy
+      #* Kiểm tra va chạm với tường
+      if (nx, ny) in walls:
+        nx, ny, dx, dy = x, y, -dx, -dy
+      #* Khi map xoay, ghost giữ hướng trên màn hình => hướng trong khung gốc quay ngược 90 độ
+      if is_rotating:
+        dx, dy = dy, -dx
+      states.append(((nx, ny), (dx, dy)))
+    states = tuple(states)
+    if is_rotating:
+      rotation_step = 0
+
+    #* Phát hiện chu kỳ
+    key = (states, rotation_step)
+    if key in self._seen:
+      self.cycle_start = self._seen[key]
+      self.period = len(self.states) - self.cycle_start
+      self._seen = {}
+      return
+    self._seen[key] = len(self.states)
+    self._rotation_step = rotation_step
+    self.states.append(states)
+    self.keys.append(zobrist(Z_GHOST, states))
+    self.occupancy.append(self._occupancy_mask(states))
+
+  #* Chỉ số trong bảng ứng với bước t
+  def index(self, t: int) -> int:
+    while self.period is None and t >= len(self.states):
+      self._extend()
+    if t < len(self.states):
+      return t
+    return self.cycle_start + (t - self.cycle_start) % self.period
+
+  def states_at(self, t: int) -> Tuple[GhostState, ...]:
+    return self.states[self.index(t)]
+
+  def key_at(self, t: int) -> int:
+    return self.keys[self.index(t)]
+
+  def occupancy_at(self, t: int) -> int:
+    return self.occupancy[self.index(t)]
+
+#! CACHE BẢNG QUỸ ĐẠO (LRU) *
+#* Dùng lại bảng khi nhiều state cùng ăn một bức tường tại cùng thời điểm
+_trajectory_cache: "OrderedDict[tuple, GhostTrajectory]" = OrderedDict()
+
+def get_trajectory(w: int, h: int, walls: frozenset, ghost_states, rotation_step: int) -> GhostTrajectory:
+  ghost_states = tuple(ghost_states)
+  key = (w, h, walls, ghost_states, rotation_step)
+  trajectory = _trajectory_cache.get(key)
+  if trajectory is not None:
+    _trajectory_cache.move_to_end(key)
+    return trajectory
+  trajectory = GhostTrajectory(w, h, walls, ghost_states, rotation_step)
+  _trajectory_cache[key] = trajectory
+  if len(_trajectory_cache) > TRAJECTORY_CACHE_SIZE:
+    _trajectory_cache.popitem(last=False)
+  return trajectory
+
+#* Xóa cache (benchmark: mỗi lần chạy bắt đầu từ cache trống)
+def clear_trajectory_cache() -> None:
+  _trajectory_cache.clear()
@@ -1,4 +1,5 @@
 import pygame
+from collections import OrderedDict
 from .game import Game
 #* Import các HẰNG SỐ màu từ config.py để sử dụng
 from .config import MODE_MANUAL_COLOR, MODE_AUTO_COLOR, POWERUP_COLOR
@@ -7,111 +8,146 @@ from typing import Tuple, Dict, Optional
 
 pygame.font.init()
 
-#*Vẽ ảnh trạng thái (Start/Win/Game Over/Paused) lên màn hình.
-def draw_image_message(screen: pygame.Surface, state: str, window_size: Tuple[int, int], state_images: Dict[str, Optional[pygame.Surface]]):
+HUD_HEIGHT = 70
+HUD_BAR_HEIGHT = 72 #* Chiều cao vùng HUD trên màn hình (thanh 70px + đường phân cách 2px)
+TEXT_CACHE_SIZE = 128 #* Số surface chữ tối đa được giữ trong cache (LRU)
 
-    w, h = window_size
-    
-    if state in ["start", "game_over", "win", "paused"]:
-        if state in state_images and state_images[state] is not None:
+HUD_COLOR = pygame.Color("#1B263B")  #* Nền
+LINE_COLOR = pygame.Color("#4A90E2")  #* Đường phân cách sáng
+LABEL_COLOR = pygame.Color("#99AAB5")  #* Màu cho nhãn
+VALUE_COLOR = pygame.Color("#FFFFFF")  #* Màu cho giá trị chính
+FPS_COLOR = pygame.Color("#2ECC71")  #* Màu cho cho FPS
+ROTATION_COLOR = pygame.Color("#3498DB") # Màu xanh dương
+STEPS_COLOR = pygame.Color("#FFD700")
+
+LABEL_FONT_SIZE = 22
+VALUE_FONT_SIZE = 36
+
+#* Vị trí Y cho hàng trên và hàng dưới
+TOP_Y = 5
+MID_Y = 25 #* Vị trí hàng giữa
+BOTTOM_Y = 45 #* Vị trí hàng dưới cùng
+#* Khoảng cách giữa nhãn và giá trị (cột 3)
+LABEL_VALUE_GAP = 70
+
+class Hud:
+    #! THANH HUD CÓ CACHE *
+    #* Font được tạo 1 lần; nền thanh HUD + các nhãn tĩnh được vẽ sẵn theo chiều rộng màn hình.
+    #* Chữ của giá trị được cache theo (cỡ chữ, nội dung, màu) => chỉ render khi giá trị đổi.
+    #* Thanh HUD hoàn chỉnh cũng được cache: chỉ ghép lại khi 1 giá trị đổi, mỗi frame chỉ còn 1 lần blit.
+    def __init__(self):
+        self._fonts: Dict[int, pygame.font.Font] = {}
+        self._texts: "OrderedDict[tuple, pygame.Surface]" = OrderedDict()
+        self._background = None #* Nền + nhãn tĩnh (theo chiều rộng màn hình)
+        self._bar = None #* Thanh HUD đã ghép giá trị
+        self._bar_values = None #* Các giá trị ứng với _bar
+        self._state_images: Dict[str, pygame.Surface] = {} #* Trạng thái -> ảnh đã scale theo cửa sổ hiện tại
+        self._state_images_size = None #* Kích thước cửa sổ ứng với _state_images
+
+    def font(self, size: int) -> pygame.font.Font:
+        font = self._fonts.get(size)
+        if font is None:
+            font = self._fonts[size] = pygame.font.Font(None, size)
+        return font
+
+    #* Surface chữ đã render (lấy từ cache nếu đã có)
+    def text(self, size: int, text: str, color) -> pygame.Surface:
+        key = (size, text, tuple(color))
+        surface = self._texts.get(key)
+        if surface is not None:
+            self._texts.move_to_end(key)
+            return surface
+        surface = self._texts[key] = self.font(size).render(text, True, color)
+        if len(self._texts) > TEXT_CACHE_SIZE:
+            self._texts.popitem(last=False)
+        return surface
+
+    #* 1. Vẽ thanh nền HUD, đường phân cách và các nhãn tĩnh
+    def _build_background(self, w: int) -> pygame.Surface:
+        background = pygame.Surface((w, HUD_BAR_HEIGHT))
+        pygame.draw.rect(background, HUD_COLOR, (0, 0, w, HUD_HEIGHT))
+        pygame.draw.line(background, LINE_COLOR, (0, HUD_HEIGHT), (w, HUD_HEIGHT), 2)
+
+        #* Cột 2: nhãn DIRECTION
+        dir_label = self.text(LABEL_FONT_SIZE, "CURRENT DIRECTION", LABEL_COLOR)
+        background.blit(dir_label, dir_label.get_rect(midtop=(w // 2, TOP_Y)))
+
+        #* Cột 3: nhãn POWERUP - ROTATION - BƯỚC
+        label_right_x = w - 20 - LABEL_VALUE_GAP
+        for label, y in (("POWERUP:", TOP_Y), ("ROTATION:", MID_Y), ("STEP:", BOTTOM_Y)):
+            label_surface = self.text(LABEL_FONT_SIZE, label, LABEL_COLOR)
+            background.blit(label_surface, label_surface.get_rect(topright=(label_right_x, y + 5)))
+        return background
+
+    #* Vẽ thanh HUD có 3 cột chính
+    def draw(self, screen: pygame.Surface, game: Game, direction_name: str, is_manual_mode: bool, fps: int,
+             planning_progress: Optional[float] = None):
+        w = screen.get_width()
+        planning_percent = int(planning_progress * 100) if planning_progress is not None else None
+        values = (w, is_manual_mode, planning_percent, direction_name, int(fps),
+                  game.powerup_turns, game.rotation_step, game.steps)
+        if values != self._bar_values:
+            if self._background is None or self._background.get_width() != w:
+                self._background = self._build_background(w)
+            self._bar = self._compose(w, *values[1:])
+            self._bar_values = values
+        screen.blit(self._bar, (0, 0))
+
+    def _compose(self, w: int, is_manual_mode: bool, planning_percent: Optional[int], direction_name: str, fps: int,
+                 powerup_turns: int, rotation_step: int, steps: int) -> pygame.Surface:
+        bar = self._background.copy()
+        #* Vị trí X cho 3 cột chính (Cột 1: Trái, Cột 2: Giữa, Cột 3: Phải)
+        CENTER_COL_X = w // 2
+        VALUE_RIGHT_X = w - 20
+
+        #* Cột 1: MODE
+        mode_text = "MODE: " + ("MANUAL" if is_manual_mode else "A* AUTO")
+        mode_color = MODE_MANUAL_COLOR if is_manual_mode else MODE_AUTO_COLOR
+        mode_display = self.text(VALUE_FONT_SIZE, mode_text, mode_color)
+        bar.blit(mode_display, mode_display.get_rect(midleft=(20, HUD_HEIGHT // 2)))
+
+        #* Đang tính đường đi ở tiến trình nền => hiện "PLANNING…" và tiến độ dưới MODE
+        if planning_percent is not None:
+            planning_display = self.text(LABEL_FONT_SIZE, f"PLANNING... {planning_percent}%", MODE_AUTO_COLOR)
+            bar.blit(planning_display, planning_display.get_rect(midleft=(20, BOTTOM_Y + 15)))
+
+        #* Cột 2: DIRECTION - FPS
+        dir_value = self.text(VALUE_FONT_SIZE, direction_name, VALUE_COLOR)
+        bar.blit(dir_value, dir_value.get_rect(midtop=(CENTER_COL_X, MID_Y)))
+        fps_display = self.text(LABEL_FONT_SIZE, f"{fps} FPS", FPS_COLOR)
+        bar.blit(fps_display, fps_display.get_rect(midtop=(CENTER_COL_X, BOTTOM_Y + 10)))
+
+        #* Cột 3: POWERUP - ROTATION - BƯỚC
+        powerup_color = POWERUP_COLOR if powerup_turns > 0 else LABEL_COLOR
+        for text, color, y in ((f"{powerup_turns}", powerup_color, TOP_Y),
+                               (f"  {rotation_step}/30", ROTATION_COLOR, MID_Y),
+                               (f"  {steps}", STEPS_COLOR, BOTTOM_Y)):
+            value = self.text(VALUE_FONT_SIZE, text, color)
+            bar.blit(value, value.get_rect(topright=(VALUE_RIGHT_X, y)))
+        return bar
+
+    #*Vẽ ảnh trạng thái (Start/Win/Game Over/Paused) lên màn hình, ảnh đã scale được cache theo kích thước cửa sổ.
+    def draw_image_message(self, screen: pygame.Surface, state: str, window_size: Tuple[int, int],
+                           state_images: Dict[str, Optional[pygame.Surface]]):
+        if state not in ["start", "game_over", "win", "paused"] or state_images.get(state) is None:
+            return
+        w, h = window_size
+        if window_size != self._state_images_size:
+            self._state_images, self._state_images_size = {}, window_size
+        scaled_image = self._state_images.get(state)
+        if scaled_image is None:
             image = state_images[state]
-            
+
             #* Tính toán scale và căn giữa ảnh vừa với 70% chiều rộng màn hình
             target_width = int(w * 0.7)
             scale_factor = target_width / image.get_width()
             target_height = int(image.get_height() * scale_factor)
-            
+
             if target_height > h * 0.7:
                 target_height = int(h * 0.7)
                 scale_factor = target_height / image.get_height()
                 target_width = int(image.get_width() * scale_factor)
-            
-            scaled_image = pygame.transform.smoothscale(image, (target_width, target_height))
-            #* Căn giữa ảnh trên màn hình
-            image_rect = scaled_image.get_rect(center=(w // 2, h // 2))
-            screen.blit(scaled_image, image_rect)
-
-#* Vẽ thanh HUD có 3 cột chính
-def draw_hud(screen: pygame.Surface, game: Game, direction_name: str, is_manual_mode: bool, fps: int):
-    
-    w, h = screen.get_size()
-    
-    HUD_HEIGHT = 70
-    HUD_COLOR = pygame.Color("#1B263B")  #* Nền
-    LINE_COLOR = pygame.Color("#4A90E2")  #* Đường phân cách sáng
-    LABEL_COLOR = pygame.Color("#99AAB5")  #* Màu cho nhãn
-    VALUE_COLOR = pygame.Color("#FFFFFF")  #* Màu cho giá trị chính
-    FPS_COLOR = pygame.Color("#2ECC71")  #* Màu cho cho FPS
-
-    #* 1. Vẽ thanh nền HUD và đường phân cách
-    pygame.draw.rect(screen, HUD_COLOR, (0, 0, w, HUD_HEIGHT))
-    pygame.draw.line(screen, LINE_COLOR, (0, HUD_HEIGHT), (w, HUD_HEIGHT), 2)
-
-    #* 2. Setup Fonts
-    font_label = pygame.font.Font(None, 22)
-    font_value = pygame.font.Font(None, 36)
-    
-    #* 3. Tính toán vị trí cột và căn chỉnh
-    #* Vị trí X cho 3 cột chính (Cột 1: Trái, Cột 2: Giữa, Cột 3: Phải)
-    CENTER_COL_X = w // 2
-    
-    #* Vị trí Y cho hàng trên và hàng dưới
-    TOP_Y = 5
-    MID_Y = 25 #* Vị trí hàng giữa
-    BOTTOM_Y = 45 #* Vị trí hàng dưới cùng
-    
-    
-    #* Cột 1: MODE
-    mode_text = "MODE: " + ("MANUAL" if is_manual_mode else "A* AUTO")
-    mode_color = MODE_MANUAL_COLOR if is_manual_mode else MODE_AUTO_COLOR 
-    mode_display = font_value.render(mode_text, True, mode_color)
-    mode_display_rect = mode_display.get_rect(midleft=(20, HUD_HEIGHT // 2))
-    screen.blit(mode_display, mode_display_rect)
-    
-    
-    #* Cột 2: DIRECTION - FPS
-    #* DIRECTION
-    dir_label = font_label.render("CURRENT DIRECTION", True, LABEL_COLOR)
-    dir_value = font_value.render(direction_name, True, VALUE_COLOR)
-    dir_label_rect = dir_label.get_rect(midtop=(CENTER_COL_X, TOP_Y))
-    dir_value_rect = dir_value.get_rect(midtop=(CENTER_COL_X, MID_Y))
-    screen.blit(dir_label, dir_label_rect)
-    screen.blit(dir_value, dir_value_rect)
-    
-    #* FPS 
-    fps_text = f"{int(fps)} FPS"
-    fps_display = font_label.render(fps_text, True, FPS_COLOR)
-    fps_rect = fps_display.get_rect(midtop=(CENTER_COL_X, BOTTOM_Y + 10))
-    screen.blit(fps_display, fps_rect)
-    
-    
-    #* Cột 3: POWERUP - ROTATION - BƯỚC
-    #* Khoảng cách giữa nhãn và giá trị
-    LABEL_VALUE_GAP = 70 
-    VALUE_RIGHT_X = w - 20 
-    #* POWERUP
-    powerup_color = POWERUP_COLOR if game.powerup_turns > 0 else LABEL_COLOR
-    powerup_label = font_label.render("POWERUP:", True, LABEL_COLOR)
-    powerup_value = font_value.render(f"{game.powerup_turns}", True, powerup_color)
-    powerup_label_rect = powerup_label.get_rect(topright=(VALUE_RIGHT_X - LABEL_VALUE_GAP, TOP_Y + 5))
-    powerup_value_rect = powerup_value.get_rect(topright=(VALUE_RIGHT_X, TOP_Y))
-    screen.blit(powerup_label, powerup_label_rect)
-    screen.blit(powerup_value, powerup_value_rect)
-    
-    #* ROTATION (MID)
-    rotation_color = pygame.Color("#3498DB") # Màu xanh dương
-    rotation_label = font_label.render("ROTATION:", True, LABEL_COLOR)
-    rotation_value = font_value.render(f"  {game.rotation_step}/30", True, rotation_color)
-    rotation_label_rect = rotation_label.get_rect(topright=(VALUE_RIGHT_X - LABEL_VALUE_GAP, MID_Y + 5)) # Sử dụng MID_Y
-    rotation_value_rect = rotation_value.get_rect(topright=(VALUE_RIGHT_X, MID_Y)) # Sử dụng MID_Y
-    screen.blit(rotation_label, rotation_label_rect)
-    screen.blit(rotation_value, rotation_value_rect)
-    
-    #* BƯỚC 
-    steps_color = pygame.Color("#FFD700") 
-    steps_label = font_label.render("STEP:", True, LABEL_COLOR)
-    steps_value = font_value.render(f"  {game.steps}", True, steps_color)
-    steps_label_rect = steps_label.get_rect(topright=(VALUE_RIGHT_X - LABEL_VALUE_GAP, BOTTOM_Y + 5)) 
-    steps_value_rect = steps_value.get_rect(topright=(VALUE_RIGHT_X, BOTTOM_Y)) 
-    screen.blit(steps_label, steps_label_rect)
-    screen.blit(steps_value, steps_value_rect)
+
+            scaled_image = self._state_images[state] = pygame.transform.smoothscale(image, (target_width, target_height))
+        #* Căn giữa ảnh trên màn hình
+        screen.blit(scaled_image, scaled_image.get_rect(center=(w // 2, h // 2)))
@@ -0,0 +1,169 @@
+import random
+from collections import deque
+from typing import Iterator, List, Optional, Sequence, Set, Tuple
+from .ghosts import Pos
+from .game import Game
+from .pathfinding import find_multi_stage_path
+from .tour import simulate_path
+
+WALL, OPEN = "%", " "
+MIN_SIZE = 5 #* Kích thước nhỏ nhất mỗi chiều (viền + ít nhất 1 ô trống)
+MAX_VERIFY_ATTEMPTS = 20 #* Số lần đặt lại ghost tối đa khi layout có ghost mà solver không giải được
+GHOST_MIN_DISTANCE = 3 #* Ghost không được đặt quá gần Pacman lúc bắt đầu
+
+#! SINH LAYOUT NGẪU NHIÊN (CÓ SEED) *
+#* 1. Đào mê cung hoàn hảo (DFS quay lui) trên các ô tọa độ lẻ => mọi ô trống liên thông.
+#* 2. Phá bớt tường ngẫu nhiên tới khi đạt mật độ tường mong muốn; chỉ phá tường kề 1 ô trống => vẫn liên thông.
+#* 3. Các ô portal (4 góc trong, xem Game.portals) được mở và nối vào mê cung, hoặc bị lấp tường nếu tắt portal.
+#*    Định dạng map không có ký hiệu portal và Game luôn đặt portal ở 4 góc trong => chỉ bật / tắt được,
+#*    không chọn được vị trí portal.
+#* 4. Đặt P, E, food, magic pie, ghost trên các ô trống khác nhau.
+#* Không có ghost => luôn giải được (mọi mục tiêu liên thông với P). Có ghost => chạy solver để kiểm tra,
+#* nếu không giải được thì đặt lại ghost (tối đa MAX_VERIFY_ATTEMPTS lần).
+
+def _portal_cells(w: int, h: int) -> List[Pos]:
+  return [(1, 1), (w - 2, 1), (w - 2, h - 2), (1, h - 2)]
+
+def _carve_maze(w: int, h: int, rng: random.Random) -> List[List[str]]:
+  grid = [[WALL] * w for _ in range(h)]
+  grid[1][1] = OPEN
+  stack = [(1, 1)]
+  while stack:
+    x, y = stack[-1]
+    neighbours = [(x + dx, y + dy, dx, dy) for dx, dy in ((2, 0), (-2, 0), (0, 2), (0, -2))
+                  if 0 < x + dx < w - 1 and 0 < y + dy < h - 1 and grid[y + dy][x + dx] == WALL]
+    if not neighbours:
+      stack.pop()
+      continue
+    nx, ny, dx, dy = rng.choice(neighbours)
+    grid[y + dy // 2][x + dx // 2] = OPEN
+    grid[ny][nx] = OPEN
+    stack.append((nx, ny))
+  return grid
+
+def _open_neighbours(grid: List[List[str]], x: int, y: int) -> Iterator[Pos]:
+  for dx, dy in ((1, 0), (-1, 0), (0, 1), (0, -1)):
+    if grid[y + dy][x + dx] == OPEN:
+      yield x + dx, y + dy
+
+#* Phá tường trong (không phải viền) tới khi tỉ lệ tường trong <= wall_density
+def _open_walls(grid: List[List[str]], wall_density: float, rng: random.Random) -> None:
+  h, w = len(grid), len(grid[0])
+  candidates = [(x, y) for y in range(1, h - 1) for x in range(1, w - 1) if grid[y][x] == WALL]
+  rng.shuffle(candidates)
+  excess = len(candidates) - int(wall_density * (w - 2) * (h - 2))
+  for x, y in candidates:
+    if excess <= 0:
+      break
+    #* Chỉ phá tường kề ô trống => ô mới nối vào vùng liên thông
+    if next(_open_neighbours(grid, x, y), None) is not None:
+      grid[y][x] = OPEN
+      excess -= 1
+
+def _reachable(grid: List[List[str]], start: Pos) -> Set[Pos]:
+  seen = {start}
+  queue = deque([start])
+  while queue:
+    x, y = queue.popleft()
+    for pos in _open_neighbours(grid, x, y):
+      if pos not in seen:
+        seen.add(pos)
+        queue.append(pos)
+  return seen
+
+#* Đào đường ngắn nhất (xuyên tường trong, tránh các ô blocked) từ cell tới 1 ô thuộc component
+def _connect(grid: List[List[str]], cell: Pos, component: Set[Pos], blocked: Set[Pos]) -> None:
+  h, w = len(grid), len(grid[0])
+  parent = {cell: None}
+  queue = deque([cell])
+  while queue:
+    pos = queue.popleft()
+    if pos in component:
+      while pos is not None:
+        grid[pos[1]][pos[0]] = OPEN
+        pos = parent[pos]
+      return
+    x, y = pos
+    for nxt in ((x + 1, y), (x - 1, y), (x, y + 1), (x, y - 1)):
+      if 0 < nxt[0] < w - 1 and 0 < nxt[1] < h - 1 and nxt not in parent and nxt not in blocked:
+        parent[nxt] = pos
+        queue.append(nxt)
+
+def _place_portals(grid: List[List[str]], portals: bool) -> None:
+  h, w = len(grid), len(grid[0])
+  cells = _portal_cells(w, h)
+  anchor = next((x, y) for y in range(1, h - 1) for x in range(1, w - 1)
+                if grid[y][x] == OPEN and (x, y) not in cells)
+  if portals:
+    component = _reachable(grid, anchor)
+    for cell in cells:
+      if cell not in component:
+        _connect(grid, cell, component, set())
+        component = _reachable(grid, anchor)
+    return
+
+  #* Tắt portal: lấp tường 4 góc rồi nối lại các vùng bị tách ra (đi vòng qua các góc)
+  blocked = set(cells)
+  for x, y in cells:
+    grid[y][x] = WALL
+  component = _reachable(grid, anchor)
+  while True:
+    stray = next(((x, y) for y in range(1, h - 1) for x in range(1, w - 1)
+                  if grid[y][x] == OPEN and (x, y) not in component), None)
+    if stray is None:
+      return
+    _connect(grid, stray, component, blocked)
+    component = _reachable(grid, anchor)
+
+def _render(grid: List[List[str]], items: dict) -> str:
+  rows = [row[:] for row in grid]
+  for (x, y), char in items.items():
+    rows[y][x] = char
+  return "\n".join("".join(row) for row in rows)
+
+def _is_solvable(map_str: str) -> bool:
+  game = Game.load_map(map_str)
+  return simulate_path(game, find_multi_stage_path(game))
+
+def generate_layout(width: int, height: int, seed: Optional[int] = None, wall_density: float = 0.35,
+                    food: int = 10, pies: int = 2, ghosts: int = 0, portals: bool = True,
+                    verify: bool = True) -> str:
+  #* wall_density: tỉ lệ tường trong mong muốn (0-1); mê cung hoàn hảo đã khoảng 0.5 nên giá trị lớn hơn bị chặn
+  #* verify: với layout có ghost, chạy solver và đặt lại ghost nếu không giải được
+  if width < MIN_SIZE or height < MIN_SIZE:
+    raise ValueError(f"Layout must be at least {MIN_SIZE}x{MIN_SIZE}, got {width}x{height}")
+  rng = random.Random(seed)
+  grid = _carve_maze(width, height, rng)
+  _open_walls(grid, wall_density, rng)
+  _place_portals(grid, portals)
+
+  excluded = set(_portal_cells(width, height))
+  cells = [(x, y) for y in range(1, height - 1) for x in range(1, width - 1)
+           if grid[y][x] == OPEN and (x, y) not in excluded]
+  if len(cells) < 2 + food + pies + ghosts:
+    raise ValueError(f"Not enough free cells ({len(cells)}) for {food} food, {pies} pies and {ghosts} ghosts")
+  chosen = rng.sample(cells, 2 + food + pies)
+  player, exit_pos = chosen[0], chosen[1]
+  items = {player: "P", exit_pos: "E"}
+  items.update((pos, ".") for pos in chosen[2:2 + food])
+  items.update((pos, "O") for pos in chosen[2 + food:])
+  if not ghosts:
+    return _render(grid, items)
+
+  ghost_cells = [pos for pos in cells if pos not in items
+                 and abs(pos[0] - player[0]) + abs(pos[1] - player[1]) >= GHOST_MIN_DISTANCE]
+  if len(ghost_cells) < ghosts:
+    raise ValueError(f"Not enough free cells away from Pacman for {ghosts} ghosts")
+  for _ in range(MAX_VERIFY_ATTEMPTS):
+    map_str = _render(grid, {**items, **{pos: "G" for pos in rng.sample(ghost_cells, ghosts)}})
+    if not verify or _is_solvable(map_str):
+      return map_str
+  raise ValueError(f"No solvable ghost placement found after {MAX_VERIFY_ATTEMPTS} attempts (seed {seed})")
+
+#* Bộ layout quét kích thước: mỗi (kích thước, số food) => (tên file, nội dung)
+def size_sweep(sizes: Sequence[Tuple[int, int]], food_counts: Sequence[int], seed: int = 0,
+               **options) -> Iterator[Tuple[str, str]]:
+  for width, height in sizes:
+    for food in food_counts:
+      yield (f"gen_{width}x{height}_f{food}_s{seed}.txt",
+             generate_layout(width, height, seed=seed, food=food, **options))
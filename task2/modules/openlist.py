@@ -0,0 +1,79 @@
+from heapq import heappop, heappush
+from typing import Dict, List, Tuple
+
+#* Phần tử của open list: (f_cost, g_cost, state_hash, node_id)
+OpenEntry = Tuple[int, int, int, int]
+
+class HeapOpenList:
+  #! OPEN LIST DẠNG HEAP (hành vi cũ của A*) *
+  #* Cùng f => ưu tiên g nhỏ hơn, rồi đến state_hash nhỏ hơn
+  __slots__ = ('_heap',)
+  def __init__(self):
+    self._heap: List[OpenEntry] = []
+
+  def __len__(self) -> int:
+    return len(self._heap)
+
+  def push(self, f_cost: int, g_cost: int, state_hash: int, node: int) -> None:
+    heappush(self._heap, (f_cost, g_cost, state_hash, node))
+
+  def pop(self) -> OpenEntry:
+    return heappop(self._heap)
+
+class _Bucket:
+  #* Các phần tử có cùng f, chia theo g: by_g[g] là danh sách (state_hash, node)
+  __slots__ = ('by_g', 'top', 'size')
+  def __init__(self):
+    self.by_g: List[List[Tuple[int, int]]] = []
+    self.top = -1 #* g lớn nhất có thể còn phần tử
+    self.size = 0
+
+  def push(self, g_cost: int, item: Tuple[int, int]) -> None:
+    by_g = self.by_g
+    if g_cost >= len(by_g):
+      by_g.extend([] for _ in range(g_cost + 1 - len(by_g)))
+    by_g[g_cost].append(item)
+    if g_cost > self.top:
+      self.top = g_cost
+    self.size += 1
+
+  def pop(self) -> Tuple[int, Tuple[int, int]]:
+    by_g = self.by_g
+    while not by_g[self.top]:
+      self.top -= 1
+    self.size -= 1
+    return self.top, by_g[self.top].pop()
+
+class BucketOpenList:
+  #! OPEN LIST DẠNG BUCKET 2 TẦNG (chi phí nguyên) *
+  #* Tầng 1: bucket theo f (heap nhỏ chỉ chứa các giá trị f khác nhau); tầng 2: danh sách theo g trong bucket.
+  #* Cùng f => ưu tiên g LỚN hơn (gần đích hơn). Phần tử cũ không bị xóa, A* tự bỏ qua khi lấy ra (lazy).
+  __slots__ = ('_buckets', '_f_values', '_size')
+  def __init__(self):
+    self._buckets: Dict[int, _Bucket] = {}
+    self._f_values: List[int] = []
+    self._size = 0
+
+  def __len__(self) -> int:
+    return self._size
+
+  def push(self, f_cost: int, g_cost: int, state_hash: int, node: int) -> None:
+    bucket = self._buckets.get(f_cost)
+    if bucket is None:
+      bucket = self._buckets[f_cost] = _Bucket()
+      heappush(self._f_values, f_cost)
+    bucket.push(g_cost, (state_hash, node))
+    self._size += 1
+
+  def pop(self) -> OpenEntry:
+    f_cost = self._f_values[0]
+    bucket = self._buckets[f_cost]
+    g_cost, (state_hash, node) = bucket.pop()
+    if not bucket.size:
+      del self._buckets[f_cost]
+      heappop(self._f_values)
+    self._size -= 1
+    return f_cost, g_cost, state_hash, node
+
+#* Các loại open list có thể chọn cho PathFinder.find
+OPEN_LISTS = {"heap": HeapOpenList, "bucket": BucketOpenList}
@@ -0,0 +1,124 @@
+import multiprocessing
+import os
+import struct
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing import shared_memory
+from typing import Dict, List, Optional, Sequence
+from .game import Pos
+from .distance import INF, POWERUP_LAYERS, DistanceOracle, layered_bfs
+
+PARALLEL_MIN_WORK = 200_000 #* Số ô map * số bảng cần dựng tối thiểu để chạy song song (nhỏ hơn => BFS tuần tự)
+UNREACHABLE = -1 #* Giá trị INF trong bảng kết quả int32 ở shared memory
+
+#! PHẦN CHẠY TRONG TIẾN TRÌNH CON *
+#* Cấu hình tường đang dùng: tên segment -> (w, h, wall_flags, portals). Chỉ giữ cấu hình mới nhất
+_segments: Dict[str, tuple] = {}
+
+#* Đọc segment tường 1 lần cho mỗi cấu hình (các task sau cùng cấu hình dùng lại bản đã đọc).
+#* Chép cờ tường ra bytes rồi đóng ngay: không giữ view nào trỏ vào segment khi tiến trình con thoát
+def _walls_segment(name: str) -> tuple:
+  segment = _segments.get(name)
+  if segment is None:
+    shm = shared_memory.SharedMemory(name=name)
+    try:
+      w, h, count = struct.unpack_from("iii", shm.buf)
+      cells = struct.unpack_from(f"{count}i", shm.buf, 12)
+      wall_flags = bytes(shm.buf[12 + 4 * count:12 + 4 * count + w * h])
+    finally:
+      shm.close()
+    _segments.clear()
+    segment = _segments[name] = (w, h, wall_flags, tuple((cell % w, cell // w) for cell in cells))
+  return segment
+
+#* Dựng bảng cho targets, ghi vào out_name bắt đầu từ bảng thứ offset
+def _build_tables(walls_name: str, targets: List[Pos], out_name: str, offset: int) -> int:
+  w, h, wall_flags, portals = _walls_segment(walls_name)
+  size = POWERUP_LAYERS * w * h
+  out = shared_memory.SharedMemory(name=out_name)
+  try:
+    with out.buf.cast("i") as view:
+      for i, target in enumerate(targets):
+        dist = layered_bfs(w, h, wall_flags, portals, target)
+        start = (offset + i) * size
+        view[start:start + size] = array("i", [UNREACHABLE if d == INF else d for d in dist])
+  finally:
+    out.close()
+  return len(targets)
+
+#! PHẦN CHẠY TRONG TIẾN TRÌNH CHÍNH *
+class ParallelStageEvaluator:
+  #! DỰNG BẢNG KHOẢNG CÁCH SONG SONG *
+  #* Mỗi chặng của find_multi_stage_path cần bảng khoảng cách tới mọi food / bánh ma thuật; các BFS này độc lập
+  #* => chia cho process pool. Tường + portal được ghi 1 lần vào shared memory cho mỗi cấu hình tường,
+  #* task chỉ mang tên segment và danh sách đích; kết quả ghi vào 1 segment int32 chung rồi nạp vào oracle.
+  #* Map nhỏ / ít bảng cần dựng (< min_work) => không làm gì, oracle tự BFS tuần tự như bình thường.
+  __slots__ = ('workers', 'min_work', '_context', '_executor', '_walls_key', '_walls_shm')
+  def __init__(self, workers: Optional[int] = None, min_work: int = PARALLEL_MIN_WORK):
+    self.workers = workers or os.cpu_count() or 1
+    self.min_work = min_work
+    self._context = multiprocessing.get_context("spawn") #* Không fork tiến trình đang chạy pygame
+    self._executor = None
+    self._walls_key = None
+    self._walls_shm: Optional[shared_memory.SharedMemory] = None
+
+  #* Ghi cấu hình tường của oracle vào shared memory (chỉ khi khác lần trước): [w, h, số portal, portal..., cờ tường]
+  def _share_walls(self, oracle: DistanceOracle) -> str:
+    key = (oracle.w, oracle.h, oracle.walls, oracle.portals)
+    if key != self._walls_key:
+      self._release_walls()
+      w, n = oracle.w, oracle.w * oracle.h
+      header = struct.pack(f"iii{len(oracle.portals)}i", w, oracle.h, len(oracle.portals),
+                           *(y * w + x for x, y in oracle.portals))
+      shm = shared_memory.SharedMemory(create=True, size=len(header) + n)
+      shm.buf[:len(header)] = header
+      for x, y in oracle.walls:
+        shm.buf[len(header) + y * w + x] = 1
+      self._walls_key, self._walls_shm = key, shm
+    return self._walls_shm.name
+
+  def _release_walls(self) -> None:
+    if self._walls_shm is not None:
+      self._walls_shm.close()
+      self._walls_shm.unlink()
+      self._walls_key = self._walls_shm = None
+
+  #* Dựng trước (song song) các bảng còn thiếu của targets (không tính bánh, giống oracle.distance mặc định)
+  #* trong oracle. Trả về số bảng đã dựng
+  def prefetch(self, oracle: DistanceOracle, targets: Sequence[Pos]) -> int:
+    missing = oracle.missing_layers(targets)
+    size = POWERUP_LAYERS * oracle.w * oracle.h
+    if self.workers <= 1 or len(missing) < 2 or len(missing) * oracle.w * oracle.h < self.min_work:
+      return 0
+    try:
+      if self._executor is None:
+        self._executor = ProcessPoolExecutor(max_workers=self.workers, mp_context=self._context)
+      walls_name = self._share_walls(oracle)
+      out = shared_memory.SharedMemory(create=True, size=len(missing) * size * 4)
+      try:
+        chunk = -(-len(missing) // self.workers)
+        futures = [self._executor.submit(_build_tables, walls_name, missing[i:i + chunk], out.name, i)
+                   for i in range(0, len(missing), chunk)]
+        for future in futures:
+          future.result()
+        with out.buf.cast("i") as view:
+          for i, target in enumerate(missing):
+            table = view[i * size:(i + 1) * size].tolist()
+            oracle.store_layers(target, [INF if d == UNREACHABLE else d for d in table])
+      finally:
+        out.close()
+        out.unlink()
+    except (OSError, BrokenProcessPool) as e:
+      #* Không tạo được shared memory / tiến trình con => từ đây BFS tuần tự
+      print(f"Parallel evaluation unavailable ({e}), falling back to serial BFS.")
+      self.shutdown()
+      self.workers = 1
+      return 0
+    return len(missing)
+
+  def shutdown(self) -> None:
+    if self._executor is not None:
+      self._executor.shutdown(wait=True, cancel_futures=True)
+      self._executor = None
+    self._release_walls()
@@ -1,12 +1,48 @@
+import time
 from itertools import groupby
-from heapq import heappop, heappush
-from collections import deque
-from typing import Set, Dict, Tuple
-from .game import Game, Pos, directions
+from heapq import heappop, heappush, heapify
+from typing import Callable, Tuple, Optional
+from .game import Game, Pos
+from .distance import EMPTY, DistanceOracle, get_oracle, oracle_for
+from .arena import NodeArena, NodeLimitExceeded, MAX_NODES, NO_PARENT, process_peak_rss_mb
+from .openlist import OPEN_LISTS
+from .parallel import ParallelStageEvaluator
+from .stats import SearchStats
+
+#* Báo cáo của 1 lần tìm kiếm: đích, số bước, số node đã tạo, bộ nhớ arena (byte),
+#* đỉnh RSS của cả tiến trình tính tới lúc xong lần tìm kiếm (MB, không phải riêng lần này), cận tối ưu,
+#* số node đã mở rộng, số lần thêm vào open list, số bản ghi cũ bị bỏ qua
+SearchReport = Tuple[Pos, int, int, int, Optional[float], float, int, int, int]
+
+ARA_INITIAL_WEIGHT = 3.0 #* Trọng số heuristic ban đầu của ARA*
+ARA_WEIGHT_STEP = 0.5 #* Mức giảm trọng số sau mỗi vòng ARA*
+DEADLINE_CHECK_INTERVAL = 64 #* Số lần mở rộng giữa 2 lần kiểm tra đồng hồ
+DEFAULT_OPEN_LIST = "bucket" #* Open list mặc định của A* (xem OPEN_LISTS)
+#* Heuristic của A*: "nearest" (khoảng cách tới food gần nhất) hoặc "mst" (+ cây khung qua food còn lại và exit)
+HEURISTICS = ("nearest", "mst")
+DEFAULT_HEURISTIC = "nearest"
+
+class BudgetExceeded(Exception):
+  #* Hết thời gian (deadline) trước khi vòng đầu của ARA* tìm được đường: không có đường trong ngân sách,
+  #* nơi gọi tự chọn cách xử lý (chạy planner khác, giải lại ở tiến trình nền)
+  pass
+
+#* Bộ đếm toàn cục của DistanceOracle: (số BFS, số lần nearest trúng cache, số lần trượt)
+def _oracle_counters() -> Tuple[int, int, int]:
+  return DistanceOracle.bfs_calls, DistanceOracle.nearest_hits, DistanceOracle.nearest_misses
   
 class PathFinder:
-  def __init__(self, src: Game):
+  def __init__(self, src: Game, max_nodes: int = MAX_NODES, open_list: str = DEFAULT_OPEN_LIST,
+               stats: Optional[SearchStats] = None, heuristic: str = DEFAULT_HEURISTIC):
     self.src = src
+    self.open_list = open_list #* Tên loại open list dùng cho find (xem OPEN_LISTS)
+    self.heuristic = heuristic #* Tên heuristic dùng cho estimate (xem HEURISTICS)
+    self.max_nodes = max_nodes #* Trần số node của arena (vượt trần => dừng tìm kiếm)
+    self.nodes_created = 0 #* Số node đã tạo ở lần find gần nhất
+    self.arena_bytes = 0 #* Bộ nhớ các mảng của arena ở lần find gần nhất
+    self.process_peak_rss = None #* Đỉnh RSS (MB) của cả tiến trình tính tới lúc xong lần find gần nhất
+    self.suboptimality = 1.0 #* Cận trên của (độ dài đường tìm được / độ dài tối ưu) ở lần find gần nhất
+    self.stats = stats if stats is not None else SearchStats() #* Bộ đếm / thời gian, cộng dồn qua các lần find
   
   #*-------------------------------
   #! HÀM HỖ TRỢ TÍNH HEURISIC (BFS)
@@ -15,103 +51,119 @@ class PathFinder:
   def _shortest_path_cost(self, start: Pos, end: Pos, 
                           walls: set[Pos], portals: list[Pos],powerup_turns: int
                           ,w: int, h: int)->int:
-    if start == end:
-      return 0
-    queue = deque([(start, 0)])
-    visited: Set[Pos] = {start}
-
-    
-    while queue:
-      (x, y), cost = queue.popleft()
-      for direction_name, (dx, dy) in directions.items():
-        if direction_name == "STOP": continue
-        nx, ny = x + dx, y + dy
-        new_pos = (nx, ny)
-        
-        if new_pos == end:
-          return cost + 1
-        
-        #* Kiểm tra Biên 
-        if not (0 <= nx < w and 0 <= ny < h):
-          continue
-        
-        #* Xử lý cổng tele
-        if new_pos in portals:
-          current_portal = new_pos
-          #* Từ cổng hiện tại đến bất kì cổng nào cho chi phí là 1
-          for target_portal in portals:
-            if target_portal != current_portal and target_portal not in visited:
-              visited.add(target_portal)
-              queue.append((target_portal, cost + 1))
-          visited.add(new_pos)
-          continue
-        
-        #* Kiểm tra Tường
-        if (new_pos in walls and powerup_turns ==0) or (new_pos in visited): 
-          continue
-        
-        visited.add(new_pos)
-        queue.append((new_pos, cost + 1))
-        
-    return float('inf') #* Nếu không thấy trả về chi phí vô hạn 
+    #* Tra cứu khoảng cách từ oracle (BFS chỉ chạy 1 lần cho mỗi nguồn và cấu hình tường)
+    return get_oracle(w, h, walls, portals).distance(start, end, powerup_turns)
   
   #*-------------------------------
   #! HÀM HEURISTIC h(n)
   #*-------------------------------
   
   def estimate(self, game: Game) -> int:
-    current_walls = game.walls
-    current_portals = game.portals
-    current_powerup_turns = game.powerup_turns    
+    oracle = oracle_for(game)
+    current_powerup_turns = game.powerup_turns
+    #* Khoảng cách theo tầng Power-up (xem DistanceOracle): tính cả số lượt còn lại và các bánh còn trên map
+    pies = getattr(game, 'pie_mask', None)
+    if pies is None:
+      pies = game.magical_pies
+    food = getattr(game, 'food_mask', None)
+    if food is None:
+      food = game.food_points
     #* Nếu food đã được ăn hết => tìm exit
-    if not game.food_points:
-      cost = self._shortest_path_cost(game.player, game.exit_pos,
-                                      current_walls,current_portals,current_powerup_turns,
-                                      game.w, game.h)
+    if not food:
+      cost = oracle.distance(game.player, game.exit_pos, current_powerup_turns, pies)
       return cost if cost != float('inf') else 100000
     
-    #* Nếu food chưa được ăn hết => tìm food gần nhất
-    min_dist_to_food = float('inf')
-        
-    for food_pos in game.food_points:
-      dist = self._shortest_path_cost(game.player, food_pos,
-                                      current_walls, current_portals,current_powerup_turns,
-                                      game.w, game.h)
-      min_dist_to_food = min(min_dist_to_food, dist)
+    #* Nếu food chưa được ăn hết => tìm food gần nhất (nhớ theo tập food còn lại)
+    if self.heuristic == "mst":
+      return self._estimate_mst(game, oracle, food, pies)
+    min_dist_to_food = oracle.nearest(game.player, food, current_powerup_turns, pies)
     
     return min_dist_to_food if min_dist_to_food != float('inf') else 100000
   
+  #* Cận dưới của quãng đường còn lại: tới food gần nhất + cây khung nhỏ nhất qua các food còn lại và exit
+  #* (mọi đường đi qua hết food rồi tới exit đều dài hơn cây khung trên các điểm đó).
+  #* Tường còn có thể bị ăn (còn bánh / đang Power-up) => đoạn trước có thể mở lỗ cho đoạn sau, bảng theo tường
+  #* hiện tại không còn là cận dưới của các cạnh => cạnh dùng khoảng cách trên map không tường (chỉ giữ cổng)
+  def _estimate_mst(self, game: Game, oracle, food, pies) -> int:
+    edges = get_oracle(game.w, game.h, EMPTY, game.portals) if pies or game.powerup_turns else oracle
+    cost = (oracle.nearest(game.player, food, game.powerup_turns, pies)
+            + edges.mst(food, game.exit_pos, 0))
+    return cost if cost != float('inf') else 100000
+  
+  #* estimate / get_moves / move_to dùng trong vòng lặp tìm kiếm (được bọc đo thời gian khi stats.timing)
+  def _operations(self) -> Tuple[Callable, Callable, Callable]:
+    state_type = type(self.src)
+    estimate, get_moves, move_to = self.estimate, state_type.get_moves, state_type.move_to
+    if self.stats.timing:
+      timed = self.stats.timed
+      estimate, get_moves, move_to = timed("estimate", estimate), timed("get_moves", get_moves), timed("move_to", move_to)
+    return estimate, get_moves, move_to
+  
+  #* Cập nhật thống kê sau mỗi lần find / find_anytime
+  def _finish(self, arena: NodeArena, started: float, oracle_start: Tuple[int, int, int]) -> None:
+    self.nodes_created = len(arena)
+    self.arena_bytes = arena.nbytes()
+    self.process_peak_rss = process_peak_rss_mb()
+    stats = self.stats
+    bfs_calls, hits, misses = _oracle_counters()
+    stats.search_time += time.perf_counter() - started
+    stats.bfs_calls += bfs_calls - oracle_start[0]
+    stats.heuristic_hits += hits - oracle_start[1]
+    stats.heuristic_misses += misses - oracle_start[2]
+  
   #*-------------------------------
   #! THUẬT TOÁN A*
   #*-------------------------------
   
   def find(self) -> list[str]:
-    #* frontier: (f_cost, g_cost, game_state)
-    frontier = [(self.estimate(self.src), 0 ,hash(self.src),self.src)]
-    g_cost_best: Dict[int, int] = {hash(self.src): 0}
-    parent_map: Dict[int, Tuple[Game, str]] = {} #* Lưu trạng thái Game và hướng di chuyển: Cha của trạng Game hiện Tại
+    arena = NodeArena(self.max_nodes)
+    self.suboptimality = 1.0
+    started, oracle_start = time.perf_counter(), _oracle_counters()
+    try:
+      return self._search(arena)
+    except NodeLimitExceeded:
+      print(f"A* aborted: node limit ({self.max_nodes}) reached")
+      return []
+    finally:
+      self._finish(arena, started, oracle_start)
+  
+  def _search(self, arena: NodeArena) -> list[str]:
+    #* State được lưu 1 lần trong arena; frontier chỉ giữ id: (f_cost, g_cost, state_hash, node_id)
+    stats = self.stats
+    hook, hook_interval = stats.hook, stats.hook_interval
+    estimate, get_moves, move_to = self._operations()
+    src_hash = hash(self.src)
+    src_node = arena.add(src_hash, self.src, NO_PARENT, None, 0)
+    frontier = OPEN_LISTS[self.open_list]()
+    frontier.push(estimate(self.src), 0, src_hash, src_node)
+    stats.pushes += 1
+    open_size = 1 #* Kích thước open list (đếm tay, tránh gọi __len__ mỗi vòng)
+    ids, g_costs, states = arena.ids, arena.g_costs, arena.states
     
     while frontier:
-      f_cost, g_cost,state_hash, game = heappop(frontier)
+      f_cost, g_cost, state_hash, node = frontier.pop()
+      open_size -= 1
       
-      if game.is_game_over() or g_cost > g_cost_best.get(state_hash, float('inf')):
+      #* Bỏ qua bản ghi cũ (đã có đường tốt hơn hoặc node đã được mở rộng)
+      game = states[node]
+      if game is None or g_cost > g_costs[node]:
+        stats.stale_pops += 1
+        continue
+      if game.is_game_over():
         continue
       
       if game.is_winner():
-        path = []
-        current_hash = state_hash
-        while current_hash != hash(self.src):
-          parent_game, direction = parent_map[current_hash]
-          path.append(direction)
-          current_hash = hash(parent_game)
-          
-        return path[::-1]
+        return arena.path_to(node)
+      arena.close(node)
+      stats.expanded += 1
       
       #* Lặp qua tất cả các action
-      for direction, new_pos in game.get_moves().items():
+      moves = get_moves(game)
+      stats.generated += len(moves)
+      for direction, new_pos in moves.items():
         
         #* Get successor
-        new_game = game.move_to(new_pos, direction)
+        new_game = move_to(game, new_pos, direction)
         new_state_hash = hash(new_game)
         new_g_cost = g_cost + 1
         
@@ -119,67 +171,213 @@ class PathFinder:
           continue
         
         #* Nếu chi phí mới tốt hơn chi phí cũ thì cập nhật lại
-        if new_g_cost < g_cost_best.get(new_state_hash, float('inf')):
-          g_cost_best[new_state_hash] = new_g_cost
-          
-          parent_map[new_state_hash] = (game, direction)
-          
-          new_h_cost = self.estimate(new_game)
-          new_f_cost = new_g_cost + new_h_cost
+        new_node = ids.get(new_state_hash)
+        if new_node is None:
+          new_node = arena.add(new_state_hash, new_game, node, direction, new_g_cost)
+        elif new_g_cost < g_costs[new_node]:
+          arena.relax(new_node, new_game, node, direction, new_g_cost)
+        else:
+          continue
           
-          heappush(frontier, (new_f_cost, new_g_cost, new_state_hash, new_game))
+        new_h_cost = estimate(new_game)
+        new_f_cost = new_g_cost + new_h_cost
+        
+        frontier.push(new_f_cost, new_g_cost, new_state_hash, new_node)
+        open_size += 1
+        stats.pushes += 1
+      
+      if open_size > stats.open_peak:
+        stats.open_peak = open_size
+      if hook is not None and stats.expanded % hook_interval == 0:
+        hook(stats)
           
     return [] # không tìm thấy đường
   
-  def find_path_to(self, target: Pos)-> list[str]:
-    src = self.src
-    temp_game = Game(
-        src.w, src.h, src.player,set(),
-        set(), src.walls, target, src.ghost_states,
-        src.powerup_turns, src.rotation_step, src.portals
-    )
-    temp_finder = PathFinder(temp_game)
-    return temp_finder.find()
+  #*-------------------------------
+  #! ANYTIME A* (ARA*) CÓ GIỚI HẠN THỜI GIAN
+  #*-------------------------------
+  
+  #* Chạy Weighted A* với trọng số giảm dần (tái sử dụng kết quả của vòng trước), dừng khi hết ngân sách.
+  #* deadline: mốc time.monotonic(), áp dụng cho mọi vòng (kể cả vòng đầu); max_expansions: số lần mở rộng tối đa.
+  #* Trả về đường tốt nhất đã tìm được; ném BudgetExceeded nếu hết thời gian khi chưa có đường nào.
+  def find_anytime(self, deadline: Optional[float] = None, max_expansions: Optional[int] = None,
+                   weight: float = ARA_INITIAL_WEIGHT, weight_step: float = ARA_WEIGHT_STEP) -> list[str]:
+    arena = NodeArena(self.max_nodes)
+    self.suboptimality = float('inf')
+    started, oracle_start = time.perf_counter(), _oracle_counters()
+    try:
+      return self._search_anytime(arena, deadline, max_expansions, weight, weight_step)
+    except NodeLimitExceeded:
+      print(f"ARA* aborted: node limit ({self.max_nodes}) reached")
+      return []
+    finally:
+      self._finish(arena, started, oracle_start)
   
-def find_multi_stage_path(game_src):
+  def _search_anytime(self, arena: NodeArena, deadline: Optional[float], max_expansions: Optional[int],
+                      weight: float, weight_step: float) -> list[str]:
+    stats = self.stats
+    hook, hook_interval = stats.hook, stats.hook_interval
+    estimate, get_moves, move_to = self._operations()
+    src_hash = hash(self.src)
+    src_node = arena.add(src_hash, self.src, NO_PARENT, None, 0)
+    ids, g_costs, states = arena.ids, arena.g_costs, arena.states
+    h_costs = [estimate(self.src)] #* h(n) theo id node (tính 1 lần)
+    
+    goal_node, goal_g = (src_node, 0) if self.src.is_winner() else (None, float('inf'))
+    best_path = []
+    frontier = [(weight * h_costs[src_node], 0, src_hash, src_node)]
+    incons = set() #* Node được cải thiện sau khi đã đóng trong vòng hiện tại
+    stats.pushes += 1
+    expansions = 0
+    timed_out = False
+    
+    while True:
+      closed = set()
+      out_of_budget = False
+    
+      #* Một vòng Weighted A*: dừng khi đường tới đích không còn tệ hơn f nhỏ nhất của frontier
+      while frontier and goal_g > frontier[0][0]:
+        f_cost, g_cost, state_hash, node = heappop(frontier)
+        game = states[node]
+        if game is None or node in closed or g_cost > g_costs[node]:
+          stats.stale_pops += 1
+          continue
+        if game.is_game_over():
+          continue
+      
+        if max_expansions is not None and expansions >= max_expansions:
+          out_of_budget = True
+        elif (deadline is not None and expansions % DEADLINE_CHECK_INTERVAL == 0
+              and time.monotonic() >= deadline):
+          out_of_budget = timed_out = True
+        if out_of_budget:
+          heappush(frontier, (f_cost, g_cost, state_hash, node))
+          break
+        expansions += 1
+        stats.expanded += 1
+      
+        closed.add(node)
+        arena.close(node)
+        moves = get_moves(game)
+        stats.generated += len(moves)
+        for direction, new_pos in moves.items():
+          new_game = move_to(game, new_pos, direction)
+          if new_game.is_game_over():
+            continue
+          new_state_hash = hash(new_game)
+          new_g_cost = g_cost + 1
+        
+          new_node = ids.get(new_state_hash)
+          if new_node is None:
+            new_node = arena.add(new_state_hash, new_game, node, direction, new_g_cost)
+            h_costs.append(estimate(new_game))
+          elif new_g_cost < g_costs[new_node]:
+            arena.relax(new_node, new_game, node, direction, new_g_cost)
+          else:
+            continue
+        
+          if new_g_cost < goal_g and new_game.is_winner():
+            goal_node, goal_g = new_node, new_g_cost
+        
+          if new_node in closed:
+            incons.add(new_node)
+          else:
+            heappush(frontier, (new_g_cost + weight * h_costs[new_node], new_g_cost, new_state_hash, new_node))
+            stats.pushes += 1
+        
+        if len(frontier) > stats.open_peak:
+          stats.open_peak = len(frontier)
+        if hook is not None and expansions % hook_interval == 0:
+          hook(stats)
+    
+      #* Gom các node còn mở (frontier + incons) để tính cận và dựng frontier cho vòng sau
+      open_nodes = {node for _, g_cost, _, node in frontier
+                    if states[node] is not None and g_cost == g_costs[node]}
+      open_nodes |= incons
+      incons = set()
+    
+      if goal_node is not None:
+        best_path = arena.path_to(goal_node)
+        min_f = min((g_costs[node] + h_costs[node] for node in open_nodes), default=goal_g)
+        self.suboptimality = min(weight, goal_g / min_f) if min_f > 0 else 1.0
+    
+      if timed_out and goal_node is None:
+        raise BudgetExceeded(f"no path found before the deadline ({expansions} expansions)")
+      if out_of_budget or weight <= 1.0 or not open_nodes:
+        if goal_node is not None and not open_nodes:
+          self.suboptimality = 1.0
+        return best_path
+    
+      weight = max(1.0, weight - weight_step)
+      frontier = [(g_costs[node] + weight * h_costs[node], g_costs[node], hash(states[node]), node) for node in open_nodes]
+      heapify(frontier)
+  
+  def find_path_to(self, target: Pos, deadline: Optional[float] = None)-> list[str]:
+    #* Có deadline => dùng ARA* (trả về đường tốt nhất trước deadline), ngược lại dùng A* chuẩn
+    temp_finder = PathFinder(self.src.with_target(target), self.max_nodes, self.open_list, self.stats, self.heuristic)
+    path = temp_finder.find() if deadline is None else temp_finder.find_anytime(deadline)
+    self.nodes_created, self.arena_bytes = temp_finder.nodes_created, temp_finder.arena_bytes
+    self.process_peak_rss = temp_finder.process_peak_rss
+    self.suboptimality = temp_finder.suboptimality
+    return path
+  
+  #* Báo cáo cho lần tìm kiếm gần nhất tới target
+  def report(self, target: Pos, path: list[str]) -> SearchReport:
+    stats = self.stats
+    return (target, len(path), self.nodes_created, self.arena_bytes, self.process_peak_rss, self.suboptimality,
+            stats.expanded, stats.pushes, stats.stale_pops)
+  
+#* 1 chặng của planner nhiều chặng: A* tới goal, thêm SearchReport vào reports và thống kê chặng vào stats
+def search_stage(game, goal: Pos, max_nodes: int, deadline: Optional[float],
+                 reports: Optional[list], stats: Optional[SearchStats]) -> list[str]:
+  finder = PathFinder(game, max_nodes, stats=stats.stage(goal) if stats is not None else None)
+  path = finder.find_path_to(goal, deadline)
+  if reports is not None:
+    reports.append(finder.report(goal, path))
+  if stats is not None:
+    stats.add(finder.stats)
+  return path
+
+def find_multi_stage_path(game_src, max_nodes: int = MAX_NODES, reports: Optional[list] = None,
+                          deadline: Optional[float] = None,
+                          progress: Optional[Callable[[int, int], None]] = None,
+                          stats: Optional[SearchStats] = None,
+                          evaluator: Optional[ParallelStageEvaluator] = None):
+    #* reports: nếu truyền vào 1 list, mỗi lần A* sẽ thêm 1 SearchReport
+    #* deadline: mốc time.monotonic(); khi có, mỗi chặng dùng ARA* và trả về đường tốt nhất trước mốc này.
+    #* Mốc dùng chung cho mọi chặng: 1 chặng hết thời gian khi chưa có đường => ném BudgetExceeded
+    #* Trả về [] nếu 1 chặng không tìm được đường (không ghép đường dở dang => đường trả về luôn thắng)
+    #* progress(số chặng đã xong, tổng số chặng): gọi sau mỗi chặng (mỗi food + chặng tới exit)
+    #* stats: nếu truyền vào, cộng dồn thống kê và thêm 1 object con cho mỗi chặng (stats.stages)
+    #* evaluator: dựng song song bảng khoảng cách tới các food / bánh trước khi chọn đích của mỗi chặng
     full_path = []
+    bfs_start = DistanceOracle.bfs_calls
     game = game_src
-    
-    finder_util = PathFinder(game) 
+    total_stages = len(game_src.food_points) + 1
     
     while game.food_points:
         
-        #* 1. Chuẩn bị các tham số
-        current_walls = game.walls
-        current_portals = game.portals
+        #* 1. Chuẩn bị các tham số: oracle khoảng cách cho cấu hình tường hiện tại
+        oracle = oracle_for(game)
+        if evaluator is not None:
+            evaluator.prefetch(oracle, list(game.food_points) + list(game.magical_pies))
 
         min_cost = float('inf')
         target_pos = None
         
         #* 2. Tính toán chi phí BFS thực tế đến TẤT CẢ các mục tiêu
-        for food_target in game.food_points: #* Dùng food_target để tránh nhầm lẫn
+        #* Duyệt theo thứ tự hàng-cột cố định để khi bằng chi phí, lựa chọn không phụ thuộc thứ tự của set
+        for food_target in sorted(game.food_points, key=lambda pos: (pos[1], pos[0])): #* Dùng food_target để tránh nhầm lẫn
             #* Chi phí Tới FOOD trực tiếp
-            cost_direct_to_food = finder_util._shortest_path_cost(
-                game.player, food_target,
-                current_walls, current_portals,game.powerup_turns,
-                game.w, game.h
-            )
+            cost_direct_to_food = oracle.distance(game.player, food_target, game.powerup_turns)
             
             best_cost_for_this_food = cost_direct_to_food
             best_first_step = food_target #* Mặc định là đi thẳng tới Food
             
             #* Lặp qua tất cả Magic Pies để tìm đường tối ưu hơn
             for magic in game.magical_pies:
-                cost_magic = finder_util._shortest_path_cost(
-                    game.player, magic,
-                    current_walls, current_portals, game.powerup_turns,
-                    game.w, game.h
-                )
-                cost_food_after_eat_magic = finder_util._shortest_path_cost(
-                    magic, food_target,
-                    current_walls, current_portals, 5, #* Powerup = 5 khi đi từ magic
-                    game.w, game.h
-                )
+                cost_magic = oracle.distance(game.player, magic, game.powerup_turns)
+                cost_food_after_eat_magic = oracle.distance(magic, food_target, 5) #* Powerup = 5 khi đi từ magic
                 cost_via_magic = cost_magic + cost_food_after_eat_magic
                 
                 #* So sánh: (P -> F) vs (P -> M -> F)
@@ -192,30 +390,29 @@ def find_multi_stage_path(game_src):
                 target_pos = best_first_step 
         if target_pos is None or min_cost == float('inf'):
             print("Unable to find path to any target.")
-            break
+            return []
             
         #* 3. Tìm đường đi A* chính xác đến mục tiêu gần nhất đã chọn (Dùng find_path_to)
-        finder_a_star = PathFinder(game)
-        sub_path = finder_a_star.find_path_to(target_pos)
+        sub_path = search_stage(game, target_pos, max_nodes, deadline, reports, stats)
         
         if not sub_path:
             print(f"Error A*: Detailed route not found{target_pos}!")
-            break
+            return []
           
         #* 4. Thực hiện di chuyển từng bước
         for step in sub_path:
             next_pos = game.get_moves()[step]
             game = game.move_to(next_pos, step)
             full_path.append(step)
-            
+        if progress is not None:
+            progress(total_stages - len(game.food_points) - 1, total_stages)
             
     #* 5. khi hết food, tìm đường đến exit
     #* 5.1. Tính chi phí đi thẳng đến Exit
-    cost_direct_to_exit = finder_util._shortest_path_cost(
-        game.player, game.exit_pos,
-        game.walls, game.portals, game.powerup_turns,
-        game.w, game.h
-    )
+    oracle = oracle_for(game)
+    if evaluator is not None:
+        evaluator.prefetch(oracle, [game.exit_pos] + list(game.magical_pies))
+    cost_direct_to_exit = oracle.distance(game.player, game.exit_pos, game.powerup_turns)
     
     min_cost = cost_direct_to_exit
     final_target = game.exit_pos
@@ -223,17 +420,9 @@ def find_multi_stage_path(game_src):
     #* 5.2. Xem xét việc ăn Magic Pie (nếu còn)
     for magic in game.magical_pies:
         #* P -> M
-        cost_p_to_m = finder_util._shortest_path_cost(
-            game.player, magic,
-            game.walls, game.portals, game.powerup_turns,
-            game.w, game.h
-        )
+        cost_p_to_m = oracle.distance(game.player, magic, game.powerup_turns)
         #* M -> E
-        cost_m_to_e = finder_util._shortest_path_cost(
-            magic, game.exit_pos,
-            game.walls, game.portals, 5, 
-            game.w, game.h
-        )
+        cost_m_to_e = oracle.distance(magic, game.exit_pos, 5)
         cost_via_magic = cost_p_to_m + cost_m_to_e
         
         #* So sánh: (P -> E) vs (P -> M -> E)
@@ -244,13 +433,14 @@ def find_multi_stage_path(game_src):
     #* 5.3. Tìm đường đi A* đến mục tiêu cuối cùng đã chọn
     if final_target == game.exit_pos:
         #* Đi thẳng đến Exit
-        finder = PathFinder(game)
-        exit_path = finder.find_path_to(game.exit_pos)
+        exit_path = search_stage(game, game.exit_pos, max_nodes, deadline, reports, stats)
         full_path.extend(exit_path)
     else:
         #* Cần ăn Magic Pie trước
-        finder_to_magic = PathFinder(game)
-        path_to_magic = finder_to_magic.find_path_to(final_target)
+        path_to_magic = search_stage(game, final_target, max_nodes, deadline, reports, stats)
+        if not path_to_magic:
+            print(f"Error A*: Detailed route not found{final_target}!")
+            return []
         #* Thực hiện di chuyển đến Magic
         for step in path_to_magic:
             next_pos = game.get_moves()[step]
@@ -258,23 +448,29 @@ def find_multi_stage_path(game_src):
             full_path.append(step)
 
         #* Sau khi ăn Magic, tìm đường đến Exit
-        finder_to_exit = PathFinder(game)
-        exit_path = finder_to_exit.find_path_to(game.exit_pos)
+        exit_path = search_stage(game, game.exit_pos, max_nodes, deadline, reports, stats)
         full_path.extend(exit_path)
+    if not exit_path and game.player != game.exit_pos:
+        print(f"Error A*: Detailed route not found{game.exit_pos}!")
+        return []
     
+    if progress is not None:
+        progress(total_stages, total_stages)
+    if stats is not None:
+        stats.bfs_calls += DistanceOracle.bfs_calls - bfs_start
     return full_path
 
 def compress_path(path: list[str]) -> str:
-  #* Nén chuỗi hành động: ['NORTH', 'NORTH',...] -> 'NORTH1 EAST1'
+  #* Nén chuỗi hành động: ['NORTH', 'NORTH', 'EAST_TELE_P3'] -> 'NORTH-2, EAST_TELE_P3-1'
+  #* (bước tele cũng đếm số lần lặp => 2 lần tele liên tiếp giống nhau không bị gộp mất)
   if not path:
     return ""
-  
-  compressed = []
-  for key, group in groupby(path):
-    count = len(list(group))
-    if "TELE_P" in key:
-      compressed.append(key)
-    else:
-      compressed.append(f"{key}-{count}")
-      
-  return ", ".join(compressed)
+  return ", ".join(f"{key}-{len(list(group))}" for key, group in groupby(path))
+
+def decompress_path(compressed: str) -> list[str]:
+  #* Ngược lại của compress_path: 'NORTH-2, EAST_TELE_P3-1' -> ['NORTH', 'NORTH', 'EAST_TELE_P3']
+  path = []
+  for token in compressed.split(", ") if compressed else []:
+    direction, count = token.rsplit("-", 1)
+    path.extend([direction] * int(count))
+  return path
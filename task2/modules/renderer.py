@@ -1,15 +1,23 @@
 import pygame
+from collections import OrderedDict
 from .game import Game
 from typing import List
 #* Import các hằng số cấu hình cần thiết từ config
-from .config import KEY_TO_DIRECTION, TILE_SIZE, FPS, ANIMATION_SPEED, STEP_DELAY
+from .config import KEY_TO_DIRECTION, TILE_SIZE, FPS, ANIMATION_SPEED, AUTO_PATH_TIME_BUDGET
+from .config import STEPS_PER_SECOND, MAX_STEPS_PER_FRAME, IDLE_FPS
+from .config import VIEW_MODE, VIEWPORT_MIN_TILE, VIEWPORT_TILE_SIZE, CHUNK_TILES, CHUNK_CACHE_SIZE
 from .sprites import SpriteManager
 from .sounds import SoundManager
-from .hud import draw_hud, draw_image_message 
-from .pathfinding import find_multi_stage_path 
+from .hud import HUD_BAR_HEIGHT, Hud
+from .pathfinding import BudgetExceeded, compress_path, decompress_path
+from .solution_cache import SolutionCache
+from .tour import simulate_path
+from .replan import IncrementalPlanner
+from .background import BackgroundPlanner, PlanningCancelled
 
 class Renderer:
-    def __init__(self, src: Game, initial_map_str: str, title: str, w: int, h: int, tile_size: int = TILE_SIZE, fps: int = FPS):
+    def __init__(self, src: Game, initial_map_str: str, title: str, w: int, h: int, tile_size: int = TILE_SIZE, fps: int = FPS,
+                 view_mode: str = VIEW_MODE, steps_per_second: float = STEPS_PER_SECOND):
         #* Khởi tạo Pygame 
         pygame.init()
         pygame.font.init()
@@ -22,22 +30,35 @@ class Renderer:
         
         self.fps = fps 
         self.w, self.h = w, h
-        self.tile_size = tile_size
+        self.tile_size = tile_size #* Kích thước ô khi vẽ (pixel màn hình), tính lại trong _setup_surface
+        self.view_mode = view_mode #* "fit" / "camera" / "auto" (xem VIEW_MODES)
+        self.use_camera = False #* True => surface map chỉ là viewport quanh player
         
-        self.screen = pygame.display.set_mode((w, h))
+        self.screen = pygame.display.set_mode((w, h), pygame.RESIZABLE)
         self.clock = pygame.time.Clock()
         
         self.sprite_manager = SpriteManager(self.tile_size) #* Quản lý hoạt ảnh
         self.sound_manager = SoundManager() #* Quản lý âm thanh 
+        self.hud = Hud() #* Thanh HUD và ảnh trạng thái (font / chữ / ảnh scale được cache)
         
-        self.game_w, self.game_h = src.w, src.h #* Kích thước map thực tế (theo ô)
+        self.orientation = src.orientation #* Hướng xoay hiện tại của map (0-3)
+        self._static_layers = {} #* Cache lớp tĩnh (nền + tường) đã vẽ sẵn theo từng hướng xoay
+        self._layer_walls = None #* Tập tường ứng với cache lớp tĩnh
+        self._chunks = OrderedDict() #* Chế độ camera: (hướng xoay, cx, cy) -> chunk lớp tĩnh đã vẽ sẵn (LRU)
+        self._chunk_walls = {} #* Chế độ camera: hướng xoay -> {(cx, cy): các ô tường (khung hiển thị) trong chunk}
+        self._camera = (0, 0) #* Góc trên trái của viewport (pixel trên map đầy đủ)
+        self._drawn_sprites = {} #* key -> rect của các thực thể đã vẽ trên surface map ở frame trước
+        self._redraw_map = True #* Vẽ lại toàn bộ surface map (surface mới, xoay map, ăn tường)
+        self._redraw_screen = True #* Vẽ lại toàn màn hình thay vì chỉ các vùng thay đổi
+        self._map_rect = None #* Vị trí surface map trên màn hình
         self.is_running = True
         self.is_paused = True #! Trạng thái tạm dừng.
         self.current_state = "start" #* Trạng thái hiển thị (start, running, paused, game_over, win)
         self.player_direction_name = "EAST" #* Hướng hiện tại của người chơi dùng xoay hoạt ảnh
         
-        self.STEP_DELAY = STEP_DELAY #* Số frame chờ giữa các bước đi 
-        self.step_delay_counter = 0 #* Kiểm soát tốc độ di chuyển tự động
+        self.step_interval = 1 / steps_per_second #* Thời gian (giây) của 1 bước mô phỏng ở chế độ tự động
+        self.step_accumulator = 0.0 #* Thời gian đã tích lũy chưa dùng cho bước nào (fixed timestep)
+        self._previous_state = None #* State trước bước vừa thực hiện (nội suy vị trí sprite)
         self.reset_requested = False #* Báo hiệu yêu cầu reset game
         
         #* --- CHẾ ĐỘ CHƠI THỦ CÔNG & TELEPORT ---
@@ -47,33 +68,126 @@ class Renderer:
         self.tele_entry_direction = None #* Hướng đi vào cổng (VD: NORTH, EAST) - Dùng để tạo lệnh Teleport đích
         self.path = [] #* Đường đi A* (danh sách các hướng di chuyển)
         self.current_path_index = 0 #* Index hiện tại trong đường đi A*
+        self.solution_cache = SolutionCache() #* Cache lời giải trên đĩa (dùng lại khi reset / quay lại chế độ tự động)
+        self.planner = IncrementalPlanner() #* Giữ kế hoạch giữa các lần tính lại đường đi
+        self.background = BackgroundPlanner() #* Tính đường đi ở tiến trình nền để vòng lặp game không bị chặn
+        self.planning = None #* Handle của job đang tính (None nếu không có)
+        self._planning_src = None #* State bắt đầu của job đang tính
+        self._planning_key = None #* Key cache lời giải của job đang tính
         
         self._setup_surface()
         
     def _setup_surface(self):
-        #* Thiết lập surface để vẽ bản đồ game. Surface này sẽ được scale và blit lên screen chính.
-        surface_w = self.src.w * self.tile_size
-        surface_h = self.src.h * self.tile_size
-        self.surface = pygame.Surface((surface_w, surface_h)) #! Surface chứa bản đồ game
+        #* Thiết lập surface để vẽ bản đồ game, ở đúng độ phân giải màn hình (blit thẳng, không scale mỗi frame).
+        #* Kích thước ô = lớn nhất để map vừa màn hình (trừ 70px cho HUD); sprite và lớp tĩnh được scale sẵn
+        #* theo kích thước này => chỉ gọi lại khi đổi kích thước cửa sổ, xoay map hoặc reset.
+        #* Map quá lớn (ô < VIEWPORT_MIN_TILE) hoặc view_mode "camera": ô cố định VIEWPORT_TILE_SIZE,
+        #* surface chỉ bằng vùng màn hình dưới HUD và đi theo player (xem _update_camera)
+        view_w, view_h = self.src.view_size
+        tile_size = max(1, min(self.w // view_w, (self.h - 70) // view_h)) #! Trừ 70px cho HUD
+        self.use_camera = self.view_mode == "camera" or (self.view_mode == "auto" and tile_size < VIEWPORT_MIN_TILE)
+        if self.use_camera:
+            tile_size = VIEWPORT_TILE_SIZE
+        if tile_size != self.sprite_manager.tile_size:
+            self.sprite_manager.set_tile_size(tile_size)
+            self._static_layers = {}
+            self._chunks.clear()
+        self.tile_size = tile_size
+        surface_w = view_w * self.tile_size
+        surface_h = view_h * self.tile_size
+        if self.use_camera:
+            surface_w, surface_h = min(surface_w, self.w), min(surface_h, self.h - 70)
+        self.surface = pygame.Surface((surface_w, surface_h)) #! Surface chứa bản đồ game (hoặc viewport)
+        self._camera = (0, 0)
+        #* Căn giữa (có tính đến phần HUD): bắt đầu vẽ từ 70px (dưới HUD)
+        self._map_rect = self.surface.get_rect(topleft=((self.w - surface_w) // 2, 70 + (self.h - 70 - surface_h) // 2))
+        self._drawn_sprites = {}
+        self._redraw_map = self._redraw_screen = True
         
     def _calculate_auto_path(self):
         #* Tính toán đường đi A* và cập nhật self.path.
         print("Calculate the path A*")
+        self._cancel_planning()
+        #* State đã từng được giải => lấy lại từ cache (ưu tiên lời giải không giới hạn thời gian)
+        cache_key = SolutionCache.key(self.initial_map_str, self.src, "greedy", AUTO_PATH_TIME_BUDGET)
+        cached = (self.solution_cache.get(SolutionCache.key(self.initial_map_str, self.src, "greedy"))
+                  or self.solution_cache.get(cache_key))
+        if cached is not None:
+            self.path = decompress_path(cached["path"])
+            self.planner.adopt(self.src, self.path)
+            print(f"Loaded A* path from cache: {len(self.path)} step.")
+            return
+        #* Chưa đi lệch khỏi kế hoạch cũ => dùng lại phần còn lại
+        reused_path = self.planner.reuse(self.src)
+        if reused_path is not None:
+            self.path = reused_path
+            print(f"Reused A* path: {len(self.path)} step.")
+            return
+        #* Đã lệch => sửa kế hoạch cũ (chỉ A* lại chặng hiện tại, có trần node => không chặn vòng lặp lâu)
+        repaired_path = self.planner.repair(self.src)
+        if repaired_path is not None:
+            self.path = repaired_path
+            print(f"Repaired A* path: {len(self.path)} step.")
+            return
+        #* Còn lại: tính ở tiến trình nền (giới hạn thời gian), kết quả được nhận trong _poll_planning
+        self.path = []
+        self.planning = self.background.submit(self.src, AUTO_PATH_TIME_BUDGET)
+        self._planning_src, self._planning_key = self.src, cache_key
+    
+    def _cancel_planning(self):
+        #* Hủy job đang tính (khi reset / đổi mode), kết quả của nó sẽ bị bỏ qua
+        if self.planning is not None:
+            self.background.cancel(self.planning)
+            self.planning = None
+    
+    def _poll_planning(self):
+        #* Gọi mỗi frame: cập nhật tiến độ và nhận đường đi khi job nền hoàn tất (không chặn)
+        if self.planning is None:
+            return
+        self.background.poll()
+        if not self.planning.done():
+            return
+        handle, self.planning = self.planning, None
         try:
-            #* Gọi hàm tìm đường đi đa giai đoạn từ  pathfinding
-            self.path = find_multi_stage_path(self.src) 
-            print(f"Calculated A* path: {len(self.path)} step.")
+            self.path = handle.result()
+        except PlanningCancelled:
+            return
+        except BudgetExceeded:
+            #* Hết ngân sách khi chưa có đường => giải lại không giới hạn thời gian ở tiến trình nền (không chặn vòng lặp)
+            print(f"A* found no path within {AUTO_PATH_TIME_BUDGET}s. Planning again without a time budget.")
+            self.planning = self.background.submit(self._planning_src)
+            self._planning_key = SolutionCache.key(self.initial_map_str, self._planning_src, "greedy")
+            return
         except Exception as e:
-            #* Xử lý lỗi nếu không tìm được đường đi (ví dụ: đích bị chặn)
             print(f"Error in calculating path A*: {e}")
             self.path = []
+        self.current_path_index = 0
+        if not self.path:
+            #* Không có đường thắng (ví dụ: đích bị chặn) => vòng lặp tự dừng, người chơi chuyển sang thủ công
+            print("A* found no winning path from this state. Press [M] to continue in manual mode.")
+            return
+        print(f"Calculated A* path: {len(self.path)} step.")
+        self.planner.adopt(self._planning_src, self.path)
+        if simulate_path(self._planning_src, self.path):
+            self.solution_cache.put(self._planning_key, compress_path(self.path),
+                                    {"steps": len(self.path), "suboptimality": handle.suboptimality})
 
-    def handle_input(self):
-        #* Xử lý tất cả các sự kiện đầu vào.
-        for event in pygame.event.get():
+    def handle_input(self, first_event=None):
+        #* Xử lý tất cả các sự kiện đầu vào. first_event: sự kiện đã lấy ra bằng pygame.event.wait (xử lý trước,
+        #* đúng thứ tự với các sự kiện còn trong hàng đợi)
+        events = pygame.event.get()
+        if first_event is not None and first_event.type != pygame.NOEVENT:
+            events.insert(0, first_event)
+        for event in events:
             if event.type == pygame.QUIT:
                 self.is_running = False
             
+            #* Đổi kích thước cửa sổ => tính lại kích thước ô và scale lại sprite (1 lần)
+            if event.type == pygame.VIDEORESIZE:
+                self.w, self.h = event.w, event.h
+                self.screen = pygame.display.set_mode((self.w, self.h), pygame.RESIZABLE)
+                self._setup_surface()
+            
             if event.type == pygame.KEYDOWN:
                 if event.key == pygame.K_q:
                     self.is_running = False
@@ -115,12 +229,15 @@ class Renderer:
 
     def _reset_game(self):
         #* Thiết lập lại game về trạng thái ban đầu.
+        self._cancel_planning()
         #* Tải lại game object từ chuỗi map ban đầu
         self.src = Game.load_map(self.initial_map_str)
-        self.game_w, self.game_h = self.src.w, self.src.h 
+        self.orientation = self.src.orientation
+        self._setup_surface()
         self.is_paused = True
         self.current_state = "start"
-        self.step_delay_counter = 0
+        self.step_accumulator = 0.0
+        self._previous_state = None
         self.reset_requested = True
         self.manual_move_requested = None
         self.is_teleport_mode = False
@@ -144,6 +261,7 @@ class Renderer:
         #* Chuyển đổi giữa chế độ thủ công và tự động (A*).
         if self.current_state not in ["game_over", "win"] and not self.is_teleport_mode:
             self.is_manual_mode = not self.is_manual_mode
+            self._cancel_planning()
             self.is_paused = True #* Tạm dừng khi chuyển mode để người chơi chuẩn bị
             self.current_state = "paused"
             
@@ -157,85 +275,230 @@ class Renderer:
                 #* Gọi hàm hỗ trợ để tính toán lại đường đi cho chế độ Tự động
                 self._calculate_auto_path() 
 
-    def _draw_entities(self, game: Game):
-        #* Vẽ các thực thể (map, player, food, ghost, exit) lên surface.
-        #* Vẽ các vật phẩm/cổng/tường - Vẽ theo tọa độ ô (x, y)
-        for y in range(game.h):
-            for x in range(game.w):
-                pos = (x, y)
-                blit_x, blit_y = x * self.tile_size, y * self.tile_size
-                
-                #* Vẽ tường (wall)
-                if pos in game.walls:
-                    self.surface.blit(self.sprite_manager.get_current_frame("wall"), (blit_x, blit_y))
-                #* Vẽ cổng (portal)
-                elif pos in game.portals:
-                    self.surface.blit(self.sprite_manager.get_current_frame("portal"), (blit_x, blit_y))
-                    
-                #* Vẽ thức ăn và bánh ma thuật (thức ăn được căn giữa ô bằng offset)
-                if pos in game.food_points:
-                    food_frame = self.sprite_manager.get_current_frame("food")
-                    self.surface.blit(food_frame, (blit_x + self.sprite_manager.FOOD_OFFSET, blit_y + self.sprite_manager.FOOD_OFFSET))
-                elif pos in game.magical_pies:
-                    magic_frame = self.sprite_manager.get_current_frame("magical_pie")
-                    self.surface.blit(magic_frame, (blit_x , blit_y ))
+    def _check_static_cache(self, game: Game):
+        #* Lớp tĩnh (cả map hoặc các chunk) chỉ vẽ lại khi tập tường thay đổi (ăn tường hoặc reset)
+        if game.walls is not self._layer_walls:
+            self._layer_walls = game.walls
+            self._static_layers = {}
+            self._chunks.clear()
+            self._chunk_walls = {}
+            self._redraw_map = True
+
+    def _get_static_layer(self, game: Game) -> pygame.Surface:
+        #* Lớp tĩnh (nền + tường) được vẽ 1 lần cho mỗi hướng xoay rồi cache lại.
+        layer = self._static_layers.get(game.orientation)
+        if layer is None:
+            view_w, view_h = game.view_size
+            layer = pygame.Surface((view_w * self.tile_size, view_h * self.tile_size))
+            layer.fill(pygame.Color("#010647"))
+            wall_frame = self.sprite_manager.get_current_frame("wall")
+            for pos in game.walls:
+                x, y = game.to_view(pos)
+                layer.blit(wall_frame, (x * self.tile_size, y * self.tile_size))
+            self._static_layers[game.orientation] = layer
+        return layer
+
+    def _get_chunk(self, game: Game, cx: int, cy: int) -> pygame.Surface:
+        #* Chunk CHUNK_TILES x CHUNK_TILES ô của lớp tĩnh (chế độ camera), vẽ khi cần và giữ trong LRU
+        #* => bộ nhớ lớp tĩnh bị chặn bởi CHUNK_CACHE_SIZE thay vì tăng theo diện tích map
+        key = (game.orientation, cx, cy)
+        chunk = self._chunks.get(key)
+        if chunk is not None:
+            self._chunks.move_to_end(key)
+            return chunk
+        
+        #* Chia các ô tường theo chunk 1 lần cho mỗi hướng xoay
+        chunk_walls = self._chunk_walls.get(game.orientation)
+        if chunk_walls is None:
+            chunk_walls = self._chunk_walls[game.orientation] = {}
+            for pos in game.walls:
+                x, y = game.to_view(pos)
+                chunk_walls.setdefault((x // CHUNK_TILES, y // CHUNK_TILES), []).append((x, y))
         
-        #* Vẽ Lối ra
+        chunk_px = CHUNK_TILES * self.tile_size
+        chunk = pygame.Surface((chunk_px, chunk_px))
+        chunk.fill(pygame.Color("#010647"))
+        wall_frame = self.sprite_manager.get_current_frame("wall")
+        for x, y in chunk_walls.get((cx, cy), ()):
+            chunk.blit(wall_frame, ((x - cx * CHUNK_TILES) * self.tile_size, (y - cy * CHUNK_TILES) * self.tile_size))
+        self._chunks[key] = chunk
+        if len(self._chunks) > CHUNK_CACHE_SIZE:
+            self._chunks.popitem(last=False)
+        return chunk
+
+    def _blit_static(self, game: Game, area: pygame.Rect):
+        #* Khôi phục lớp tĩnh trong 1 vùng của surface map (chế độ camera: ghép từ các chunk chạm vùng đó)
+        area = area.clip(self.surface.get_rect())
+        if not self.use_camera:
+            self.surface.blit(self._get_static_layer(game), area, area)
+            return
+        #* Viewport không lớn hơn map và camera không vượt biên => vùng luôn nằm trong map
+        chunk_px = CHUNK_TILES * self.tile_size
+        map_area = area.move(self._camera)
+        for cy in range(map_area.top // chunk_px, (map_area.bottom - 1) // chunk_px + 1):
+            for cx in range(map_area.left // chunk_px, (map_area.right - 1) // chunk_px + 1):
+                chunk_rect = pygame.Rect(cx * chunk_px, cy * chunk_px, chunk_px, chunk_px)
+                part = chunk_rect.clip(map_area)
+                self.surface.blit(self._get_chunk(game, cx, cy), part.move(-self._camera[0], -self._camera[1]),
+                                  part.move(-chunk_rect.x, -chunk_rect.y))
+
+    def _player_shift(self, game: Game, alpha: float) -> tuple:
+        #* Độ lệch nội suy của player (dùng chung cho sprite và camera)
+        previous_player = self._previous_state.player if alpha < 1.0 else None
+        return self._motion_offset(game, previous_player, game.player, alpha)
+
+    def _update_camera(self, game: Game, alpha: float = 1.0):
+        #* Chế độ camera: đặt player (vị trí đã nội suy) ở giữa viewport, không vượt biên map.
+        #* Camera đổi => vẽ lại cả viewport (chi phí theo kích thước màn hình, không theo diện tích map)
+        if not self.use_camera or not game.player:
+            return
+        view_w, view_h = game.view_size
+        surface_w, surface_h = self.surface.get_size()
+        player_x, player_y = game.to_view(game.player)
+        shift_x, shift_y = self._player_shift(game, alpha)
+        center_x = player_x * self.tile_size + shift_x + self.tile_size // 2
+        center_y = player_y * self.tile_size + shift_y + self.tile_size // 2
+        camera = (min(max(center_x - surface_w // 2, 0), view_w * self.tile_size - surface_w),
+                  min(max(center_y - surface_h // 2, 0), view_h * self.tile_size - surface_h))
+        if camera != self._camera:
+            self._camera = camera
+            self._redraw_map = True
+
+    def _step_alpha(self, game: Game) -> float:
+        #* Phần đã trôi của bước mô phỏng hiện tại (0-1) => vị trí sprite được nội suy giữa state trước và sau bước.
+        #* Chỉ khi đang tự chạy theo đường A*; thủ công / tạm dừng / vừa xoay map => vẽ đúng vị trí hiện tại
+        previous = self._previous_state
+        if (self.is_manual_mode or self.is_paused or self.planning is not None or previous is None
+                or previous.orientation != game.orientation):
+            return 1.0
+        return min(self.step_accumulator / self.step_interval, 1.0)
+
+    def _motion_offset(self, game: Game, previous_pos, pos, alpha: float) -> tuple:
+        #* Độ lệch (pixel) từ ô hiện tại lùi về ô trước bước; tele / đứng yên => không nội suy
+        if alpha >= 1.0 or previous_pos is None:
+            return (0, 0)
+        (prev_x, prev_y), (x, y) = game.to_view(previous_pos), game.to_view(pos)
+        if abs(prev_x - x) + abs(prev_y - y) != 1:
+            return (0, 0)
+        return (round((prev_x - x) * (1 - alpha) * self.tile_size), round((prev_y - y) * (1 - alpha) * self.tile_size))
+
+    def _collect_sprites(self, game: Game, alpha: float = 1.0) -> list:
+        #* Danh sách (key, frame, rect) của các thực thể động (cổng, food, bánh, exit, ghost, player) theo thứ tự vẽ.
+        #* key mô tả đủ những gì được vẽ (tên, frame hoạt ảnh, ô...) => so key giữa 2 frame để tìm vùng cần vẽ lại
+        #* Tọa độ trong Game nằm ở khung gốc => đổi sang khung đang hiển thị bằng game.to_view khi vẽ
+        sprites = []
+        frame_index = self.sprite_manager.current_frame_index
+        
+        camera_x, camera_y = self._camera
+        surface_rect = self.surface.get_rect()
+        
+        def add(name, frame, pos, offset=0, variant=None, shift=(0, 0)):
+            x, y = game.to_view(pos)
+            rect = pygame.Rect(x * self.tile_size + offset + shift[0] - camera_x, y * self.tile_size + offset + shift[1] - camera_y,
+                               *frame.get_size())
+            #* Bỏ qua thực thể nằm ngoài viewport
+            if rect.colliderect(surface_rect):
+                sprites.append(((name, frame_index, variant, rect.topleft), frame, rect))
+        
+        #* Cổng (portal) - không vẽ đè lên tường
+        portal_frame = self.sprite_manager.get_current_frame("portal")
+        for pos in game.portals:
+            if pos not in game.walls:
+                add("portal", portal_frame, pos)
+        
+        #* Thức ăn và bánh ma thuật (thức ăn được căn giữa ô bằng offset)
+        food_frame = self.sprite_manager.get_current_frame("food")
+        for pos in game.food_points:
+            add("food", food_frame, pos, self.sprite_manager.FOOD_OFFSET)
+        magic_frame = self.sprite_manager.get_current_frame("magical_pie")
+        for pos in game.magical_pies:
+            if pos not in game.food_points:
+                add("magical_pie", magic_frame, pos)
+        
+        #* Lối ra
         if game.exit_pos:
-            self.surface.blit(self.sprite_manager.get_current_frame("exit"), (game.exit_pos[0] * self.tile_size, game.exit_pos[1] * self.tile_size))
+            add("exit", self.sprite_manager.get_current_frame("exit"), game.exit_pos)
             
-        #* Vẽ Ghosts
-        for ghost_current_pos, ghost_prev_pos in game.ghost_states:
-            g_blit_x, g_blit_y = ghost_current_pos[0] * self.tile_size, ghost_current_pos[1] * self.tile_size
-            self.surface.blit(self.sprite_manager.get_current_frame("ghost"), (g_blit_x, g_blit_y))
+        #* Ghosts (nội suy theo vị trí của ghost cùng thứ tự ở state trước bước)
+        ghost_frame = self.sprite_manager.get_current_frame("ghost")
+        previous_ghosts = self._previous_state.ghost_states if alpha < 1.0 else ()
+        for i, (ghost_current_pos, ghost_direction) in enumerate(game.ghost_states):
+            previous_pos = previous_ghosts[i][0] if i < len(previous_ghosts) else None
+            add("ghost", ghost_frame, ghost_current_pos, shift=self._motion_offset(game, previous_pos, ghost_current_pos, alpha))
             
-        #* Vẽ Player 
+        #* Player 
         if game.player:
             is_powerup_active = game.powerup_turns > 0 #* Kiểm tra trạng thái Power-up
-            #* Lấy frame người chơi (có thể thay đổi nếu Power-up)
-            player_frame = self.sprite_manager.get_current_frame("player", is_powerup=is_powerup_active) 
-            #* Xoay sprite dựa trên hướng di chuyển cuối cùng
-            rotated_player = pygame.transform.rotate(player_frame, self.sprite_manager.get_rotation_angle(self.player_direction_name))
+            #* Frame người chơi đã xoay theo hướng di chuyển cuối cùng và phóng to nếu Power-up (dựng sẵn trong atlas)
+            player_frame = self.sprite_manager.get_current_frame("player", is_powerup_active, self.player_direction_name)
             new_size = player_frame.get_width() 
-            offset = (self.tile_size - new_size) // 2 
-            #* Tính toán vị trí vẽ (căn giữa)
-            p_blit_x, p_blit_y = game.player[0] * self.tile_size + offset, game.player[1] * self.tile_size + offset
-            self.surface.blit(rotated_player, (p_blit_x, p_blit_y))
+            offset = (self.tile_size - new_size) // 2 #* Căn giữa (âm khi Power-up => tràn sang ô bên cạnh)
+            add("player", player_frame, game.player, offset, (self.player_direction_name, is_powerup_active),
+                self._player_shift(game, alpha))
+        return sprites
 
-    def render(self, game: Game):
-        #* Vẽ toàn bộ khung hình, bao gồm map, HUD và thông báo trạng thái.
-        self.screen.fill(pygame.Color("#01052B"))
-        self.surface.fill(pygame.Color("#010647"))
-        
-        self.sprite_manager.update_animation(ANIMATION_SPEED) #* Cập nhật frame hoạt ảnh cho các sprite
+    def _draw_entities(self, game: Game) -> list:
+        #* Vẽ map và thực thể lên self.surface, trả về các vùng (rect trên surface) đã thay đổi.
+        #* Chỉ các vùng có thực thể xuất hiện / biến mất / đổi frame được vẽ lại (khôi phục lớp tĩnh rồi vẽ
+        #* các thực thể chạm vùng đó) => chi phí mỗi frame theo số thực thể, không theo diện tích map.
+        self._check_static_cache(game)
+        alpha = self._step_alpha(game)
+        self._update_camera(game, alpha)
+        sprites = self._collect_sprites(game, alpha)
+        drawn = {key: rect for key, _, rect in sprites}
         
-        self._draw_entities(game) #* Vẽ bản đồ và thực thể lên self.surface
-        
-        #* HIỂN THỊ MAP (SCALE VÀ CĂN GIỮA)
-        rotated_surface = self.surface
-        surface_w_orig, surface_h_orig = rotated_surface.get_size()
-        #* Tính toán tỷ lệ scale để map vừa với màn hình (trừ phần HUD)
-        scale_factor = min(self.w / surface_w_orig, (self.h - 70) / surface_h_orig) #! Trừ 70px cho HUD
-        scaled_surface_w = int(surface_w_orig * scale_factor)
-        scaled_surface_h = int(surface_h_orig * scale_factor)
-        scaled_surface = pygame.transform.smoothscale(rotated_surface, (scaled_surface_w, scaled_surface_h))
+        if self._redraw_map:
+            self._blit_static(game, self.surface.get_rect())
+            for _, frame, rect in sprites:
+                self.surface.blit(frame, rect)
+            self._redraw_map = False
+            dirty = [self.surface.get_rect()]
+        else:
+            dirty = [rect for key, rect in self._drawn_sprites.items() if key not in drawn]
+            dirty += [rect for key, rect in drawn.items() if key not in self._drawn_sprites]
+            for area in dirty:
+                self.surface.set_clip(area)
+                self._blit_static(game, area)
+                for _, frame, rect in sprites:
+                    if rect.colliderect(area):
+                        self.surface.blit(frame, rect)
+            self.surface.set_clip(None)
+        self._drawn_sprites = drawn
+        return dirty
+
+    def render(self, game: Game, dt: float = 1 / FPS):
+        #* Vẽ khung hình: map, HUD và thông báo trạng thái. dt: thời gian (giây) từ frame trước
+        #* Có ảnh thông báo / menu chọn cổng (đè lên map) => vẽ lại toàn màn hình; ngược lại chỉ cập nhật
+        #* vùng map đã thay đổi + thanh HUD bằng pygame.display.update(rects)
+        self.sprite_manager.update_animation(ANIMATION_SPEED / FPS, dt) #* Cập nhật frame hoạt ảnh cho các sprite
         
-        #* Tính toán vị trí căn giữa (có tính đến phần HUD)
-        blit_x = (self.w - scaled_surface_w) // 2
-        blit_y =70 + (self.h - 70 - scaled_surface_h) // 2 #* Bắt đầu vẽ từ 70px (dưới HUD)
+        dirty = self._draw_entities(game) #* Vẽ bản đồ và thực thể lên self.surface
         
-        self.screen.blit(scaled_surface, (blit_x, blit_y))
+        has_overlay = self.is_teleport_mode or self.current_state in self.sprite_manager.state_images
+        full_frame = self._redraw_screen or has_overlay
+        if full_frame:
+            self.screen.fill(pygame.Color("#01052B"))
+            self.screen.blit(self.surface, self._map_rect)
+            update_rects = None
+        else:
+            #* Surface map cùng độ phân giải màn hình => chép thẳng từng vùng (không scale)
+            update_rects = [self.screen.blit(self.surface, area.move(self._map_rect.topleft), area) for area in dirty]
+            update_rects.append(pygame.Rect(0, 0, self.w, HUD_BAR_HEIGHT))
+        #* Frame sau khi tắt thông báo phải vẽ lại toàn bộ để xóa ảnh thông báo
+        self._redraw_screen = has_overlay
         
         #* VẼ HUD & TRẠNG THÁI
         #* Hiển thị điểm, turn powerup, mode chơi, FPS
-        draw_hud(self.screen, game, self.player_direction_name, self.is_manual_mode, self.clock.get_fps())
+        planning_progress = self.planning.progress if self.planning is not None else None
+        self.hud.draw(self.screen, game, self.player_direction_name, self.is_manual_mode, self.clock.get_fps(), planning_progress)
         
         #* Hiển thị thông báo chọn cổng nếu đang trong chế độ Teleport
         if self.is_teleport_mode:
+            view_w, view_h = game.view_size
             position = {(1,1): "TOP-LEFT",
-                        (game.w-2,1): "TOP-RIGHT",
-                        (game.w-2,game.h-2): "BOTTON-RIGHT",
-                        (1,game.h-2): "BOTTON-LEFT"}
+                        (view_w-2,1): "TOP-RIGHT",
+                        (view_w-2,view_h-2): "BOTTON-RIGHT",
+                        (1,view_h-2): "BOTTON-LEFT"}
             
             TEXT_COLOR = pygame.Color("#FF8800")
             SHADOW_COLOR = pygame.Color("#FFFFFF") 
@@ -244,31 +507,42 @@ class Renderer:
             spacing = 80 
             for i, pos in enumerate(game.portals):
                 current_y = y_start + i * spacing
-                font = pygame.font.Font(None, 60)
-                shadow_text = font.render(f"GATE: {i+1} {position[pos]}", True, SHADOW_COLOR)
+                shadow_text = self.hud.text(60, f"GATE: {i+1} {position[game.to_view(pos)]}", SHADOW_COLOR)
                 shadow_rect = shadow_text.get_rect(center=(self.w // 2, current_y)) 
                 shadow_rect.x += SHADOW_OFFSET
                 shadow_rect.y += SHADOW_OFFSET
                 self.screen.blit(shadow_text, shadow_rect)
-                text = font.render(f"GATE: {i+1} {position[pos]}", True, TEXT_COLOR)
+                text = self.hud.text(60, f"GATE: {i+1} {position[game.to_view(pos)]}", TEXT_COLOR)
                 text_rect = text.get_rect(center=(self.w // 2, current_y)) 
                 self.screen.blit(text, text_rect)
         else:
             #* Chỉ hiển thị thông báo trạng thái game (Start/Paused/Win/Over) khi không chọn cổng
-            draw_image_message(self.screen, self.current_state, (self.w, self.h), self.sprite_manager.state_images)
+            self.hud.draw_image_message(self.screen, self.current_state, (self.w, self.h), self.sprite_manager.state_images)
         
-        pygame.display.flip() #* Cập nhật toàn bộ màn hình
+        if update_rects is None:
+            pygame.display.flip() #* Cập nhật toàn bộ màn hình
+        else:
+            pygame.display.update(update_rects) #* Chỉ cập nhật vùng map đã đổi + HUD
 
     def run(self, initial_path: List[str]):
         #* Vòng lặp chính của game
         game = self.src 
         self.path = initial_path 
+        self.planner.adopt(self.src, initial_path)
         self.current_path_index = 0
         self.sound_manager.play_music()
         
         while self.is_running:
-            self.clock.tick(self.fps)
-            self.handle_input()
+            if self.is_paused:
+                #* Chế độ nghỉ (tạm dừng, start / thắng / thua, chọn cổng): chờ sự kiện tối đa 1/IDLE_FPS giây
+                #* thay vì vẽ ở FPS đầy đủ; có phím bấm thì xử lý ngay
+                first_event = pygame.event.wait(1000 // IDLE_FPS)
+                dt = self.clock.tick() / 1000
+            else:
+                first_event = None
+                dt = self.clock.tick(self.fps) / 1000
+            self.handle_input(first_event)
+            self._poll_planning()
             
             #* Xử lý reset sau khi đã thực hiện _reset_game()
             if self.reset_requested:
@@ -276,8 +550,6 @@ class Renderer:
                 self.reset_requested = False
                 game = self.src #! Gán lại game object mới sau khi reset
             
-            self.render(game) #! Luôn vẽ hình dù đang tạm dừng hay đang chạy
-            
             #* Chạy game khi không ở trạng thái pause game, over, win, và chọn cổng tele
             if self.current_state not in ["game_over", "win"] and not self.is_paused and not self.is_teleport_mode:
                 self.sound_manager.play_music() 
@@ -306,12 +578,15 @@ class Renderer:
                         #* Reset request sau khi hoàn tất di chuyển
                         self.manual_move_requested = None
                         
-                else:
-                    #* --- AUTO MODE LOGIC ---
-                    self.step_delay_counter += 1
-                    
-                    if self.step_delay_counter >= self.STEP_DELAY:
-                        self.step_delay_counter = 0 
+                elif self.planning is None:
+                    #* --- AUTO MODE LOGIC --- (chờ khi đường đi còn đang được tính ở tiến trình nền)
+                    #* Fixed timestep: mỗi step_interval giây thời gian thực là 1 bước, không phụ thuộc FPS.
+                    #* Bị trễ nhiều => bù tối đa MAX_STEPS_PER_FRAME bước rồi bỏ phần thời gian còn lại
+                    self.step_accumulator += dt
+                    steps = 0
+                    while self.step_accumulator >= self.step_interval and not self.is_paused:
+                        self.step_accumulator -= self.step_interval
+                        steps += 1
                         
                         if self.current_path_index < len(self.path):
                             direction_name = self.path[self.current_path_index] #* Lấy hướng tiếp theo từ đường đi A*
@@ -326,15 +601,25 @@ class Renderer:
                             #* Dừng game khi hết đường đi A*
                             self.is_paused = True
                             self.current_state = "paused" 
+                        
+                        if steps >= MAX_STEPS_PER_FRAME:
+                            self.step_accumulator %= self.step_interval
+                            break
                 
             elif self.is_paused or self.is_teleport_mode:
                 self.sound_manager.stop_music()
+                self.step_accumulator = 0.0
+                self._previous_state = None #* Tiếp tục chạy => bước đầu tiên không nội suy từ state cũ
+            
+            self.render(game, dt) #! Luôn vẽ hình dù đang tạm dừng hay đang chạy (sau khi cập nhật => nội suy đúng)
                 
+        self.background.shutdown()
         pygame.quit() 
     
     #! Thực hiện bước di chuyển và cập nhật trạng thái Renderer.
     def _execute_move(self, game: Game, direction_name: str):
         
+        self._previous_state = game #* Giữ state trước bước để nội suy vị trí khi vẽ
         moves = game.get_moves()
         #* Lấy hướng cơ bản (NORTH, EAST,...) từ hướng tele (NORTH_TELE_P1)
         base_direction = direction_name.split("_TELE_P")[0]
@@ -390,11 +675,10 @@ class Renderer:
         self.src = new_game_state
         
         #*Cập nhật lại Renderer nếu map thay đổi (ví dụ: Xouay map)
-        if self.src.w != self.game_w or self.src.h != self.game_h:
+        if self.src.orientation != self.orientation:
             
-            #* Cập nhật kích thước mới cho Renderer
-            self.game_w = self.src.w 
-            self.game_h = self.src.h 
+            #* Cập nhật hướng xoay mới cho Renderer
+            self.orientation = self.src.orientation
             
             #* Setup lại surface để vẽ lại map đúng kích cỡ
             self._setup_surface()
@@ -0,0 +1,95 @@
+from typing import Dict, List, Optional, Tuple
+from .game import Game, Pos
+from .pathfinding import BudgetExceeded, search_stage
+
+REPAIR_MAX_NODES = 5000 #* Trần node của A* mỗi chặng khi sửa kế hoạch (vượt => bỏ sửa, giải lại toàn bộ ở tiến trình nền)
+
+class IncrementalPlanner:
+  #! LẬP KẾ HOẠCH LẠI TĂNG DẦN *
+  #* Giữ kế hoạch trước đó giữa các lần gọi: các state dọc theo đường đi (tra bằng Zobrist key) và các chặng
+  #* của nó (mỗi chặng kết thúc khi ăn 1 food / bánh ma thuật, chặng cuối kết thúc ở exit).
+  #* - reuse: state hiện tại vẫn nằm trên kế hoạch (chưa đi lệch) => dùng lại phần còn lại ngay lập tức.
+  #* - repair: đã lệch => giữ thứ tự các đích còn lại, chỉ A* lại chặng hiện tại. Các chặng sau đi lại các bước
+  #*   cũ nếu vẫn hợp lệ (không chạm ghost, tới đúng đích); chặng nào không đi lại được mới A* lại.
+  #* Bảng khoảng cách (DistanceOracle, sửa cục bộ khi tường bị ăn) và bảng quỹ đạo ghost được dùng lại giữa các lần.
+  __slots__ = ('path', 'states', 'index', 'segments', 'max_nodes')
+  def __init__(self, max_nodes: int = REPAIR_MAX_NODES):
+    self.path: List[str] = [] #* Kế hoạch hiện tại
+    self.states: List[Game] = [] #* states[i] = state trước bước path[i] (states[-1] là state cuối)
+    self.index: Dict[int, int] = {} #* Zobrist key -> vị trí đầu tiên trong states
+    self.segments: List[Tuple[Pos, List[str]]] = [] #* (đích, các bước) của từng chặng theo thứ tự
+    self.max_nodes = max_nodes
+
+  #* Ghi nhớ kế hoạch path bắt đầu từ game
+  def adopt(self, game: Game, path: List[str]) -> None:
+    states = [game]
+    for step in path:
+      game = game.move_to(game.get_moves()[step], step)
+      states.append(game)
+    self.path, self.states = list(path), states
+    self.index = {}
+    for i, state in enumerate(states):
+      self.index.setdefault(hash(state), i)
+
+    #* Chia chặng: kết thúc ở bước ăn food / bánh và ở bước cuối cùng
+    self.segments = []
+    start = 0
+    for i, (before, after) in enumerate(zip(states, states[1:])):
+      if (i == len(path) - 1 or len(after.food_points) < len(before.food_points)
+          or len(after.magical_pies) < len(before.magical_pies)):
+        self.segments.append((after.player, self.path[start:i + 1]))
+        start = i + 1
+
+  #* Vị trí của game trong kế hoạch hiện tại (None nếu không nằm trên kế hoạch)
+  def _position(self, game: Game) -> Optional[int]:
+    i = self.index.get(hash(game))
+    if i is not None and self.states[i] == game:
+      return i
+    return None
+
+  #* Phần còn lại của kế hoạch nếu game vẫn nằm trên kế hoạch, None nếu đã lệch
+  def reuse(self, game: Game) -> Optional[List[str]]:
+    position = self._position(game)
+    if position is None:
+      return None
+    return self.path[position:]
+
+  #* Sửa kế hoạch cho game đã đi lệch. Trả về đường đi mới (đã ghi nhớ làm kế hoạch hiện tại),
+  #* None nếu không sửa được (1 chặng chạm trần node / hết deadline / không tới được, hoặc kết quả không thắng)
+  def repair(self, game: Game, deadline: Optional[float] = None) -> Optional[List[str]]:
+    if not self.segments:
+      return None
+    start, path = game, []
+    for target, steps in self.segments:
+      #* Đích đã bị ăn (lúc chơi thủ công hoặc trên đường của chặng trước) => bỏ chặng
+      if target != game.exit_pos and target not in game.food_points and target not in game.magical_pies:
+        continue
+      #* Chặng hiện tại (chặng đầu còn lại) luôn A* lại; các chặng sau thử đi lại các bước cũ trước
+      end = _replay(game, steps, target) if path else None
+      if end is None:
+        try:
+          steps = search_stage(game, target, self.max_nodes, deadline, None, None)
+        except BudgetExceeded:
+          return None
+        end = _replay(game, steps, target)
+        if end is None:
+          return None
+      game = end
+      path.extend(steps)
+      if game.is_winner():
+        break
+    if not game.is_winner():
+      return None
+    self.adopt(start, path)
+    return path
+
+#* Đi lại steps từ game: state cuối nếu mọi bước hợp lệ, không chạm ghost và dừng ở target, ngược lại None
+def _replay(game: Game, steps: List[str], target: Pos) -> Optional[Game]:
+  for step in steps:
+    moves = game.get_moves()
+    if step not in moves:
+      return None
+    game = game.move_to(moves[step], step)
+    if game.is_game_over():
+      return None
+  return game if game.player == target else None
@@ -0,0 +1,85 @@
+import hashlib
+import json
+import os
+import tempfile
+from typing import Optional
+
+CACHE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".solution_cache")
+MAX_ENTRIES = 256 #* Số lời giải tối đa được giữ trên đĩa (LRU theo thời gian truy cập)
+CACHE_VERSION = 2 #* Tăng khi luật game / thuật toán thay đổi để bỏ các lời giải cũ
+
+class SolutionCache:
+  #! CACHE LỜI GIẢI TRÊN ĐĨA *
+  #* Mỗi lời giải là 1 file JSON <key>.json; key = SHA-256 của nội dung layout + state bắt đầu + planner
+  #* + ngân sách thời gian. Chỉ lưu đường đi đã kiểm tra là thắng (tour.simulate_path), kèm cận tối ưu trong stats.
+  #* Ghi nguyên tử (file tạm + os.replace) => tiến trình khác đọc cùng lúc chỉ thấy file cũ hoặc file mới hoàn chỉnh.
+  #* LRU: lần đọc trúng cập nhật mtime của file; khi vượt MAX_ENTRIES thì xóa các file có mtime cũ nhất.
+  __slots__ = ('directory', 'max_entries')
+  def __init__(self, directory: str = CACHE_DIR, max_entries: int = MAX_ENTRIES):
+    self.directory = directory
+    self.max_entries = max_entries
+
+  #* Key chỉ phụ thuộc nội dung (không dùng hash()/Zobrist vì chúng thay đổi giữa các lần chạy).
+  #* time_budget: đường đi có giới hạn thời gian (ARA*) có thể chưa tối ưu => không dùng chung với lần chạy không giới hạn.
+  #* max_nodes / backend không cần: chặng chạm trần node làm cả planner thất bại (không được lưu)
+  @staticmethod
+  def key(layout: str, game, planner: str, time_budget: Optional[float] = None) -> str:
+    state = (
+      CACHE_VERSION, planner, time_budget, layout.strip(),
+      game.player, game.exit_pos,
+      sorted(game.food_points), sorted(game.magical_pies), sorted(game.walls),
+      list(game.ghost_states), game.powerup_turns, game.rotation_step, game.orientation,
+    )
+    return hashlib.sha256(repr(state).encode("utf-8")).hexdigest()
+
+  def _path(self, key: str) -> str:
+    return os.path.join(self.directory, f"{key}.json")
+
+  #* Trả về {"path": chuỗi đường đi đã nén, "stats": {...}} hoặc None nếu chưa có
+  def get(self, key: str) -> Optional[dict]:
+    file_path = self._path(key)
+    try:
+      with open(file_path, "r", encoding="utf-8") as cache_file:
+        entry = json.load(cache_file)
+    except (OSError, ValueError):
+      #* Không có file, file vừa bị xóa bởi tiến trình khác hoặc hỏng => coi như miss
+      return None
+    try:
+      os.utime(file_path)
+    except OSError:
+      #* File bị tiến trình khác xóa ngay sau khi đọc => vẫn dùng lời giải đã đọc được (chỉ mất cập nhật LRU)
+      pass
+    return entry
+
+  def put(self, key: str, compressed_path: str, stats: dict) -> None:
+    try:
+      os.makedirs(self.directory, exist_ok=True)
+      fd, temp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+      try:
+        with os.fdopen(fd, "w", encoding="utf-8") as temp_file:
+          json.dump({"path": compressed_path, "stats": stats}, temp_file)
+        os.replace(temp_path, self._path(key))
+      except BaseException:
+        os.unlink(temp_path)
+        raise
+      self._evict()
+    except OSError as e:
+      print(f"Solution cache write failed: {e}")
+
+  #* Xóa các lời giải ít được dùng gần đây nhất khi vượt giới hạn
+  def _evict(self) -> None:
+    entries = []
+    for entry in os.scandir(self.directory):
+      if entry.name.endswith(".json"):
+        try:
+          entries.append((entry.stat().st_mtime, entry.path))
+        except OSError:
+          continue
+    if len(entries) <= self.max_entries:
+      return
+    entries.sort()
+    for _, file_path in entries[:len(entries) - self.max_entries]:
+      try:
+        os.unlink(file_path)
+      except OSError:
+        pass
@@ -1,23 +1,68 @@
 import pygame
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Tuple
 from .config import SPRITE_MAP, STATE_FILES 
 
+ATLAS_WIDTH = 2048 #* Chiều rộng tối đa của texture atlas (pixel)
+PLAYER_ANGLES = (0, 90, 180, 270) #* Các góc xoay của player (xem get_rotation_angle)
+
 class SpriteManager:
   def __init__(self, tile_size: int):
+    self.source_frames: Dict[str, List[pygame.Surface]] = {} #* Frame gốc (chưa scale) của từng sprite
+    #* (tên, frame, góc xoay, power-up) -> subsurface của atlas, đã scale / xoay sẵn
+    self.variants: Dict[Tuple[str, int, int, bool], pygame.Surface] = {}
+    self.frame_counts: Dict[str, int] = {} #* Số frame hoạt ảnh của từng sprite
+    self.atlas: Optional[pygame.Surface] = None
+    self.state_images: Dict[str, Optional[pygame.Surface]] = {}
+    self._load_all_assets()
+    self.set_tile_size(tile_size)
+
+  #* Dựng sẵn mọi biến thể (sprite, frame, hướng, kích thước power-up) từ frame gốc theo kích thước ô trên màn hình.
+  #* Chỉ gọi khi kích thước ô đổi (đổi cửa sổ / xoay map) => lúc vẽ không còn scale / xoay
+  def set_tile_size(self, tile_size: int):
     self.tile_size = tile_size
     self.FOOD_SPRITE_SIZE = self.tile_size // 2
     self.FOOD_OFFSET = (self.tile_size - self.FOOD_SPRITE_SIZE) // 2 
-    self.animation_frames: Dict[str, List[pygame.Surface]] = {}
-    self.state_images: Dict[str, Optional[pygame.Surface]] = {}
-    self._load_all_assets()
     self.player_base_size = self.tile_size
     self.player_powerup_size = int(self.tile_size * 1.5)
+    variants = []
+    for name, frames in self.source_frames.items():
+      target_size = self.FOOD_SPRITE_SIZE if name == "food" else self.tile_size
+      for index, frame in enumerate(frames):
+        if name != "player":
+          variants.append(((name, index, 0, False), pygame.transform.smoothscale(frame, (target_size, target_size))))
+          continue
+        for is_powerup in (False, True):
+          size = self.player_powerup_size if is_powerup else self.player_base_size
+          scaled_frame = pygame.transform.smoothscale(frame, (size, size))
+          for angle in PLAYER_ANGLES:
+            variants.append(((name, index, angle, is_powerup), pygame.transform.rotate(scaled_frame, angle)))
+    self._build_atlas(variants)
+    self.frame_counts = {name: len(frames) for name, frames in self.source_frames.items()}
+
+  #* Xếp các biến thể theo từng hàng vào 1 surface (convert_alpha 1 lần), mỗi biến thể là 1 subsurface của atlas
+  def _build_atlas(self, variants: List[Tuple[tuple, pygame.Surface]]):
+    rects, x, y, row_height, atlas_width = [], 0, 0, 0, 1
+    for _, surface in variants:
+      width, height = surface.get_size()
+      if x and x + width > ATLAS_WIDTH:
+        x, y, row_height = 0, y + row_height, 0
+      rects.append(pygame.Rect(x, y, width, height))
+      x += width
+      row_height = max(row_height, height)
+      atlas_width = max(atlas_width, x)
+    self.atlas = pygame.Surface((atlas_width, max(y + row_height, 1)), pygame.SRCALPHA).convert_alpha()
+    self.atlas.fill((0, 0, 0, 0))
+    self.variants = {}
+    for (key, surface), rect in zip(variants, rects):
+      #* BLEND_RGBA_MAX trên nền trong suốt = chép nguyên pixel (kể cả alpha), không hòa màu với nền
+      self.atlas.blit(surface, rect, special_flags=pygame.BLEND_RGBA_MAX)
+      self.variants[key] = self.atlas.subsurface(rect)
     
   def _load_all_assets(self):
     self._load_sprites()
     self._load_state_images()
     self.current_frame_index = 0
-    self.frame_counter = 0
+    self.frame_counter = 0.0 #* Thời gian (giây) tích lũy từ lần đổi frame hoạt ảnh gần nhất
       
   def _load_sprites(self):
     for name, file_name in SPRITE_MAP.items():
@@ -25,25 +70,22 @@ class SpriteManager:
       try:
         image = pygame.image.load(file_path).convert_alpha()
         if name == "wall":
-          scaled_image = pygame.transform.scale(image, (self.tile_size, self.tile_size))
-          self.animation_frames[name] = [scaled_image]
+          self.source_frames[name] = [image]
         else:
           frame_list = []
           # Giả sử các sprite animated có 4 frame nằm ngang
           frame_width = image.get_height() 
-          target_size = self.FOOD_SPRITE_SIZE if name == "food" else self.tile_size
           num_frames = image.get_width()
           for i in range(int(num_frames/frame_width)): 
             frame = image.subsurface((i * frame_width, 0, frame_width, image.get_height()))
-            scaled_frame = pygame.transform.scale(frame, (target_size, target_size))
-            frame_list.append(scaled_frame)
+            frame_list.append(frame)
           
-          self.animation_frames[name] = frame_list
+          self.source_frames[name] = frame_list
       except pygame.error:
         print(f"Lỗi: Không tìm thấy hoặc không tải được file '{file_path}'.")
-        placeholder = pygame.Surface((self.tile_size, self.tile_size))
+        placeholder = pygame.Surface((1, 1))
         placeholder.fill(pygame.Color("grey" if name == "wall" else "red"))
-        self.animation_frames[name] = [placeholder]
+        self.source_frames[name] = [placeholder]
       
   def _load_state_images(self):
     for state, file_name in STATE_FILES.items():
@@ -53,34 +95,25 @@ class SpriteManager:
         print(f"Lỗi khi tải ảnh trạng thái '{file_name}': {e}.")
         self.state_images[state] = None
       
-  def get_current_frame(self, name: str, is_powerup: bool = False) -> pygame.Surface:
-        #*Trả về frame hiện tại của sprite theo tên, có thể scale nếu là player và có powerup.#*
-        frames = self.animation_frames.get(name)
-        if frames:
-            # Wall chỉ có 1 frame
-            if name == "wall":
-                return frames[0]
-            
-            current_frame = frames[self.current_frame_index % len(frames)]
-            
+  def get_current_frame(self, name: str, is_powerup: bool = False, direction_name: str = "EAST") -> pygame.Surface:
+        #*Trả về frame hiện tại của sprite theo tên (player: theo hướng và Power-up), lấy thẳng từ atlas.#*
+        frame_count = self.frame_counts.get(name)
+        if frame_count:
+            frame_index = self.current_frame_index % frame_count
             if name == "player":
-                target_size = self.player_powerup_size if is_powerup else self.player_base_size
-                # Nếu kích thước cần thiết khác kích thước frame gốc, ta scale nó
-                if target_size != current_frame.get_width():
-                    return pygame.transform.scale(current_frame, (target_size, target_size))
-            
-            return current_frame
+                return self.variants[(name, frame_index, self.get_rotation_angle(direction_name), is_powerup)]
+            return self.variants[(name, frame_index, 0, False)]
             
         # Trả về một placeholder nếu không tìm thấy
         placeholder = pygame.Surface((self.tile_size, self.tile_size))
         placeholder.fill(pygame.Color("black"))
         return placeholder
     
-  def update_animation(self, animation_speed: int):
-    #*Cập nhật chỉ số frame animation chung.#*
-    self.frame_counter += 1
-    if self.frame_counter >= animation_speed:
-      self.frame_counter = 0
+  def update_animation(self, frame_interval: float, dt: float):
+    #*Cập nhật chỉ số frame animation chung theo thời gian thực (dt giây), không theo số frame đã vẽ.#*
+    self.frame_counter += dt
+    if self.frame_counter >= frame_interval:
+      self.frame_counter %= frame_interval
       self.current_frame_index = (self.current_frame_index + 1) % 4 # Giả sử 4 frame
   def get_rotation_angle(self, direction_name: str) -> int:
         #*Trả về góc quay (độ) cho sprite người chơi dựa trên hướng di chuyển.#*
@@ -0,0 +1,61 @@
+import time
+from typing import Callable, Dict, List, Optional
+
+STAT_TIMERS = ("estimate", "get_moves", "move_to") #* Các pha được đo thời gian khi timing=True
+DEFAULT_HOOK_INTERVAL = 1000 #* Số lần mở rộng giữa 2 lần gọi hook
+
+class SearchStats:
+  #! THỐNG KÊ TÌM KIẾM *
+  #* Bộ đếm của A* / ARA*, cộng dồn qua mọi lần tìm kiếm dùng chung object.
+  #* Planner nhiều chặng tạo 1 object con cho mỗi chặng (stages) rồi cộng vào object cha.
+  #* Đo thời gian từng lần gọi estimate / get_moves / move_to tốn chi phí => chỉ bật khi timing=True.
+  #* hook(stats): gọi mỗi hook_interval lần mở rộng để theo dõi tiến độ trực tiếp.
+  __slots__ = ('label', 'expanded', 'generated', 'pushes', 'stale_pops', 'open_peak', 'bfs_calls',
+               'heuristic_hits', 'heuristic_misses', 'search_time', 'times', 'stages', 'timing', 'hook', 'hook_interval')
+  def __init__(self, timing: bool = False, hook: Optional[Callable[["SearchStats"], None]] = None,
+               hook_interval: int = DEFAULT_HOOK_INTERVAL, label=None):
+    self.label = label #* Tên chặng (đích của chặng) với object con
+    self.expanded = 0 #* Số node đã mở rộng
+    self.generated = 0 #* Số state con đã sinh (mỗi lần move_to)
+    self.pushes = 0 #* Số lần thêm vào open list
+    self.stale_pops = 0 #* Số bản ghi cũ / trùng bị bỏ qua khi lấy ra khỏi open list
+    self.open_peak = 0 #* Kích thước lớn nhất của open list
+    self.bfs_calls = 0 #* Số lần BFS của DistanceOracle
+    self.heuristic_hits = 0 #* Số lần heuristic food gần nhất lấy từ cache (DistanceOracle.nearest)
+    self.heuristic_misses = 0 #* Số lần heuristic food gần nhất phải tính lại
+    self.search_time = 0.0 #* Tổng thời gian tìm kiếm (giây)
+    self.times: Dict[str, float] = dict.fromkeys(STAT_TIMERS, 0.0) #* Thời gian theo pha (chỉ khi timing=True)
+    self.stages: List["SearchStats"] = []
+    self.timing = timing
+    self.hook = hook
+    self.hook_interval = hook_interval
+
+  #* Bọc fn để cộng thời gian chạy vào times[name]
+  def timed(self, name: str, fn: Callable) -> Callable:
+    times, perf_counter = self.times, time.perf_counter
+    def wrapper(*args):
+      start = perf_counter()
+      result = fn(*args)
+      times[name] += perf_counter() - start
+      return result
+    return wrapper
+
+  #* Tạo object con cho 1 chặng (dùng chung cấu hình timing / hook)
+  def stage(self, label) -> "SearchStats":
+    child = SearchStats(self.timing, self.hook, self.hook_interval, label)
+    self.stages.append(child)
+    return child
+
+  #* Cộng bộ đếm của other vào object này. bfs_calls không được cộng: planner tự đếm tổng số BFS
+  #* của cả lần chạy (gồm cả BFS khi chọn đích giữa các chặng, nằm ngoài các lần A*)
+  def add(self, other: "SearchStats") -> None:
+    self.expanded += other.expanded
+    self.generated += other.generated
+    self.pushes += other.pushes
+    self.stale_pops += other.stale_pops
+    self.open_peak = max(self.open_peak, other.open_peak)
+    self.heuristic_hits += other.heuristic_hits
+    self.heuristic_misses += other.heuristic_misses
+    self.search_time += other.search_time
+    for name, value in other.times.items():
+      self.times[name] += value
@@ -0,0 +1,222 @@
+from typing import List, Optional
+from .game import Game, Pos
+from .distance import INF, DistanceOracle, oracle_for
+from .arena import MAX_NODES
+from .pathfinding import find_multi_stage_path, search_stage
+from .parallel import ParallelStageEvaluator
+from .stats import SearchStats
+
+HELD_KARP_LIMIT = 12 #* Số food tối đa giải chính xác bằng Held-Karp (O(2^n * n^2))
+POWERUP_TURNS = 5 #* Số lượt Power-up khi ăn bánh ma thuật
+
+#*-------------------------------
+#! MA TRẬN CHI PHÍ (player, food..., exit)
+#*-------------------------------
+
+#* Chi phí 1 chặng i -> j: đi thẳng, hoặc ghé 1 bánh ma thuật rồi đi xuyên tường (giống find_multi_stage_path)
+def _leg_costs(game: Game, points: List[Pos]) -> List[List[float]]:
+  oracle = oracle_for(game)
+  pies = list(game.magical_pies)
+  n = len(points)
+  cost = [[INF] * n for _ in range(n)]
+  for i, start in enumerate(points):
+    to_pie = [oracle.distance(start, pie, 0) for pie in pies]
+    for j, end in enumerate(points):
+      if i == j:
+        cost[i][j] = 0
+        continue
+      best = oracle.distance(start, end, 0)
+      for pie, d in zip(pies, to_pie):
+        best = min(best, d + oracle.distance(pie, end, POWERUP_TURNS))
+      cost[i][j] = best
+  return cost
+
+#*-------------------------------
+#! HELD-KARP (chính xác, ít food)
+#*-------------------------------
+
+#* Đỉnh 0 là player, 1..n là food, n+1 là exit. Trả về thứ tự food (chỉ số 1..n)
+def _held_karp(cost: List[List[float]], n: int) -> Optional[List[int]]:
+  if n == 0:
+    return []
+  full = (1 << n) - 1
+  dp = [[INF] * n for _ in range(1 << n)]
+  parent = [[-1] * n for _ in range(1 << n)]
+  for j in range(n):
+    dp[1 << j][j] = cost[0][j + 1]
+
+  for mask in range(1, full + 1):
+    row = dp[mask]
+    for j in range(n):
+      c = row[j]
+      if c == INF or not (mask >> j) & 1:
+        continue
+      leg = cost[j + 1]
+      for k in range(n):
+        if (mask >> k) & 1:
+          continue
+        next_mask = mask | (1 << k)
+        new_cost = c + leg[k + 1]
+        if new_cost < dp[next_mask][k]:
+          dp[next_mask][k] = new_cost
+          parent[next_mask][k] = j
+
+  #* Chọn food cuối cùng rồi đi tới exit
+  best, last = INF, -1
+  for j in range(n):
+    total = dp[full][j] + cost[j + 1][n + 1]
+    if total < best:
+      best, last = total, j
+  if last < 0:
+    return None
+
+  order, mask = [], full
+  while last >= 0:
+    order.append(last + 1)
+    mask, last = mask ^ (1 << last), parent[mask][last]
+  return order[::-1]
+
+#*-------------------------------
+#! HEURISTIC (nhiều food): nearest insertion + 2-opt + Or-opt
+#*-------------------------------
+
+def _tour_cost(cost: List[List[float]], tour: List[int]) -> float:
+  return sum(cost[a][b] for a, b in zip(tour, tour[1:]))
+
+#* Dựng đường mở player -> ... -> exit: chèn dần food gần đường nhất vào vị trí làm tăng chi phí ít nhất
+def _nearest_insertion(cost: List[List[float]], n: int) -> List[int]:
+  tour = [0, n + 1]
+  remaining = set(range(1, n + 1))
+  while remaining:
+    food = min(remaining, key=lambda f: (min(cost[t][f] for t in tour), f))
+    remaining.remove(food)
+    best_i = min(range(1, len(tour)),
+                 key=lambda i: cost[tour[i - 1]][food] + cost[food][tour[i]] - cost[tour[i - 1]][tour[i]])
+    tour.insert(best_i, food)
+  return tour
+
+#* 2-opt trên đường mở (giữ 2 đầu). Chi phí có thể không đối xứng => dùng tổng tiền tố của chiều xuôi/ngược
+def _two_opt(cost: List[List[float]], tour: List[int]) -> bool:
+  size = len(tour)
+  forward, backward = [0.0], [0.0]
+  for a, b in zip(tour, tour[1:]):
+    forward.append(forward[-1] + cost[a][b])
+    backward.append(backward[-1] + cost[b][a])
+
+  for i in range(1, size - 2):
+    for j in range(i + 1, size - 1):
+      #* Đảo đoạn tour[i..j]
+      old = forward[j + 1] - forward[i - 1]
+      new = cost[tour[i - 1]][tour[j]] + (backward[j] - backward[i]) + cost[tour[i]][tour[j + 1]]
+      if new < old:
+        tour[i:j + 1] = tour[i:j + 1][::-1]
+        return True
+  return False
+
+#* Or-opt: chuyển 1 đoạn 1-3 food sang vị trí khác (không đảo chiều)
+def _or_opt(cost: List[List[float]], tour: List[int]) -> bool:
+  size = len(tour)
+  for length in (1, 2, 3):
+    for i in range(1, size - length):
+      j = i + length - 1
+      prev, nxt = tour[i - 1], tour[j + 1]
+      removed = cost[prev][tour[i]] + cost[tour[j]][nxt] - cost[prev][nxt]
+      for p in range(size - 1):
+        if i - 1 <= p <= j:
+          continue
+        a, b = tour[p], tour[p + 1]
+        added = cost[a][tour[i]] + cost[tour[j]][b] - cost[a][b]
+        if added < removed:
+          segment = tour[i:j + 1]
+          rest = tour[:i] + tour[j + 1:]
+          insert_at = p + 1 if p < i else p + 1 - length
+          tour[:] = rest[:insert_at] + segment + rest[insert_at:]
+          return True
+  return False
+
+def _heuristic_order(cost: List[List[float]], n: int) -> Optional[List[int]]:
+  tour = _nearest_insertion(cost, n)
+  while _two_opt(cost, tour) or _or_opt(cost, tour):
+    pass
+  if _tour_cost(cost, tour) == INF:
+    return None
+  return tour[1:-1]
+
+#* Thứ tự ăn food tối ưu (hoặc gần tối ưu) trên ma trận chi phí, None nếu không có tour hợp lệ
+def plan_food_tour(game: Game, evaluator: Optional[ParallelStageEvaluator] = None) -> Optional[List[Pos]]:
+  foods = sorted(game.food_points, key=lambda pos: (pos[1], pos[0]))
+  points = [game.player] + foods + [game.exit_pos]
+  if evaluator is not None:
+    evaluator.prefetch(oracle_for(game), points + list(game.magical_pies))
+  cost = _leg_costs(game, points)
+  n = len(foods)
+  order = _held_karp(cost, n) if n <= HELD_KARP_LIMIT else _heuristic_order(cost, n)
+  if order is None:
+    return None
+  return [points[i] for i in order]
+
+#*-------------------------------
+#! THỰC THI VÀ KIỂM TRA TOUR
+#*-------------------------------
+
+#* Bước đầu tiên của chặng tới target: target hoặc bánh ma thuật nếu đi qua bánh rẻ hơn
+def _first_step(game: Game, target: Pos) -> Pos:
+  oracle = oracle_for(game)
+  best_cost = oracle.distance(game.player, target, game.powerup_turns)
+  best_step = target
+  for magic in game.magical_pies:
+    cost_via_magic = (oracle.distance(game.player, magic, game.powerup_turns)
+                      + oracle.distance(magic, target, POWERUP_TURNS))
+    if cost_via_magic < best_cost:
+      best_cost, best_step = cost_via_magic, magic
+  return best_step
+
+#* Đi lần lượt các chặng bằng A* (có ghost), None nếu 1 chặng thất bại
+def _execute_tour(game_src: Game, order: List[Pos], max_nodes: int, reports: list,
+                  deadline: Optional[float], stats: Optional[SearchStats]) -> Optional[list[str]]:
+  game = game_src
+  full_path = []
+  for target in order + [game_src.exit_pos]:
+    #* Food đã được ăn trên đường đi của chặng trước
+    if target != game_src.exit_pos and target not in game.food_points:
+      continue
+    step_target = _first_step(game, target)
+    for goal in ([step_target, target] if step_target != target else [target]):
+      sub_path = search_stage(game, goal, max_nodes, deadline, reports, stats)
+      if not sub_path and game.player != goal:
+        return None
+      for step in sub_path:
+        game = game.move_to(game.get_moves()[step], step)
+        full_path.append(step)
+  return full_path
+
+#* Mô phỏng lại đường đi bằng Game.move_to: hợp lệ khi không chạm ghost và kết thúc thắng
+def simulate_path(game_src: Game, path: list[str]) -> bool:
+  game = game_src
+  for step in path:
+    moves = game.get_moves()
+    if step not in moves:
+      return False
+    game = game.move_to(moves[step], step)
+    if game.is_game_over():
+      return False
+  return game.is_winner()
+
+def find_tour_path(game_src: Game, max_nodes: int = MAX_NODES, reports: Optional[list] = None,
+                   deadline: Optional[float] = None, stats: Optional[SearchStats] = None,
+                   evaluator: Optional[ParallelStageEvaluator] = None) -> list[str]:
+  #* stats: các chặng của tour vẫn được tính khi phải quay về greedy (công việc đã tốn)
+  tour_reports = []
+  bfs_start = DistanceOracle.bfs_calls
+  order = plan_food_tour(game_src, evaluator)
+  path = _execute_tour(game_src, order, max_nodes, tour_reports, deadline, stats) if order is not None else None
+  if stats is not None:
+    stats.bfs_calls += DistanceOracle.bfs_calls - bfs_start
+
+  if path is None or not simulate_path(game_src, path):
+    print("Tour plan failed validation, falling back to greedy stages.")
+    return find_multi_stage_path(game_src, max_nodes, reports, deadline, stats=stats, evaluator=evaluator)
+
+  if reports is not None:
+    reports.extend(tour_reports)
+  return path
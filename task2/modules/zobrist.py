@@ -0,0 +1,16 @@
+import hashlib
+from typing import Dict
+
+#! BẢNG ZOBRIST *
+#* Mỗi đặc trưng (loại, giá trị) được gán 1 số 64-bit; key của state là XOR các đặc trưng
+#* Số của mỗi đặc trưng được băm từ chính đặc trưng đó => giống nhau giữa các lần chạy và giữa các tiến trình
+Z_ORIENTATION, Z_PLAYER, Z_FOOD, Z_PIE, Z_WALL, Z_GHOST, Z_POWERUP, Z_ROTATION = range(8)
+_zobrist_table: Dict[tuple, int] = {}
+_ZOBRIST_SALT = b"\x5e\xed"
+
+def zobrist(*feature) -> int:
+  value = _zobrist_table.get(feature)
+  if value is None:
+    digest = hashlib.blake2b(repr(feature).encode("ascii"), digest_size=8, salt=_ZOBRIST_SALT).digest()
+    value = _zobrist_table[feature] = int.from_bytes(digest, "little")
+  return value
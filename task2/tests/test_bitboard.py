@@ -0,0 +1,57 @@
+import os
+import random
+import pytest
+from modules.bitboard import BitboardGame
+from modules.game import Game
+
+with open(os.path.join(os.path.dirname(__file__), "..", "layouts", "maze.txt"), "r") as map_file:
+  MAZE = map_file.read()
+
+#* Bánh ma thuật cạnh tường => đi qua sẽ ăn tường, có portal ở các góc trong
+PIE_WALLS = """\
+%%%%%%%%%
+%   %   %
+% O % . %
+%P  %  E%
+%%%%%%%%%"""
+
+#* 2 backend phải thấy cùng 1 state
+def _assert_same_state(game, board):
+  assert board.player == game.player
+  assert board.food_points == game.food_points
+  assert board.magical_pies == game.magical_pies
+  assert board.walls == game.walls
+  assert board.ghost_states == game.ghost_states
+  assert (board.powerup_turns, board.rotation_step, board.orientation, board.steps) == \
+         (game.powerup_turns, game.rotation_step, game.orientation, game.steps)
+  assert board.zobrist_key == game.zobrist_key
+  assert board.get_moves() == game.get_moves()
+  assert board.is_game_over() == game.is_game_over()
+  assert board.is_winner() == game.is_winner()
+
+#* Đi cùng 1 dãy bước ngẫu nhiên trên Game và BitboardGame => mọi state giống nhau
+@pytest.mark.parametrize("map_str", [MAZE, PIE_WALLS])
+@pytest.mark.parametrize("seed", range(10))
+def test_bitboard_matches_game_along_random_walk(map_str, seed):
+  rng = random.Random(seed)
+  game, board = Game.load_map(map_str), BitboardGame.load_map(map_str)
+  _assert_same_state(game, board)
+  for _ in range(200):
+    if game.is_game_over() or game.is_winner():
+      break
+    step, pos = rng.choice(sorted(game.get_moves().items()))
+    game, board = game.move_to(pos, step), board.move_to(pos, step)
+    _assert_same_state(game, board)
+
+#* Chuyển đổi qua lại không làm mất thông tin
+@pytest.mark.parametrize("map_str", [MAZE, PIE_WALLS])
+def test_bitboard_round_trip(map_str):
+  game = Game.load_map(map_str)
+  for step in ["EAST", "NORTH", "EAST", "SOUTH"]:
+    moves = game.get_moves()
+    if step in moves:
+      game = game.move_to(moves[step], step)
+  board = BitboardGame.from_game(game)
+  _assert_same_state(game, board)
+  assert board.to_game() == game
+  assert board.with_target(game.exit_pos).zobrist_key == game.with_target(game.exit_pos).zobrist_key
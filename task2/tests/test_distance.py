@@ -0,0 +1,79 @@
+import os
+import random
+from collections import deque
+import pytest
+from modules import distance
+from modules.bitboard import points_to_mask
+from modules.distance import INF, STEPS, DistanceOracle
+from modules.game import Game
+
+with open(os.path.join(os.path.dirname(__file__), "..", "layouts", "maze.txt"), "r") as map_file:
+  MAZE = map_file.read()
+
+#* BFS thường trên lưới (không Power-up, không cổng): khoảng cách từ start tới mọi ô đi được
+def _grid_bfs(game, start) -> dict:
+  dist = {start: 0}
+  queue = deque([start])
+  while queue:
+    x, y = queue.popleft()
+    for dx, dy in STEPS:
+      pos = (x + dx, y + dy)
+      if 0 <= pos[0] < game.w and 0 <= pos[1] < game.h and pos not in game.walls and pos not in dist:
+        dist[pos] = dist[(x, y)] + 1
+        queue.append(pos)
+  return dist
+
+#* Các truy vấn ngẫu nhiên (start, tập đích) trên các ô không phải tường
+def _queries(game, seed, count=30):
+  rng = random.Random(seed)
+  cells = sorted((x, y) for x in range(game.w) for y in range(game.h) if (x, y) not in game.walls)
+  for _ in range(count):
+    yield rng.choice(cells), frozenset(rng.sample(cells, rng.randint(1, 6)))
+
+#* nearest = min BFS tới từng đích, dạng tập vị trí hay bitmask như nhau; lần gọi lại lấy đúng giá trị từ memo
+@pytest.mark.parametrize("seed", range(3))
+def test_nearest_matches_grid_bfs(seed):
+  game = Game.load_map(MAZE)
+  oracle = DistanceOracle(game.w, game.h, game.walls, ())
+  for start, targets in _queries(game, seed):
+    dist = _grid_bfs(game, start)
+    expected = min((dist.get(target, INF) for target in targets), default=INF)
+    assert oracle.nearest(start, targets, 0) == expected
+    assert oracle.nearest(start, points_to_mask(targets, game.w), 0) == expected
+    hits = DistanceOracle.nearest_hits
+    assert oracle.nearest(start, targets, 0) == expected
+    assert DistanceOracle.nearest_hits == hits + 1
+
+#* Có Power-up / cổng / bánh: nearest (BFS nhiều nguồn) vẫn bằng min của distance tới từng đích (BFS 1 nguồn)
+@pytest.mark.parametrize("with_pies", [False, True])
+@pytest.mark.parametrize("powerup_turns", [0, 3])
+def test_nearest_matches_min_distance(powerup_turns, with_pies):
+  game = Game.load_map(MAZE)
+  pies = game.magical_pies if with_pies else frozenset()
+  oracle = DistanceOracle(game.w, game.h, game.walls, tuple(game.portals))
+  reference = DistanceOracle(game.w, game.h, game.walls, tuple(game.portals))
+  for start, targets in _queries(game, 0):
+    expected = min(reference.distance(start, target, powerup_turns, pies) for target in targets)
+    assert oracle.nearest(start, targets, powerup_turns, pies) == expected
+
+#* Chi phí: mỗi tập đích chỉ 1 BFS nhiều nguồn (không dựng bảng riêng cho từng đích), mọi start / lượt tra chung
+def test_nearest_builds_one_table_per_target_set():
+  game = Game.load_map(MAZE)
+  oracle = DistanceOracle(game.w, game.h, game.walls, tuple(game.portals))
+  targets = game.food_points
+  bfs_calls = DistanceOracle.bfs_calls
+  for x in range(game.w):
+    for y in range(game.h):
+      for powerup_turns in range(6):
+        oracle.nearest((x, y), targets, powerup_turns)
+  assert DistanceOracle.bfs_calls == bfs_calls + 1
+  assert not oracle._layers
+
+#* Bảng không vượt quá NEAREST_CACHE_SIZE
+def test_nearest_memo_is_bounded(monkeypatch):
+  monkeypatch.setattr(distance, "NEAREST_CACHE_SIZE", 8)
+  game = Game.load_map(MAZE)
+  oracle = DistanceOracle(game.w, game.h, game.walls, ())
+  for start, targets in _queries(game, 0):
+    oracle.nearest(start, targets, 0)
+  assert len(oracle._nearest) == 8
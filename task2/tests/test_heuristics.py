@@ -0,0 +1,69 @@
+from collections import deque
+from functools import lru_cache
+import pytest
+from modules.game import Game
+from modules.bitboard import BitboardGame
+from modules.layout_gen import generate_layout
+from modules.pathfinding import HEURISTICS, PathFinder
+
+#* Hành lang ở hàng 7 bị tường (7, 7) chắn, còn lại toàn tường => chỉ qua được bằng Power-up (ăn bánh ở (6, 7)).
+#* Ăn bánh rồi đi sang phải trước: lỗ ở (7, 7) mở đường quay lại food bên trái. Food cách tường chắn và
+#* các cổng ở góc >= 6 ô => từ food không tới được chúng bằng 5 lượt Power-up
+def _wall_column_map() -> str:
+  w, h = 16, 15
+  rows = [["%" if y != 7 or x in (0, 7, w - 1) else " " for x in range(w)] for y in range(h)]
+  for (x, y), char in {(1, 7): ".", (13, 7): ".", (5, 7): "P", (6, 7): "O", (14, 7): "E"}.items():
+    rows[y][x] = char
+  return "\n".join("".join(row) for row in rows)
+
+MAPS = {
+  "wall_column": _wall_column_map(),
+  "generated": generate_layout(7, 7, seed=1, food=2, pies=2),
+}
+
+#* Đường đi tối ưu (BFS trên toàn bộ state, bỏ state chạm ghost): danh sách state từ game tới state thắng
+def _optimal_states(game) -> list:
+  parents = {hash(game): None}
+  queue = deque([game])
+  while queue:
+    state = queue.popleft()
+    if state.is_winner():
+      states = [state]
+      while parents[hash(states[-1])] is not None:
+        states.append(parents[hash(states[-1])])
+      return states[::-1]
+    for direction, pos in state.get_moves().items():
+      child = state.move_to(pos, direction)
+      if not child.is_game_over() and hash(child) not in parents:
+        parents[hash(child)] = state
+        queue.append(child)
+  return []
+
+#* Các state cần kiểm tra kèm chi phí thật: các state trên đường tối ưu (chi phí = số bước còn lại)
+#* và các state sau 1 bước từ state đầu. Tính 1 lần cho mỗi map, dùng chung cho mọi heuristic / backend
+@lru_cache(maxsize=None)
+def _sample_states(name: str) -> list:
+  game = Game.load_map(MAPS[name])
+  path = _optimal_states(game)
+  samples = {hash(state): (state, len(path) - 1 - i) for i, state in enumerate(path)}
+  for direction, pos in game.get_moves().items():
+    child = game.move_to(pos, direction)
+    if hash(child) not in samples and not child.is_game_over():
+      samples[hash(child)] = (child, len(_optimal_states(child)) - 1)
+  return list(samples.values())
+
+@pytest.mark.parametrize("backend", [Game, BitboardGame])
+@pytest.mark.parametrize("heuristic", HEURISTICS)
+@pytest.mark.parametrize("name", MAPS)
+def test_heuristic_never_exceeds_true_cost(name, heuristic, backend):
+  finder = PathFinder(backend.load_map(MAPS[name]), heuristic=heuristic)
+  for state, cost in _sample_states(name):
+    if backend is BitboardGame:
+      state = BitboardGame.from_game(state)
+    assert finder.estimate(state) <= cost, (name, state.player, state.powerup_turns)
+
+#* A* với heuristic MST vẫn trả về đường tối ưu (heuristic chấp nhận được => không bỏ sót đường ngắn nhất)
+@pytest.mark.parametrize("name", MAPS)
+def test_mst_astar_path_is_optimal(name):
+  game = Game.load_map(MAPS[name])
+  assert len(PathFinder(game, heuristic="mst").find()) == len(_optimal_states(game)) - 1
@@ -0,0 +1,42 @@
+import os
+import time
+import pytest
+from modules.game import Game
+from modules.pathfinding import BudgetExceeded, PathFinder, find_multi_stage_path
+from modules.tour import find_tour_path, simulate_path
+
+with open(os.path.join(os.path.dirname(__file__), "..", "layouts", "maze.txt"), "r") as map_file:
+  MAZE = map_file.read()
+
+#* Food (1, 1) bị tường bao kín, không có bánh ma thuật => không có đường thắng
+BLOCKED = """\
+%%%%%%%
+%.%   %
+%%% P %
+%    E%
+%%%%%%%"""
+
+#* Đủ thời gian => đường thắng
+@pytest.mark.parametrize("planner", [find_multi_stage_path, find_tour_path])
+def test_planner_returns_winning_path_within_budget(planner):
+  game = Game.load_map(MAZE)
+  path = planner(game, deadline=time.monotonic() + 60)
+  assert path and simulate_path(game, path)
+
+#* Hết thời gian trước khi có đường => BudgetExceeded (deadline áp dụng cả vòng đầu của ARA*, không chạy vô hạn)
+@pytest.mark.parametrize("planner", [find_multi_stage_path, find_tour_path])
+def test_planner_raises_when_out_of_time(planner):
+  with pytest.raises(BudgetExceeded):
+    planner(Game.load_map(MAZE), deadline=time.monotonic())
+
+#* Quá deadline ngay từ đầu => vòng đầu không mở rộng node nào
+def test_first_round_stops_at_deadline():
+  finder = PathFinder(Game.load_map(MAZE).with_target((1, 1)))
+  with pytest.raises(BudgetExceeded):
+    finder.find_anytime(deadline=time.monotonic())
+  assert finder.stats.expanded == 0
+
+#* 1 chặng thất bại => [] (không trả về đường ghép dở dang)
+@pytest.mark.parametrize("planner", [find_multi_stage_path, find_tour_path])
+def test_planner_returns_empty_path_when_a_stage_fails(planner):
+  assert planner(Game.load_map(BLOCKED)) == []
@@ -0,0 +1,48 @@
+import os
+from modules.game import Game
+from modules.pathfinding import find_multi_stage_path
+from modules.replan import IncrementalPlanner
+from modules.tour import simulate_path
+
+with open(os.path.join(os.path.dirname(__file__), "..", "layouts", "maze.txt"), "r") as map_file:
+  MAZE = map_file.read()
+
+#* Đi theo kế hoạch k bước rồi lệch 1 bước khỏi kế hoạch
+def _deviate(game, path, k):
+  for step in path[:k]:
+    game = game.move_to(game.get_moves()[step], step)
+  moves = game.get_moves()
+  step = next(step for step in moves if step != path[k])
+  return game.move_to(moves[step], step)
+
+#* Vẫn nằm trên kế hoạch => trả về phần còn lại
+def test_reuse_returns_remaining_plan():
+  game = Game.load_map(MAZE)
+  path = find_multi_stage_path(game)
+  planner = IncrementalPlanner()
+  planner.adopt(game, path)
+  state = game
+  for step in path[:10]:
+    state = state.move_to(state.get_moves()[step], step)
+  assert planner.reuse(state) == path[10:]
+  assert planner.reuse(_deviate(game, path, 10)) is None
+
+#* Lệch khỏi kế hoạch => sửa ra đường thắng và ghi nhớ làm kế hoạch mới
+def test_repair_after_deviation_wins():
+  game = Game.load_map(MAZE)
+  path = find_multi_stage_path(game)
+  planner = IncrementalPlanner()
+  planner.adopt(game, path)
+  state = _deviate(game, path, 20)
+  repaired = planner.repair(state)
+  assert repaired and simulate_path(state, repaired)
+  assert planner.reuse(state) == repaired
+
+#* Không có kế hoạch hoặc chạm trần node => None (để giải lại toàn bộ)
+def test_repair_gives_up_gracefully():
+  game = Game.load_map(MAZE)
+  assert IncrementalPlanner().repair(game) is None
+  path = find_multi_stage_path(game)
+  planner = IncrementalPlanner(max_nodes=1)
+  planner.adopt(game, path)
+  assert planner.repair(_deviate(game, path, 20)) is None
@@ -0,0 +1,44 @@
+import os
+from modules.game import Game
+from modules.pathfinding import compress_path, decompress_path, find_multi_stage_path
+from modules.solution_cache import SolutionCache
+
+with open(os.path.join(os.path.dirname(__file__), "..", "layouts", "maze.txt"), "r") as map_file:
+  MAZE = map_file.read()
+
+#* Lời giải có giới hạn thời gian không dùng chung key với lời giải không giới hạn
+def test_key_depends_on_time_budget():
+  game = Game.load_map(MAZE)
+  keys = {SolutionCache.key(MAZE, game, "greedy", budget) for budget in (None, 0.05, 2.0)}
+  assert len(keys) == 3
+  assert SolutionCache.key(MAZE, game, "greedy") == SolutionCache.key(MAZE, game, "greedy", None)
+
+def test_put_then_get(tmp_path):
+  cache = SolutionCache(str(tmp_path))
+  game = Game.load_map(MAZE)
+  key = SolutionCache.key(MAZE, game, "greedy")
+  assert cache.get(key) is None
+  compressed = compress_path(find_multi_stage_path(game))
+  cache.put(key, compressed, {"steps": 132, "suboptimality": 1.0})
+  assert cache.get(key) == {"path": compressed, "stats": {"steps": 132, "suboptimality": 1.0}}
+
+#* Cập nhật mtime lỗi (file vừa bị tiến trình khác xóa) => vẫn trả về lời giải đã đọc
+def test_get_survives_failed_touch(tmp_path, monkeypatch):
+  cache = SolutionCache(str(tmp_path))
+  cache.put("k", "EAST-1", {"steps": 1})
+  def utime(path, *args, **kwargs):
+    os.unlink(path)
+    raise FileNotFoundError(path)
+  monkeypatch.setattr(os, "utime", utime)
+  assert cache.get("k") == {"path": "EAST-1", "stats": {"steps": 1}}
+
+#* compress_path / decompress_path là cặp ngược nhau, kể cả khi tele nhiều lần liên tiếp qua cùng cổng
+def test_compress_round_trip():
+  paths = [
+    [],
+    ["WEST_TELE_P4", "WEST_TELE_P4", "EAST", "EAST", "WEST_TELE_P4"],
+    ["NORTH", "STOP", "STOP", "SOUTH_TELE_P1", "EAST_TELE_P2"],
+    find_multi_stage_path(Game.load_map(MAZE)),
+  ]
+  for path in paths:
+    assert decompress_path(compress_path(path)) == path
@@ -0,0 +1,46 @@
+import os
+import random
+import pytest
+from modules.bitboard import BitboardGame
+from modules.game import Game
+from modules.pathfinding import find_multi_stage_path
+
+with open(os.path.join(os.path.dirname(__file__), "..", "layouts", "maze.txt"), "r") as map_file:
+  MAZE = map_file.read()
+
+#* Bánh ma thuật cạnh tường => đi qua sẽ ăn tường (Z_WALL), có portal ở các góc trong
+PIE_WALLS = """\
+%%%%%%%%%
+%   %   %
+% O % . %
+%P  %  E%
+%%%%%%%%%"""
+
+#* Các state dọc theo 1 đường đi ngẫu nhiên (dừng khi thua / thắng)
+def _random_walk(game, seed, length=200):
+  rng = random.Random(seed)
+  states = [game]
+  for _ in range(length):
+    if game.is_game_over() or game.is_winner():
+      break
+    step, pos = rng.choice(sorted(game.get_moves().items()))
+    game = game.move_to(pos, step)
+    states.append(game)
+  return states
+
+#* Zobrist key cập nhật tăng dần trong move_to / xoay bản đồ phải bằng key tính lại từ đầu
+@pytest.mark.parametrize("backend", [Game, BitboardGame])
+@pytest.mark.parametrize("map_str", [MAZE, PIE_WALLS])
+@pytest.mark.parametrize("seed", range(10))
+def test_incremental_key_matches_full_recompute(backend, map_str, seed):
+  for state in _random_walk(backend.load_map(map_str), seed):
+    assert state.zobrist_key == state._compute_zobrist_key()
+
+#* Đường thắng của A* (ăn hết food, bánh ma thuật) cũng vậy
+@pytest.mark.parametrize("backend", [Game, BitboardGame])
+def test_incremental_key_along_winning_path(backend):
+  game = backend.load_map(MAZE)
+  for step in find_multi_stage_path(Game.load_map(MAZE)):
+    game = game.move_to(game.get_moves()[step], step)
+    assert game.zobrist_key == game._compute_zobrist_key()
+  assert game.is_winner()